@@ -0,0 +1,240 @@
+"""esquema inicial
+
+Tablas tal como las creaba Base.metadata.create_all antes de las migraciones.
+Una base de datos creada así se marca con `alembic stamp 0001` antes de
+`alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:11:03.537645
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('membresias',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('nombre', sa.String(length=50), nullable=False),
+    sa.Column('precio_mensual', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('limite_citas_mes', sa.Integer(), nullable=True),
+    sa.Column('limite_barberos', sa.Integer(), nullable=True),
+    sa.Column('tiene_ecommerce', sa.Boolean(), nullable=True),
+    sa.Column('tiene_analytics_avanzados', sa.Boolean(), nullable=True),
+    sa.Column('tiene_notificaciones_push', sa.Boolean(), nullable=True),
+    sa.Column('prioridad_busqueda', sa.Integer(), nullable=True),
+    sa.Column('destacado_mapa', sa.Boolean(), nullable=True),
+    sa.Column('caracteristicas', sa.JSON(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('usuarios',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('telefono', sa.String(length=20), nullable=True),
+    sa.Column('rol', sa.Enum('SUPER_ADMIN', 'ADMIN_BARBERIA', 'CLIENTE', name='rolusuario'), nullable=False),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('avatar_url', sa.String(length=500), nullable=True),
+    sa.Column('notificaciones_push', sa.Boolean(), nullable=True),
+    sa.Column('notificaciones_whatsapp', sa.Boolean(), nullable=True),
+    sa.Column('notificaciones_email', sa.Boolean(), nullable=True),
+    sa.Column('modo_oscuro', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_usuarios_email'), ['email'], unique=True)
+
+    op.create_table('barberias',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('propietario_id', sa.String(length=36), nullable=False),
+    sa.Column('nombre', sa.String(length=150), nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('direccion', sa.String(length=255), nullable=False),
+    sa.Column('telefono', sa.String(length=20), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('latitud', sa.Numeric(precision=10, scale=8), nullable=True),
+    sa.Column('longitud', sa.Numeric(precision=11, scale=8), nullable=True),
+    sa.Column('nit', sa.String(length=50), nullable=True),
+    sa.Column('horario', sa.JSON(), nullable=True),
+    sa.Column('estado', sa.Enum('PENDIENTE', 'ACTIVA', 'SUSPENDIDA', 'CANCELADA', name='estadobarberia'), nullable=True),
+    sa.Column('plan_membresia', sa.Enum('BASICO', 'PROFESIONAL', 'PREMIUM', name='planmembresia'), nullable=True),
+    sa.Column('fecha_vencimiento', sa.DateTime(), nullable=True),
+    sa.Column('calificacion_promedio', sa.Numeric(precision=2, scale=1), nullable=True),
+    sa.Column('total_resenas', sa.Numeric(), nullable=True),
+    sa.Column('logo_url', sa.String(length=500), nullable=True),
+    sa.Column('fotos', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['propietario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('barberos',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('barberia_id', sa.String(length=36), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('telefono', sa.String(length=20), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('foto_url', sa.String(length=500), nullable=True),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('horario', sa.JSON(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['barberia_id'], ['barberias.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('favoritos',
+    sa.Column('usuario_id', sa.String(length=36), nullable=False),
+    sa.Column('barberia_id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['barberia_id'], ['barberias.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('usuario_id', 'barberia_id')
+    )
+    op.create_table('pagos',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('barberia_id', sa.String(length=36), nullable=False),
+    sa.Column('registrado_por', sa.String(length=36), nullable=True),
+    sa.Column('monto', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('metodo_pago', sa.Enum('TARJETA', 'TRANSFERENCIA', 'EFECTIVO', 'PSE', 'NEQUI', 'DAVIPLATA', name='metodopago'), nullable=False),
+    sa.Column('estado', sa.Enum('PENDIENTE', 'COMPLETADO', 'FALLIDO', 'REEMBOLSADO', name='estadopago'), nullable=True),
+    sa.Column('periodo_inicio', sa.DateTime(), nullable=False),
+    sa.Column('periodo_fin', sa.DateTime(), nullable=False),
+    sa.Column('referencia_externa', sa.String(length=255), nullable=True),
+    sa.Column('factura_url', sa.String(length=500), nullable=True),
+    sa.Column('notas', sa.Text(), nullable=True),
+    sa.Column('fecha_pago', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['barberia_id'], ['barberias.id'], ),
+    sa.ForeignKeyConstraint(['registrado_por'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('pedidos',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('barberia_id', sa.String(length=36), nullable=False),
+    sa.Column('cliente_id', sa.String(length=36), nullable=False),
+    sa.Column('total', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('estado', sa.Enum('PENDIENTE', 'CONFIRMADO', 'ENVIADO', 'ENTREGADO', 'CANCELADO', name='estadopedido'), nullable=True),
+    sa.Column('direccion_envio', sa.Text(), nullable=True),
+    sa.Column('notas', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['barberia_id'], ['barberias.id'], ),
+    sa.ForeignKeyConstraint(['cliente_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('productos',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('barberia_id', sa.String(length=36), nullable=False),
+    sa.Column('nombre', sa.String(length=150), nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('precio', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=True),
+    sa.Column('categoria', sa.String(length=50), nullable=True),
+    sa.Column('imagen_url', sa.String(length=500), nullable=True),
+    sa.Column('imagenes', sa.JSON(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['barberia_id'], ['barberias.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('servicios',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('barberia_id', sa.String(length=36), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('precio', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('duracion_minutos', sa.Integer(), nullable=False),
+    sa.Column('categoria', sa.String(length=50), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['barberia_id'], ['barberias.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('citas',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('barberia_id', sa.String(length=36), nullable=False),
+    sa.Column('cliente_id', sa.String(length=36), nullable=False),
+    sa.Column('barbero_id', sa.String(length=36), nullable=True),
+    sa.Column('servicio_id', sa.String(length=36), nullable=False),
+    sa.Column('fecha_hora', sa.DateTime(), nullable=False),
+    sa.Column('duracion_minutos', sa.Numeric(), nullable=False),
+    sa.Column('precio_total', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('estado', sa.Enum('PENDIENTE', 'CONFIRMADA', 'EN_PROGRESO', 'COMPLETADA', 'CANCELADA', 'NO_ASISTIO', name='estadocita'), nullable=True),
+    sa.Column('notas', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['barberia_id'], ['barberias.id'], ),
+    sa.ForeignKeyConstraint(['barbero_id'], ['barberos.id'], ),
+    sa.ForeignKeyConstraint(['cliente_id'], ['usuarios.id'], ),
+    sa.ForeignKeyConstraint(['servicio_id'], ['servicios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('pedido_items',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('pedido_id', sa.String(length=36), nullable=False),
+    sa.Column('producto_id', sa.String(length=36), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('precio_unitario', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['pedido_id'], ['pedidos.id'], ),
+    sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('resenas',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('barberia_id', sa.String(length=36), nullable=False),
+    sa.Column('cliente_id', sa.String(length=36), nullable=False),
+    sa.Column('cita_id', sa.String(length=36), nullable=True),
+    sa.Column('calificacion', sa.Integer(), nullable=False),
+    sa.Column('comentario', sa.Text(), nullable=True),
+    sa.Column('respuesta_barberia', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['barberia_id'], ['barberias.id'], ),
+    sa.ForeignKeyConstraint(['cita_id'], ['citas.id'], ),
+    sa.ForeignKeyConstraint(['cliente_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('resenas')
+    op.drop_table('pedido_items')
+    op.drop_table('citas')
+    op.drop_table('servicios')
+    op.drop_table('productos')
+    op.drop_table('pedidos')
+    op.drop_table('pagos')
+    op.drop_table('favoritos')
+    op.drop_table('barberos')
+    op.drop_table('barberias')
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_usuarios_email'))
+
+    op.drop_table('usuarios')
+    op.drop_table('membresias')
+
+    # En PostgreSQL los Enum son tipos propios que drop_table no elimina
+    for nombre in ('estadocita', 'estadopedido', 'estadopago', 'metodopago',
+                   'planmembresia', 'estadobarberia', 'rolusuario'):
+        sa.Enum(name=nombre).drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,49 @@
+"""refresh tokens
+
+Tabla de refresh tokens rotativos (familias para detectar reutilización). Va
+aparte de 0001 porque el esquema original no la tenía; si una base creada con
+create_all ya la trae, no se vuelve a crear.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:11:15.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('refresh_tokens'):
+        return
+    op.create_table('refresh_tokens',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('familia_id', sa.String(length=36), nullable=False),
+    sa.Column('usuario_id', sa.String(length=36), nullable=False),
+    sa.Column('expira_en', sa.DateTime(), nullable=False),
+    sa.Column('usado', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_expira_en'), ['expira_en'], unique=False)
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_familia_id'), ['familia_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_usuario_id'), ['usuario_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_usuario_id'))
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_familia_id'))
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_expira_en'))
+
+    op.drop_table('refresh_tokens')
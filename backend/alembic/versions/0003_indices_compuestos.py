@@ -0,0 +1,86 @@
+"""indices compuestos
+
+Índices que siguen la forma de las consultas de las rutas: filtro por igualdad
+seguido de las columnas de orden de la paginación por cursor.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:11:27.237267
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('barberias', schema=None) as batch_op:
+        batch_op.create_index('ix_barberias_created', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_barberias_estado_latitud', ['estado', 'latitud'], unique=False)
+        batch_op.create_index('ix_barberias_listado', ['estado', 'plan_membresia', 'calificacion_promedio', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_barberias_propietario_id'), ['propietario_id'], unique=False)
+
+    with op.batch_alter_table('barberos', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_barberos_barberia_id'), ['barberia_id'], unique=False)
+
+    with op.batch_alter_table('citas', schema=None) as batch_op:
+        batch_op.create_index('ix_citas_barberia_fecha', ['barberia_id', 'fecha_hora', 'id'], unique=False)
+        batch_op.create_index('ix_citas_barbero_fecha', ['barbero_id', 'fecha_hora'], unique=False)
+        batch_op.create_index('ix_citas_cliente_fecha', ['cliente_id', 'fecha_hora', 'id'], unique=False)
+
+    with op.batch_alter_table('pagos', schema=None) as batch_op:
+        batch_op.create_index('ix_pagos_barberia_fecha', ['barberia_id', 'fecha_pago', 'id'], unique=False)
+        batch_op.create_index('ix_pagos_fecha', ['fecha_pago', 'id'], unique=False)
+
+    with op.batch_alter_table('productos', schema=None) as batch_op:
+        batch_op.create_index('ix_productos_barberia_created', ['barberia_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('resenas', schema=None) as batch_op:
+        batch_op.create_index('ix_resenas_barberia_cliente', ['barberia_id', 'cliente_id'], unique=False)
+        batch_op.create_index('ix_resenas_barberia_created', ['barberia_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('servicios', schema=None) as batch_op:
+        batch_op.create_index('ix_servicios_barberia_created', ['barberia_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.create_index('ix_usuarios_created', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.drop_index('ix_usuarios_created')
+
+    with op.batch_alter_table('servicios', schema=None) as batch_op:
+        batch_op.drop_index('ix_servicios_barberia_created')
+
+    with op.batch_alter_table('resenas', schema=None) as batch_op:
+        batch_op.drop_index('ix_resenas_barberia_created')
+        batch_op.drop_index('ix_resenas_barberia_cliente')
+
+    with op.batch_alter_table('productos', schema=None) as batch_op:
+        batch_op.drop_index('ix_productos_barberia_created')
+
+    with op.batch_alter_table('pagos', schema=None) as batch_op:
+        batch_op.drop_index('ix_pagos_fecha')
+        batch_op.drop_index('ix_pagos_barberia_fecha')
+
+    with op.batch_alter_table('citas', schema=None) as batch_op:
+        batch_op.drop_index('ix_citas_cliente_fecha')
+        batch_op.drop_index('ix_citas_barbero_fecha')
+        batch_op.drop_index('ix_citas_barberia_fecha')
+
+    with op.batch_alter_table('barberos', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_barberos_barberia_id'))
+
+    with op.batch_alter_table('barberias', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_barberias_propietario_id'))
+        batch_op.drop_index('ix_barberias_listado')
+        batch_op.drop_index('ix_barberias_estado_latitud')
+        batch_op.drop_index('ix_barberias_created')
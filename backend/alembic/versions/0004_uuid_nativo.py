@@ -0,0 +1,113 @@
+"""uuid nativo
+
+Los ids pasan de String(36) a uuid nativo en PostgreSQL y a 16 bytes (BLOB) en
+SQLite. Los valores existentes se convierten; los ids nuevos son UUIDv7.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:02:41.118305
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNAS = {
+    'usuarios': ['id'],
+    'membresias': ['id'],
+    'barberias': ['id', 'propietario_id'],
+    'favoritos': ['usuario_id', 'barberia_id'],
+    'refresh_tokens': ['familia_id', 'usuario_id'],
+    'barberos': ['id', 'barberia_id'],
+    'servicios': ['id', 'barberia_id'],
+    'productos': ['id', 'barberia_id'],
+    'pedidos': ['id', 'barberia_id', 'cliente_id'],
+    'pedido_items': ['id', 'pedido_id', 'producto_id'],
+    'citas': ['id', 'barberia_id', 'cliente_id', 'barbero_id', 'servicio_id'],
+    'resenas': ['id', 'barberia_id', 'cliente_id', 'cita_id'],
+    'pagos': ['id', 'barberia_id', 'registrado_por'],
+}
+
+# (tabla, columna, tabla referenciada)
+CLAVES_FORANEAS = [
+    ('barberias', 'propietario_id', 'usuarios'),
+    ('favoritos', 'usuario_id', 'usuarios'),
+    ('favoritos', 'barberia_id', 'barberias'),
+    ('refresh_tokens', 'usuario_id', 'usuarios'),
+    ('barberos', 'barberia_id', 'barberias'),
+    ('servicios', 'barberia_id', 'barberias'),
+    ('productos', 'barberia_id', 'barberias'),
+    ('pedidos', 'barberia_id', 'barberias'),
+    ('pedidos', 'cliente_id', 'usuarios'),
+    ('pedido_items', 'pedido_id', 'pedidos'),
+    ('pedido_items', 'producto_id', 'productos'),
+    ('citas', 'barberia_id', 'barberias'),
+    ('citas', 'cliente_id', 'usuarios'),
+    ('citas', 'barbero_id', 'barberos'),
+    ('citas', 'servicio_id', 'servicios'),
+    ('resenas', 'barberia_id', 'barberias'),
+    ('resenas', 'cliente_id', 'usuarios'),
+    ('resenas', 'cita_id', 'citas'),
+    ('pagos', 'barberia_id', 'barberias'),
+    ('pagos', 'registrado_por', 'usuarios'),
+]
+
+
+def _texto_a_bytes(valor):
+    if isinstance(valor, str):
+        return uuid.UUID(valor).bytes
+    return valor
+
+
+def _bytes_a_texto(valor):
+    if isinstance(valor, bytes):
+        return str(uuid.UUID(bytes=valor))
+    return valor
+
+
+def _convertir_postgresql(tipo, using: str) -> None:
+    # Las FK exigen el mismo tipo en ambos extremos: se quitan y se recrean
+    for tabla, columna, _ in CLAVES_FORANEAS:
+        op.drop_constraint(f'{tabla}_{columna}_fkey', tabla, type_='foreignkey')
+    for tabla, columnas in COLUMNAS.items():
+        for columna in columnas:
+            op.alter_column(tabla, columna, type_=tipo, postgresql_using=using.format(columna))
+    for tabla, columna, referenciada in CLAVES_FORANEAS:
+        op.create_foreign_key(f'{tabla}_{columna}_fkey', tabla, referenciada, [columna], ['id'])
+
+
+def _convertir_sqlite(funcion, tipo) -> None:
+    # SQLite guarda el valor tal cual sin importar el tipo declarado: primero se
+    # convierten los datos y luego se recrea cada tabla con el tipo nuevo
+    conexion = op.get_bind()
+    conexion.connection.driver_connection.create_function('convertir_uuid', 1, funcion, deterministic=True)
+    for tabla, columnas in COLUMNAS.items():
+        asignaciones = ', '.join(f'{c} = convertir_uuid({c})' for c in columnas)
+        op.execute(f'UPDATE {tabla} SET {asignaciones}')
+        with op.batch_alter_table(tabla) as batch_op:
+            for columna in columnas:
+                batch_op.alter_column(columna, type_=tipo)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _convertir_postgresql(postgresql.UUID(as_uuid=True), '{}::uuid')
+    else:
+        _convertir_sqlite(_texto_a_bytes, sa.LargeBinary(length=16))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _convertir_postgresql(sa.String(length=36), '{}::text')
+    else:
+        _convertir_sqlite(_bytes_a_texto, sa.String(length=36))
@@ -0,0 +1,68 @@
+"""agregados de calificacion
+
+Suma, conteo entero e histograma de 1 a 5 estrellas por barbería, calculados
+desde las reseñas existentes.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 11:41:09.582214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ESTRELLAS = range(1, 6)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('barberias', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('suma_calificaciones', sa.Integer(), server_default='0', nullable=False))
+        for n in ESTRELLAS:
+            batch_op.add_column(sa.Column(f'estrellas_{n}', sa.Integer(), server_default='0', nullable=False))
+
+    # El promedio redondeado que se guardaba no permite reconstruir la suma: se recalcula todo
+    conteo = 'SELECT COUNT(*) FROM resenas r WHERE r.barberia_id = barberias.id'
+    suma = 'SELECT COALESCE(SUM(r.calificacion), 0) FROM resenas r WHERE r.barberia_id = barberias.id'
+    estrellas = ', '.join(
+        f'estrellas_{n} = ({conteo} AND r.calificacion = {n})' for n in ESTRELLAS
+    )
+    op.execute(
+        f'UPDATE barberias SET total_resenas = ({conteo}), suma_calificaciones = ({suma}), {estrellas}'
+    )
+    op.execute(
+        'UPDATE barberias SET calificacion_promedio = CASE WHEN total_resenas > 0 '
+        'THEN ROUND(suma_calificaciones * 1.0 / total_resenas, 1) ELSE 0 END'
+    )
+
+    with op.batch_alter_table('barberias', schema=None) as batch_op:
+        batch_op.alter_column(
+            'total_resenas',
+            existing_type=sa.Numeric(),
+            type_=sa.Integer(),
+            nullable=False,
+            server_default='0',
+            postgresql_using='total_resenas::integer'
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('barberias', schema=None) as batch_op:
+        batch_op.alter_column(
+            'total_resenas',
+            existing_type=sa.Integer(),
+            type_=sa.Numeric(),
+            nullable=True,
+            server_default=None
+        )
+        for n in ESTRELLAS:
+            batch_op.drop_column(f'estrellas_{n}')
+        batch_op.drop_column('suma_calificaciones')
@@ -0,0 +1,50 @@
+"""resumen citas
+
+Acumulados de citas por día y semana para los paneles de analytics. La tabla
+nace vacía: se llena con `python -m app.services.analytics` tras el upgrade.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 10:19:24.094573
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.models.tipos import UUIDNativo
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ESTADOS_CITA = ('PENDIENTE', 'CONFIRMADA', 'EN_PROGRESO', 'COMPLETADA', 'CANCELADA', 'NO_ASISTIO')
+
+
+def upgrade() -> None:
+    op.create_table('resumen_citas',
+    sa.Column('barberia_id', UUIDNativo(), nullable=False),
+    sa.Column('granularidad', sa.Enum('DIA', 'SEMANA', name='granularidad'), nullable=False),
+    sa.Column('inicio', sa.Date(), nullable=False),
+    sa.Column('barbero_id', UUIDNativo(), nullable=False),
+    sa.Column('servicio_id', UUIDNativo(), nullable=False),
+    # El tipo estadocita ya existe en PostgreSQL (tabla citas)
+    sa.Column('estado', sa.Enum(*ESTADOS_CITA, name='estadocita').with_variant(
+        postgresql.ENUM(*ESTADOS_CITA, name='estadocita', create_type=False), 'postgresql'
+    ), nullable=False),
+    sa.Column('citas', sa.Integer(), nullable=False),
+    sa.Column('minutos', sa.Integer(), nullable=False),
+    sa.Column('ingresos', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['barberia_id'], ['barberias.id'], ),
+    sa.PrimaryKeyConstraint('barberia_id', 'granularidad', 'inicio', 'barbero_id', 'servicio_id', 'estado')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('resumen_citas')
+    sa.Enum(name='granularidad').drop(op.get_bind(), checkfirst=True)
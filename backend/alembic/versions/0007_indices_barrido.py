@@ -0,0 +1,36 @@
+"""indices barrido
+
+Índices para que el barrido periódico recorra solo las filas candidatas:
+barberías activas por vencimiento y citas pendientes por fecha.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 10:22:29.675062
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('barberias', schema=None) as batch_op:
+        batch_op.create_index('ix_barberias_estado_vencimiento', ['estado', 'fecha_vencimiento'], unique=False)
+
+    with op.batch_alter_table('citas', schema=None) as batch_op:
+        batch_op.create_index('ix_citas_estado_fecha', ['estado', 'fecha_hora'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('citas', schema=None) as batch_op:
+        batch_op.drop_index('ix_citas_estado_fecha')
+
+    with op.batch_alter_table('barberias', schema=None) as batch_op:
+        batch_op.drop_index('ix_barberias_estado_vencimiento')
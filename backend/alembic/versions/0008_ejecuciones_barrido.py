@@ -0,0 +1,39 @@
+"""ejecuciones barrido
+
+Acumulados por tarea del barrido, para que la API muestre lo que hizo el
+worker separado.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 12:10:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ejecuciones_barrido',
+    sa.Column('tarea', sa.String(length=50), nullable=False),
+    sa.Column('ejecuciones', sa.Integer(), nullable=False),
+    sa.Column('filas_total', sa.Integer(), nullable=False),
+    sa.Column('errores', sa.Integer(), nullable=False),
+    sa.Column('ultima_ejecucion', sa.DateTime(), nullable=True),
+    sa.Column('filas_ultima', sa.Integer(), nullable=True),
+    sa.Column('lotes_ultima', sa.Integer(), nullable=True),
+    sa.Column('duracion_ms_ultima', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('tarea')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ejecuciones_barrido')
@@ -1,18 +1,172 @@
-from sqlalchemy import create_engine
+import asyncio
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.config.settings import settings
 
-engine = create_engine(settings.DATABASE_URL)
+# Drivers: psycopg 3 sirve tanto para el motor síncrono como para el asíncrono
+DRIVERS_SYNC = {"postgresql": "postgresql+psycopg", "sqlite": "sqlite"}
+DRIVERS_ASYNC = {"postgresql": "postgresql+psycopg", "sqlite": "sqlite+aiosqlite"}
+
+
+def _url_con_driver(url: str, drivers: dict):
+    url = make_url(url)
+    if "+" in url.drivername:
+        return url
+    return url.set(drivername=drivers.get(url.drivername, url.drivername))
+
+
+def _opciones_motor(url) -> dict:
+    """Pool y parámetros de conexión de Settings; SQLite conserva los del dialecto"""
+    if url.get_backend_name() != "postgresql":
+        return {}
+    connect_args = {
+        "prepare_threshold": settings.DB_PREPARE_THRESHOLD or None,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SEGUNDOS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SEGUNDOS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+def _configurar_preparadas(engine) -> None:
+    # prepared_max no es argumento de connect(): se fija en cada conexión nueva
+    # (en el motor async la conexión llega envuelta por SQLAlchemy)
+    if engine.dialect.name == "postgresql" and settings.DB_PREPARE_THRESHOLD:
+        @event.listens_for(engine, "connect")
+        def _al_conectar(conexion_dbapi, registro):
+            getattr(conexion_dbapi, "driver_connection", conexion_dbapi).prepared_max = settings.DB_PREPARED_MAX
+
+
+URL_SYNC = _url_con_driver(settings.DATABASE_URL, DRIVERS_SYNC)
+
+engine = create_engine(URL_SYNC, **_opciones_motor(URL_SYNC))
+_configurar_preparadas(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+URL_ASYNC = _url_con_driver(settings.DATABASE_URL, DRIVERS_ASYNC)
+async_engine = create_async_engine(URL_ASYNC, **_opciones_motor(URL_ASYNC))
+_configurar_preparadas(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class SesionEnHilos:
+    """Session síncrona con la interfaz de AsyncSession que usan las rutas.
+
+    Cada operación de base de datos se ejecuta en el threadpool; solo se usa con
+    DB_ASYNC=False para comparar contra el driver asíncrono.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    def get_bind(self):
+        return self.sync_session.get_bind()
+
+    async def execute(self, statement, *args, **kwargs):
+        def ejecutar():
+            resultado = self.sync_session.execute(statement, *args, **kwargs)
+            # Las filas se leen en el hilo; un UPDATE/DELETE conserva su rowcount
+            return resultado.freeze() if getattr(resultado, "returns_rows", True) else resultado
+        resultado = await run_in_threadpool(ejecutar)
+        return resultado() if callable(resultado) else resultado
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return (await self.execute(statement, *args, **kwargs)).scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def refresh(self, instance, *args, **kwargs) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, *args, **kwargs)
+
+    async def delete(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, *args, **kwargs) -> None:
+        await run_in_threadpool(self.sync_session.flush, *args, **kwargs)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+SesionEnHilosLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Conexiones que puede llegar a abrir el pool del motor síncrono (5 + 10 por defecto en SQLite)
+if URL_SYNC.get_backend_name() == "postgresql":
+    MAX_SESIONES_EN_HILOS = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+else:
+    MAX_SESIONES_EN_HILOS = 15
+
+# Entre llamadas la sesión suelta el hilo pero conserva la conexión: si hubiera
+# más sesiones que conexiones, los hilos quedarían bloqueados esperando el pool.
+_limite_sesiones_en_hilos = None
+
+
+def _obtener_limite_sesiones() -> asyncio.Semaphore:
+    global _limite_sesiones_en_hilos
+    if _limite_sesiones_en_hilos is None:
+        _limite_sesiones_en_hilos = asyncio.Semaphore(MAX_SESIONES_EN_HILOS)
+    return _limite_sesiones_en_hilos
+
+
+async def get_db():
+    if settings.DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    async with _obtener_limite_sesiones():
+        db = SesionEnHilos(SesionEnHilosLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+def estado_pool(motor) -> dict:
+    """Ocupación actual del pool de `motor` (síncrono)"""
+    pool = motor.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "tamano": pool.size(),
+        "en_uso": pool.checkedout(),
+        "libres": pool.checkedin(),
+        # overflow() arranca en -tamaño y sube con cada conexión abierta
+        "overflow": max(pool.overflow(), 0),
+        "timeout_segundos": pool.timeout(),
+    }
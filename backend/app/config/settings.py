@@ -9,12 +9,88 @@ class Settings(BaseSettings):
 
     # Database (SQLite para desarrollo, PostgreSQL para producción)
     DATABASE_URL: str = "sqlite:///./nextbarber.db"
+    # Rutas con AsyncSession (aiosqlite / psycopg async); False usa la sesión síncrona en el threadpool
+    DB_ASYNC: bool = True
+    # Pool de conexiones de PostgreSQL (por motor y por proceso: workers x tamaño + overflow
+    # debe caber en max_connections). Las esperas por conexión salen en /api/pool y /api/metrics
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SEGUNDOS: int = 10
+    DB_POOL_RECYCLE_SEGUNDOS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # statement_timeout de cada conexión (0 lo desactiva)
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # psycopg 3 prepara en el servidor las sentencias que se repiten este número de veces
+    # en una conexión y guarda hasta DB_PREPARED_MAX; 0 lo desactiva (PgBouncer en modo transacción)
+    DB_PREPARE_THRESHOLD: int = 2
+    DB_PREPARED_MAX: int = 200
 
     # JWT
     SECRET_KEY: str = "tu-secret-key-super-segura-cambiar-en-produccion"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Cada cuánto se borran los refresh tokens expirados
+    REFRESH_PURGA_INTERVALO_MINUTOS: int = 60
+    # Segundos que se reutiliza rol/estado del usuario sin consultar la base de datos
+    PRINCIPAL_CACHE_TTL_SEGUNDOS: int = 60
+
+    # bcrypt: costo (los hashes con otro costo se regeneran al iniciar sesión),
+    # hilos dedicados y trabajos en espera antes de responder 503
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_HILOS: int = 4
+    BCRYPT_MAX_PENDIENTES: int = 64
+
+    # Agenda: tamaño del intervalo para calcular disponibilidad
+    DISPONIBILIDAD_INTERVALO_MINUTOS: int = 15
+    DISPONIBILIDAD_MAX_DIAS: int = 31
+    # Vigencia de la agenda compilada en cada proceso (los otros workers no la invalidan)
+    DISPONIBILIDAD_CACHE_SEGUNDOS: int = 30
+    # Zona de los horarios de las barberías; las citas se guardan en UTC sin zona
+    ZONA_HORARIA: str = "America/Bogota"
+
+    # Índice geográfico en memoria: cada cuánto verificar si barberías cambió en otro proceso
+    GEO_INDICE_REFRESCO_SEGUNDOS: int = 30
+
+    # Barrido periódico: suspende suscripciones vencidas y cierra citas pendientes pasadas.
+    # Corre en su propio proceso (python -m app.services.barrido); dentro de la API
+    # solo tiene sentido con un único worker, si no cada worker repite las pasadas
+    BARRIDO_EN_PROCESO: bool = False
+    BARRIDO_INTERVALO_SEGUNDOS: int = 300
+    BARRIDO_LOTE: int = 500
+    BARRIDO_PAUSA_MS: int = 50
+    BARRIDO_GRACIA_CITAS_HORAS: int = 24
+
+    # Importación masiva: filas por lote (executemany + commit) y errores reportados
+    IMPORTACION_LOTE: int = 1000
+    IMPORTACION_MAX_ERRORES: int = 1000
+
+    # Exportación en streaming: filas por bloque leído del cursor
+    EXPORTACION_LOTE: int = 2000
+
+    # Analytics: rango máximo consultable en los paneles
+    ANALYTICS_MAX_DIAS: int = 731
+
+    # Caché de catálogo público (en memoria; Redis opcional para varios workers)
+    CACHE_CATALOGO_TTL_SEGUNDOS: int = 300
+    CACHE_CATALOGO_MAX_ENTRADAS: int = 5000
+    CACHE_REDIS_URL: str = ""
+    # Cache-Control de las respuestas públicas (CDN / proxy); revalidan con ETag
+    CACHE_HTTP_MAX_AGE_SEGUNDOS: int = 60
+
+    # Métricas Prometheus en /api/metrics; apagadas no se instala el middleware ni los eventos SQL
+    METRICAS_HABILITADAS: bool = False
+
+    # SQL lenta: umbral del log (0 lo desactiva) y cuántas se conservan para /api/sql-lentas
+    SQL_LENTA_MS: int = 500
+    SQL_LENTAS_MAX: int = 200
+    # Trazas por petición con la cabecera X-Debug-SQL (valor = SQL_DEBUG_TOKEN; vacío las desactiva)
+    SQL_DEBUG_TOKEN: str = ""
+    SQL_TRAZAS_MAX: int = 50
+    SQL_TRAZA_MAX_SENTENCIAS: int = 500
+    # Presupuestos de SQL por ruta (app/services/presupuestos_sql.py): en estricto
+    # un exceso hace fallar la petición y una ruta sin presupuesto impide arrancar
+    SQL_PRESUPUESTO_ESTRICTO: bool = False
 
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
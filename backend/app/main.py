@@ -1,50 +1,171 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config.settings import settings
-from app.config.database import Base, engine
-from app.routes import auth, usuarios, barberias, servicios, citas, resenas, membresias, pagos, productos
+from app.config.database import engine, async_engine, estado_pool
+from app.middlewares.auth import Principal, requiere_super_admin
+from app.middlewares.traza_sql import MiddlewareTrazaSQL
+from app.services.geo import indice_barberias
+from app.services.hashing import pool_hashing
+from app.services.presupuestos_sql import presupuestos_sql
+from app.services.traza_sql import traza_sql
+from app.routes import auth, usuarios, barberias, servicios, citas, resenas, membresias, pagos, productos, analytics
 
-# Importar modelos para crear tablas
+# Registrar todos los modelos (las relaciones se resuelven por nombre).
+# El esquema lo gestiona Alembic: `alembic upgrade head` antes de arrancar.
 from app.models import *
 
-# Crear tablas
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(
-    title="NextBarber API",
-    description="API para la plataforma SaaS de gestión de barberías",
-    version="1.0.0",
-    docs_url="/api/docs",
-    redoc_url="/api/redoc"
-)
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Rutas
-app.include_router(auth.router, prefix="/api/v1/auth", tags=["Autenticación"])
-app.include_router(usuarios.router, prefix="/api/v1/usuarios", tags=["Usuarios"])
-app.include_router(barberias.router, prefix="/api/v1/barberias", tags=["Barberías"])
-app.include_router(servicios.router, prefix="/api/v1/servicios", tags=["Servicios"])
-app.include_router(citas.router, prefix="/api/v1/citas", tags=["Citas"])
-app.include_router(resenas.router, prefix="/api/v1/resenas", tags=["Reseñas"])
-app.include_router(membresias.router, prefix="/api/v1/membresias", tags=["Membresías"])
-app.include_router(pagos.router, prefix="/api/v1/pagos", tags=["Pagos"])
-app.include_router(productos.router, prefix="/api/v1/productos", tags=["Productos"])
-
-
-@app.get("/")
+# Importar este módulo no crea la app ni toca la base de datos: uvicorn la pide
+# con `app.main:app` (se construye en el primer acceso) o `--factory app.main:create_app`.
+# El barrido, las métricas y la caché se importan donde se usan, no al arrancar.
+
+router = APIRouter()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tareas = [asyncio.create_task(indice_barberias.en_segundo_plano())]
+    if settings.BARRIDO_EN_PROCESO:
+        from app.services.barrido import barrido
+        tareas.append(asyncio.create_task(barrido.en_segundo_plano()))
+    yield
+    for tarea in tareas:
+        tarea.cancel()
+        with suppress(asyncio.CancelledError):
+            await tarea
+    pool_hashing.cerrar()
+    from app.services.cache import cache_catalogo
+    await cache_catalogo.cerrar()
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def create_app() -> FastAPI:
+    """Construye la aplicación: middlewares, instrumentación de los motores y rutas"""
+    app = FastAPI(
+        title="NextBarber API",
+        description="API para la plataforma SaaS de gestión de barberías",
+        version="1.0.0",
+        docs_url="/api/docs",
+        redoc_url="/api/redoc",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan
+    )
+
+    # CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Log de SQL lenta y trazas X-Debug-SQL
+    traza_sql.instrumentar(engine)
+    traza_sql.instrumentar(async_engine.sync_engine)
+    app.add_middleware(MiddlewareTrazaSQL)
+
+    # Métricas: solo si están habilitadas, para no pagar middleware ni eventos SQL
+    if settings.METRICAS_HABILITADAS:
+        from app.middlewares.metricas import MiddlewareMetricas
+        from app.services.metricas import metricas
+        metricas.instrumentar(engine, "sync")
+        metricas.instrumentar(async_engine.sync_engine, "async")
+        app.add_middleware(MiddlewareMetricas)
+
+    # Rutas
+    app.include_router(auth.router, prefix="/api/v1/auth", tags=["Autenticación"])
+    app.include_router(usuarios.router, prefix="/api/v1/usuarios", tags=["Usuarios"])
+    app.include_router(barberias.router, prefix="/api/v1/barberias", tags=["Barberías"])
+    app.include_router(analytics.router, prefix="/api/v1/barberias", tags=["Analytics"])
+    app.include_router(servicios.router, prefix="/api/v1/servicios", tags=["Servicios"])
+    app.include_router(citas.router, prefix="/api/v1/citas", tags=["Citas"])
+    app.include_router(resenas.router, prefix="/api/v1/resenas", tags=["Reseñas"])
+    app.include_router(membresias.router, prefix="/api/v1/membresias", tags=["Membresías"])
+    app.include_router(pagos.router, prefix="/api/v1/pagos", tags=["Pagos"])
+    app.include_router(productos.router, prefix="/api/v1/productos", tags=["Productos"])
+    app.include_router(router)
+    presupuestos_sql.comprobar_rutas(app)
+    return app
+
+
+def __getattr__(nombre: str):
+    if nombre == "app":
+        globals()["app"] = aplicacion = create_app()
+        return aplicacion
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+@router.get("/")
 def root():
     return {"message": "NextBarber API v1.0.0", "docs": "/api/docs"}
 
 
-@app.get("/api/health")
+@router.get("/api/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@router.get("/api/metrics", include_in_schema=False)
+def exportar_metricas():
+    """Métricas en formato de texto de Prometheus"""
+    if not settings.METRICAS_HABILITADAS:
+        raise HTTPException(status_code=404, detail="Métricas deshabilitadas")
+    from app.services.metricas import metricas, TIPO_CONTENIDO
+    return PlainTextResponse(metricas.exportar(), media_type=TIPO_CONTENIDO)
+
+
+@router.get("/api/sql-lentas")
+def sql_lentas(usuario: Principal = Depends(requiere_super_admin)):
+    """Super Admin: últimas sentencias que superaron SQL_LENTA_MS en este proceso"""
+    return traza_sql.lentas()
+
+
+@router.get("/api/debug/sql/{traza_id}", include_in_schema=False)
+def obtener_traza_sql(traza_id: str, request: Request):
+    """Traza de SQL de una petición hecha con X-Debug-SQL (requiere la misma cabecera)"""
+    if not traza_sql.depuracion_permitida(request.headers.get("x-debug-sql")):
+        raise HTTPException(status_code=403, detail="Cabecera X-Debug-SQL no autorizada")
+    traza = traza_sql.traza(traza_id)
+    if traza is None:
+        raise HTTPException(status_code=404, detail="Traza no encontrada (puede haber rotado)")
+    return traza
+
+
+@router.get("/api/presupuestos-sql")
+def excesos_presupuesto_sql(usuario: Principal = Depends(requiere_super_admin)):
+    """Super Admin: rutas que superaron su presupuesto de sentencias SQL en este proceso"""
+    return presupuestos_sql.excesos()
+
+
+@router.get("/api/pool")
+def estado_pools(usuario: Principal = Depends(requiere_super_admin)):
+    """Super Admin: ocupación de los pools de conexiones y, con métricas, las esperas por conexión"""
+    espera = None
+    if settings.METRICAS_HABILITADAS:
+        from app.services.metricas import metricas
+        espera = metricas.espera_pool()
+    return {
+        "sync": estado_pool(engine),
+        "async": estado_pool(async_engine.sync_engine),
+        "espera": espera,
+    }
+
+
+@router.get("/api/cache")
+def estadisticas_cache(usuario: Principal = Depends(requiere_super_admin)):
+    """Super Admin: aciertos y fallos de la caché del catálogo público"""
+    from app.services.cache import cache_catalogo
+    return cache_catalogo.estadisticas()
+
+
+@router.get("/api/barrido")
+def estadisticas_barrido(usuario: Principal = Depends(requiere_super_admin)):
+    """Super Admin: ejecuciones y filas del barrido periódico, lo corra el worker o este proceso"""
+    from app.services.barrido import barrido
+    return barrido.estadisticas()
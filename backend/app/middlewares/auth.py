@@ -1,16 +1,21 @@
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
+from uuid import UUID
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.settings import settings
 from app.config.database import get_db
 from app.models.usuario import Usuario, RolUsuario
+from app.models.barberia import Barberia
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
@@ -41,37 +46,129 @@ def crear_refresh_token(data: dict) -> str:
     return encoded_jwt
 
 
-async def obtener_usuario_actual(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Usuario:
-    credentials_exception = HTTPException(
+class Principal:
+    """Identidad mínima del usuario autenticado, suficiente para autorizar"""
+
+    __slots__ = ("id", "rol", "activo", "barberia_id")
+
+    def __init__(self, id: UUID, rol: RolUsuario, activo: bool, barberia_id: Optional[UUID] = None):
+        self.id = id
+        self.rol = rol
+        self.activo = activo
+        self.barberia_id = barberia_id
+
+
+class CachePrincipales:
+    """Caché de corta duración user_id -> Principal para evitar SQL por request"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._principales: Dict[str, Tuple[float, Principal]] = {}
+
+    def obtener(self, user_id: str) -> Optional[Principal]:
+        entrada = self._principales.get(user_id)
+        if entrada is None:
+            return None
+        if entrada[0] < time.monotonic():
+            with self._lock:
+                self._principales.pop(user_id, None)
+            return None
+        return entrada[1]
+
+    def guardar(self, principal: Principal) -> None:
+        with self._lock:
+            self._principales[str(principal.id)] = (time.monotonic() + self.ttl, principal)
+
+    def invalidar(self, user_id) -> None:
+        with self._lock:
+            self._principales.pop(str(user_id), None)
+
+
+cache_principales = CachePrincipales(settings.PRINCIPAL_CACHE_TTL_SEGUNDOS)
+
+
+def invalidar_principal(user_id) -> None:
+    """Debe llamarse tras cambiar rol, estado o barbería de un usuario"""
+    cache_principales.invalidar(user_id)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _user_id_del_token(token: str) -> str:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        if user_id is None or payload.get("type") != "access":
+            raise _credentials_exception()
+        UUID(user_id)
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+    return user_id
 
-    usuario = db.query(Usuario).filter(Usuario.id == user_id).first()
-    if usuario is None:
-        raise credentials_exception
-    if not usuario.activo:
+
+def _verificar_activo(activo: bool) -> None:
+    if not activo:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuario inactivo"
         )
+
+
+# Se arma una sola vez: en un fallo de caché solo se ejecuta
+_CONSULTA_PRINCIPAL = select(
+    Usuario.id, Usuario.rol, Usuario.activo,
+    select(Barberia.id).where(Barberia.propietario_id == Usuario.id).limit(1).scalar_subquery()
+).where(Usuario.id == bindparam("user_id"))
+
+
+async def obtener_principal(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """Usuario autenticado sin cargar la entidad: JWT + caché, SQL solo si no está en caché"""
+    user_id = _user_id_del_token(token)
+
+    principal = cache_principales.obtener(user_id)
+    if principal is None:
+        fila = (await db.execute(_CONSULTA_PRINCIPAL, {"user_id": user_id})).first()
+        if fila is None:
+            raise _credentials_exception()
+        principal = Principal(
+            id=fila[0],
+            rol=fila[1],
+            activo=bool(fila[2]),
+            barberia_id=fila[3]
+        )
+        cache_principales.guardar(principal)
+
+    _verificar_activo(principal.activo)
+    return principal
+
+
+async def obtener_usuario_actual(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> Usuario:
+    """Carga la entidad Usuario completa (perfil, cambio de contraseña)"""
+    user_id = _user_id_del_token(token)
+
+    usuario = await db.scalar(select(Usuario).where(Usuario.id == user_id))
+    if usuario is None:
+        raise _credentials_exception()
+    _verificar_activo(usuario.activo)
     return usuario
 
 
 def requiere_rol(roles_permitidos: List[RolUsuario]):
     """Dependencia para verificar que el usuario tenga uno de los roles permitidos"""
-    async def verificar_rol(usuario: Usuario = Depends(obtener_usuario_actual)) -> Usuario:
+    async def verificar_rol(usuario: Principal = Depends(obtener_principal)) -> Principal:
         if usuario.rol not in roles_permitidos:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -85,3 +182,21 @@ def requiere_rol(roles_permitidos: List[RolUsuario]):
 requiere_super_admin = requiere_rol([RolUsuario.SUPER_ADMIN])
 requiere_admin_barberia = requiere_rol([RolUsuario.SUPER_ADMIN, RolUsuario.ADMIN_BARBERIA])
 requiere_cliente = requiere_rol([RolUsuario.SUPER_ADMIN, RolUsuario.ADMIN_BARBERIA, RolUsuario.CLIENTE])
+
+
+async def obtener_de_barberia_propia(db, modelo, entidad_id, usuario: Principal, no_encontrado: str):
+    """Carga una entidad con `barberia_id` y verifica que la barbería sea del usuario.
+
+    El propietario sale del mismo SELECT (join), sin una segunda consulta a barberías.
+    """
+    fila = (await db.execute(
+        select(modelo, Barberia.propietario_id)
+        .join(Barberia, Barberia.id == modelo.barberia_id)
+        .where(modelo.id == entidad_id)
+    )).first()
+    if fila is None:
+        raise HTTPException(status_code=404, detail=no_encontrado)
+    entidad, propietario_id = fila
+    if propietario_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
+        raise HTTPException(status_code=403, detail="No tienes permisos")
+    return entidad
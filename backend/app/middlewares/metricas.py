@@ -0,0 +1,38 @@
+import time
+
+from app.services.metricas import metricas
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: latencia, estado y SQL de cada petición, agrupados por plantilla de ruta.
+
+    Se usa la plantilla (`/api/v1/barberias/{barberia_id}`) y no la URL para no
+    disparar la cardinalidad de las series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estado = 500
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        token = metricas.iniciar_peticion()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            # El router de FastAPI deja la ruta resuelta en el scope
+            ruta = getattr(scope.get("route"), "path", None) or "sin_ruta"
+            metricas.terminar_peticion(
+                token, scope["method"], ruta, estado, time.perf_counter() - inicio
+            )
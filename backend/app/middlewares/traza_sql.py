@@ -0,0 +1,42 @@
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.services.presupuestos_sql import presupuestos_sql
+from app.services.traza_sql import traza_sql
+
+
+class MiddlewareTrazaSQL:
+    """Deja la petición en contexto para el log de SQL lenta y, con la cabecera
+    X-Debug-SQL autorizada, guarda la traza completa y devuelve su id.
+
+    Las cabeceras salen antes que el cuerpo: el resumen de la respuesta no
+    incluye lo que se ejecute durante un streaming, la traza guardada sí.
+    Al terminar compara el total de sentencias con el presupuesto de la ruta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        depurar = traza_sql.depuracion_permitida(Headers(scope=scope).get("x-debug-sql"))
+        token = traza_sql.iniciar(scope, depurar)
+        peticion = traza_sql.actual()
+
+        async def enviar(mensaje):
+            if depurar and mensaje["type"] == "http.response.start":
+                cabeceras = MutableHeaders(scope=mensaje)
+                cabeceras["X-Debug-SQL"] = peticion.traza_id
+                cabeceras.append(
+                    "Server-Timing",
+                    f'sql;dur={peticion.segundos * 1000:.1f};desc="{peticion.total} sentencias"'
+                )
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            traza_sql.terminar(token)
+        presupuestos_sql.verificar(scope["method"], peticion.ruta, peticion.total)
@@ -7,3 +7,6 @@ from app.models.resena import Resena
 from app.models.membresia import Membresia
 from app.models.pago import Pago
 from app.models.producto import Producto, Pedido, PedidoItem
+from app.models.refresh_token import RefreshToken
+from app.models.resumen_cita import ResumenCita
+from app.models.ejecucion_barrido import EjecucionBarrido
@@ -1,10 +1,10 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Boolean, DateTime, Enum, ForeignKey, Numeric, Table, JSON
+from sqlalchemy import Column, String, Text, Boolean, DateTime, Enum, ForeignKey, Numeric, Integer, Table, JSON, Index
 from sqlalchemy.orm import relationship
 import enum
 
 from app.config.database import Base
+from app.models.tipos import UUIDNativo, uuid7
 
 
 class EstadoBarberia(str, enum.Enum):
@@ -24,17 +24,26 @@ class PlanMembresia(str, enum.Enum):
 favoritos = Table(
     "favoritos",
     Base.metadata,
-    Column("usuario_id", String(36), ForeignKey("usuarios.id"), primary_key=True),
-    Column("barberia_id", String(36), ForeignKey("barberias.id"), primary_key=True),
+    Column("usuario_id", UUIDNativo, ForeignKey("usuarios.id"), primary_key=True),
+    Column("barberia_id", UUIDNativo, ForeignKey("barberias.id"), primary_key=True),
     Column("created_at", DateTime, default=datetime.utcnow)
 )
 
 
 class Barberia(Base):
     __tablename__ = "barberias"
-
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    propietario_id = Column(String(36), ForeignKey("usuarios.id"), nullable=False)
+    __table_args__ = (
+        # Listado público: estado fijo, ordenado por plan, calificación e id
+        Index("ix_barberias_listado", "estado", "plan_membresia", "calificacion_promedio", "id"),
+        # Búsqueda por caja envolvente cuando el índice espacial está frío
+        Index("ix_barberias_estado_latitud", "estado", "latitud"),
+        Index("ix_barberias_created", "created_at", "id"),
+        # Barrido de suscripciones vencidas
+        Index("ix_barberias_estado_vencimiento", "estado", "fecha_vencimiento"),
+    )
+
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
+    propietario_id = Column(UUIDNativo, ForeignKey("usuarios.id"), nullable=False, index=True)
 
     # Información básica
     nombre = Column(String(150), nullable=False)
@@ -58,9 +67,15 @@ class Barberia(Base):
     plan_membresia = Column(Enum(PlanMembresia), default=PlanMembresia.BASICO)
     fecha_vencimiento = Column(DateTime, nullable=True)
 
-    # Métricas
+    # Métricas: suma, conteo e histograma exactos; el promedio se deriva de ellos
     calificacion_promedio = Column(Numeric(2, 1), default=0.0)
-    total_resenas = Column(Numeric, default=0)
+    total_resenas = Column(Integer, nullable=False, default=0, server_default="0")
+    suma_calificaciones = Column(Integer, nullable=False, default=0, server_default="0")
+    estrellas_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    estrellas_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    estrellas_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    estrellas_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    estrellas_5 = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Imágenes
     logo_url = Column(String(500), nullable=True)
@@ -79,3 +94,7 @@ class Barberia(Base):
     pagos = relationship("Pago", back_populates="barberia", cascade="all, delete-orphan")
     productos = relationship("Producto", back_populates="barberia", cascade="all, delete-orphan")
     favoritos_por = relationship("Usuario", secondary=favoritos, back_populates="favoritos")
+
+    @property
+    def histograma_calificaciones(self) -> dict:
+        return {n: getattr(self, f"estrellas_{n}") or 0 for n in range(1, 6)}
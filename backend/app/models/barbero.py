@@ -1,16 +1,16 @@
-import uuid
 from datetime import datetime
 from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 
 from app.config.database import Base
+from app.models.tipos import UUIDNativo, uuid7
 
 
 class Barbero(Base):
     __tablename__ = "barberos"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    barberia_id = Column(String(36), ForeignKey("barberias.id"), nullable=False)
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
+    barberia_id = Column(UUIDNativo, ForeignKey("barberias.id"), nullable=False, index=True)
 
     nombre = Column(String(100), nullable=False)
     telefono = Column(String(20), nullable=True)
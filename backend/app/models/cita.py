@@ -1,10 +1,10 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Numeric, Enum
+from sqlalchemy import Column, Text, DateTime, ForeignKey, Numeric, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
 from app.config.database import Base
+from app.models.tipos import UUIDNativo, uuid7
 
 
 class EstadoCita(str, enum.Enum):
@@ -18,12 +18,21 @@ class EstadoCita(str, enum.Enum):
 
 class Cita(Base):
     __tablename__ = "citas"
-
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    barberia_id = Column(String(36), ForeignKey("barberias.id"), nullable=False)
-    cliente_id = Column(String(36), ForeignKey("usuarios.id"), nullable=False)
-    barbero_id = Column(String(36), ForeignKey("barberos.id"), nullable=True)
-    servicio_id = Column(String(36), ForeignKey("servicios.id"), nullable=False)
+    __table_args__ = (
+        # Agenda de la barbería, disponibilidad y control de solapamiento
+        Index("ix_citas_barberia_fecha", "barberia_id", "fecha_hora", "id"),
+        Index("ix_citas_barbero_fecha", "barbero_id", "fecha_hora"),
+        # Mis citas
+        Index("ix_citas_cliente_fecha", "cliente_id", "fecha_hora", "id"),
+        # Barrido de citas pendientes ya pasadas
+        Index("ix_citas_estado_fecha", "estado", "fecha_hora"),
+    )
+
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
+    barberia_id = Column(UUIDNativo, ForeignKey("barberias.id"), nullable=False)
+    cliente_id = Column(UUIDNativo, ForeignKey("usuarios.id"), nullable=False)
+    barbero_id = Column(UUIDNativo, ForeignKey("barberos.id"), nullable=True)
+    servicio_id = Column(UUIDNativo, ForeignKey("servicios.id"), nullable=False)
 
     fecha_hora = Column(DateTime, nullable=False)
     duracion_minutos = Column(Numeric, nullable=False)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime
+
+from app.config.database import Base
+
+
+class EjecucionBarrido(Base):
+    """Ejecuciones acumuladas de una tarea del barrido.
+
+    La escribe el worker al terminar cada tarea y la lee la API (/api/barrido),
+    que con BARRIDO_EN_PROCESO=false corre en otro proceso.
+    """
+    __tablename__ = "ejecuciones_barrido"
+
+    tarea = Column(String(50), primary_key=True)
+    ejecuciones = Column(Integer, nullable=False, default=0)
+    filas_total = Column(Integer, nullable=False, default=0)
+    errores = Column(Integer, nullable=False, default=0)
+    ultima_ejecucion = Column(DateTime, nullable=True)
+    filas_ultima = Column(Integer, nullable=True)
+    lotes_ultima = Column(Integer, nullable=True)
+    duracion_ms_ultima = Column(Float, nullable=True)
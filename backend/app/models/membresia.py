@@ -1,14 +1,14 @@
-import uuid
 from datetime import datetime
 from sqlalchemy import Column, String, DateTime, Numeric, Integer, Boolean, JSON
 
 from app.config.database import Base
+from app.models.tipos import UUIDNativo, uuid7
 
 
 class Membresia(Base):
     __tablename__ = "membresias"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
 
     nombre = Column(String(50), nullable=False)
     precio_mensual = Column(Numeric(10, 2), nullable=False)
@@ -1,10 +1,10 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Numeric, Enum
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Numeric, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
 from app.config.database import Base
+from app.models.tipos import UUIDNativo, uuid7
 
 
 class MetodoPago(str, enum.Enum):
@@ -25,10 +25,14 @@ class EstadoPago(str, enum.Enum):
 
 class Pago(Base):
     __tablename__ = "pagos"
-
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    barberia_id = Column(String(36), ForeignKey("barberias.id"), nullable=False)
-    registrado_por = Column(String(36), ForeignKey("usuarios.id"), nullable=True)
+    __table_args__ = (
+        Index("ix_pagos_barberia_fecha", "barberia_id", "fecha_pago", "id"),
+        Index("ix_pagos_fecha", "fecha_pago", "id"),
+    )
+
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
+    barberia_id = Column(UUIDNativo, ForeignKey("barberias.id"), nullable=False)
+    registrado_por = Column(UUIDNativo, ForeignKey("usuarios.id"), nullable=True)
 
     monto = Column(Numeric(10, 2), nullable=False)
     metodo_pago = Column(Enum(MetodoPago), nullable=False)
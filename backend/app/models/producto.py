@@ -1,17 +1,20 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Numeric, Integer, Boolean, Enum, JSON
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Numeric, Integer, Boolean, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 import enum
 
 from app.config.database import Base
+from app.models.tipos import UUIDNativo, uuid7
 
 
 class Producto(Base):
     __tablename__ = "productos"
+    __table_args__ = (
+        Index("ix_productos_barberia_created", "barberia_id", "created_at", "id"),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    barberia_id = Column(String(36), ForeignKey("barberias.id"), nullable=False)
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
+    barberia_id = Column(UUIDNativo, ForeignKey("barberias.id"), nullable=False)
 
     nombre = Column(String(150), nullable=False)
     descripcion = Column(Text, nullable=True)
@@ -41,9 +44,9 @@ class EstadoPedido(str, enum.Enum):
 class Pedido(Base):
     __tablename__ = "pedidos"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    barberia_id = Column(String(36), ForeignKey("barberias.id"), nullable=False)
-    cliente_id = Column(String(36), ForeignKey("usuarios.id"), nullable=False)
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
+    barberia_id = Column(UUIDNativo, ForeignKey("barberias.id"), nullable=False)
+    cliente_id = Column(UUIDNativo, ForeignKey("usuarios.id"), nullable=False)
 
     total = Column(Numeric(10, 2), nullable=False)
     estado = Column(Enum(EstadoPedido), default=EstadoPedido.PENDIENTE)
@@ -60,9 +63,9 @@ class Pedido(Base):
 class PedidoItem(Base):
     __tablename__ = "pedido_items"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    pedido_id = Column(String(36), ForeignKey("pedidos.id"), nullable=False)
-    producto_id = Column(String(36), ForeignKey("productos.id"), nullable=False)
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
+    pedido_id = Column(UUIDNativo, ForeignKey("pedidos.id"), nullable=False)
+    producto_id = Column(UUIDNativo, ForeignKey("productos.id"), nullable=False)
 
     cantidad = Column(Integer, nullable=False)
     precio_unitario = Column(Numeric(10, 2), nullable=False)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+
+from app.config.database import Base
+from app.models.tipos import UUIDNativo
+
+
+class RefreshToken(Base):
+    """Refresh token emitido; solo se guarda el hash de su jti"""
+    __tablename__ = "refresh_tokens"
+
+    id = Column(String(64), primary_key=True)
+    familia_id = Column(UUIDNativo, nullable=False, index=True)
+    usuario_id = Column(UUIDNativo, ForeignKey("usuarios.id"), nullable=False, index=True)
+    expira_en = Column(DateTime, nullable=False, index=True)
+    usado = Column(Boolean, nullable=False, default=False)
@@ -1,18 +1,22 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, Text, DateTime, ForeignKey, Integer, Index
 from sqlalchemy.orm import relationship
 
 from app.config.database import Base
+from app.models.tipos import UUIDNativo, uuid7
 
 
 class Resena(Base):
     __tablename__ = "resenas"
+    __table_args__ = (
+        Index("ix_resenas_barberia_created", "barberia_id", "created_at", "id"),
+        Index("ix_resenas_barberia_cliente", "barberia_id", "cliente_id"),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    barberia_id = Column(String(36), ForeignKey("barberias.id"), nullable=False)
-    cliente_id = Column(String(36), ForeignKey("usuarios.id"), nullable=False)
-    cita_id = Column(String(36), ForeignKey("citas.id"), nullable=True)
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
+    barberia_id = Column(UUIDNativo, ForeignKey("barberias.id"), nullable=False)
+    cliente_id = Column(UUIDNativo, ForeignKey("usuarios.id"), nullable=False)
+    cita_id = Column(UUIDNativo, ForeignKey("citas.id"), nullable=True)
 
     calificacion = Column(Integer, nullable=False)
     comentario = Column(Text, nullable=True)
@@ -0,0 +1,35 @@
+import enum
+import uuid
+from sqlalchemy import Column, Date, Enum, ForeignKey, Integer, Numeric
+
+from app.config.database import Base
+from app.models.cita import EstadoCita
+from app.models.tipos import UUIDNativo
+
+# barbero_id forma parte de la clave primaria: las citas sin barbero usan el UUID nulo
+SIN_BARBERO = uuid.UUID(int=0)
+
+
+class Granularidad(str, enum.Enum):
+    DIA = "dia"
+    SEMANA = "semana"
+
+
+class ResumenCita(Base):
+    """Citas acumuladas por periodo, barbero, servicio y estado.
+
+    Se actualiza de forma incremental cuando una cita se crea o cambia; las
+    semanas empiezan en lunes.
+    """
+    __tablename__ = "resumen_citas"
+
+    barberia_id = Column(UUIDNativo, ForeignKey("barberias.id"), primary_key=True)
+    granularidad = Column(Enum(Granularidad), primary_key=True)
+    inicio = Column(Date, primary_key=True)
+    barbero_id = Column(UUIDNativo, primary_key=True, default=SIN_BARBERO)
+    servicio_id = Column(UUIDNativo, primary_key=True)
+    estado = Column(Enum(EstadoCita), primary_key=True)
+
+    citas = Column(Integer, nullable=False, default=0)
+    minutos = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Numeric(12, 2), nullable=False, default=0)
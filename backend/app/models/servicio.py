@@ -1,16 +1,19 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Numeric, Integer
+from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Numeric, Integer, Index
 from sqlalchemy.orm import relationship
 
 from app.config.database import Base
+from app.models.tipos import UUIDNativo, uuid7
 
 
 class Servicio(Base):
     __tablename__ = "servicios"
+    __table_args__ = (
+        Index("ix_servicios_barberia_created", "barberia_id", "created_at", "id"),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    barberia_id = Column(String(36), ForeignKey("barberias.id"), nullable=False)
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
+    barberia_id = Column(UUIDNativo, ForeignKey("barberias.id"), nullable=False)
 
     nombre = Column(String(100), nullable=False)
     descripcion = Column(Text, nullable=True)
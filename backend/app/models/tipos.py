@@ -0,0 +1,45 @@
+import os
+import time
+import uuid
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+
+
+def uuid7() -> uuid.UUID:
+    """UUID versión 7 (RFC 9562): 48 bits con el instante en ms seguidos de bits aleatorios.
+
+    Los ids nuevos quedan al final del índice en vez de repartirse por todo el B-tree.
+    """
+    valor = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    valor = (valor & ~(0xF << 76)) | (0x7 << 76)  # versión
+    valor = (valor & ~(0x3 << 62)) | (0x2 << 62)  # variante RFC
+    return uuid.UUID(int=valor)
+
+
+class UUIDNativo(TypeDecorator):
+    """uuid nativo en PostgreSQL y 16 bytes (BLOB) en el resto; en Python es uuid.UUID.
+
+    Acepta también el texto de un UUID al comparar o asignar.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == "postgresql" else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(bytes=bytes(value))
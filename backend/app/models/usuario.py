@@ -1,10 +1,10 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Enum
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
 from app.config.database import Base
+from app.models.tipos import UUIDNativo, uuid7
 
 
 class RolUsuario(str, enum.Enum):
@@ -15,8 +15,11 @@ class RolUsuario(str, enum.Enum):
 
 class Usuario(Base):
     __tablename__ = "usuarios"
+    __table_args__ = (
+        Index("ix_usuarios_created", "created_at", "id"),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDNativo, primary_key=True, default=uuid7)
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     nombre = Column(String(100), nullable=False)
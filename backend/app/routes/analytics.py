@@ -0,0 +1,130 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from uuid import UUID
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app.config.database import get_db
+from app.config.settings import settings
+from app.models.usuario import RolUsuario
+from app.models.barberia import Barberia
+from app.models.cita import EstadoCita
+from app.models.resumen_cita import Granularidad
+from app.schemas.analytics import (
+    AnalyticsResponse, PeriodoAnalytics, ServicioAnalytics, BarberoAnalytics
+)
+from app.middlewares.auth import Principal, requiere_admin_barberia
+from app.services import analytics
+from app.services.disponibilidad import zona_horaria
+
+router = APIRouter()
+
+
+async def _barberia_propia(db: AsyncSession, barberia_id: UUID, usuario: Principal) -> Barberia:
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
+    if not barberia:
+        raise HTTPException(status_code=404, detail="Barbería no encontrada")
+    if barberia.propietario_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
+        raise HTTPException(status_code=403, detail="No tienes permisos")
+    return barberia
+
+
+def _rango(desde: Optional[date], hasta: Optional[date]) -> Tuple[date, date]:
+    hasta = hasta or datetime.now(zona_horaria()).date()
+    desde = desde or hasta - timedelta(days=29)
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="La fecha inicial debe ser anterior a la final")
+    if (hasta - desde).days >= settings.ANALYTICS_MAX_DIAS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango máximo es de {settings.ANALYTICS_MAX_DIAS} días"
+        )
+    return desde, hasta
+
+
+def _tasa_no_asistencia(por_estado: dict) -> Optional[float]:
+    no_asistio = por_estado.get(EstadoCita.NO_ASISTIO, 0)
+    atendidas = no_asistio + por_estado.get(EstadoCita.COMPLETADA, 0)
+    return round(no_asistio / atendidas, 4) if atendidas else None
+
+
+@router.get("/{barberia_id}/analytics", response_model=AnalyticsResponse)
+async def analytics_barberia(
+    barberia_id: UUID,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    granularidad: Granularidad = Granularidad.DIA,
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
+):
+    """Citas por estado, ingresos y tasa de inasistencia por día o semana"""
+    await _barberia_propia(db, barberia_id, usuario)
+    desde, hasta = _rango(desde, hasta)
+
+    periodos = {}
+    totales = {}
+    for inicio, estado, citas, ingresos in await analytics.serie(db, barberia_id, granularidad, desde, hasta):
+        periodo = periodos.setdefault(inicio, {"citas": {}, "ingresos": Decimal(0), "previstos": Decimal(0)})
+        periodo["citas"][estado] = int(citas)
+        totales[estado] = totales.get(estado, 0) + int(citas)
+        if estado == EstadoCita.COMPLETADA:
+            periodo["ingresos"] += Decimal(ingresos)
+        elif estado in analytics.ESTADOS_PREVISTOS:
+            periodo["previstos"] += Decimal(ingresos)
+
+    return AnalyticsResponse(
+        barberia_id=barberia_id,
+        granularidad=granularidad,
+        desde=desde,
+        hasta=hasta,
+        total_citas=sum(totales.values()),
+        ingresos=sum((p["ingresos"] for p in periodos.values()), Decimal(0)),
+        tasa_no_asistencia=_tasa_no_asistencia(totales),
+        periodos=[
+            PeriodoAnalytics(
+                inicio=inicio,
+                total_citas=sum(p["citas"].values()),
+                citas_por_estado=p["citas"],
+                ingresos=p["ingresos"],
+                ingresos_previstos=p["previstos"],
+                tasa_no_asistencia=_tasa_no_asistencia(p["citas"])
+            )
+            for inicio, p in periodos.items()
+        ]
+    )
+
+
+@router.get("/{barberia_id}/analytics/servicios", response_model=List[ServicioAnalytics])
+async def analytics_servicios(
+    barberia_id: UUID,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    limit: int = Query(10, ge=1, le=100),
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
+):
+    """Servicios más reservados (sin canceladas) e ingresos de las completadas"""
+    await _barberia_propia(db, barberia_id, usuario)
+    desde, hasta = _rango(desde, hasta)
+    return [
+        ServicioAnalytics(servicio_id=servicio_id, nombre=nombre, citas=int(citas), ingresos=ingresos or 0)
+        for servicio_id, nombre, citas, ingresos in await analytics.top_servicios(
+            db, barberia_id, desde, hasta, limit
+        )
+    ]
+
+
+@router.get("/{barberia_id}/analytics/barberos", response_model=List[BarberoAnalytics])
+async def analytics_barberos(
+    barberia_id: UUID,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
+):
+    """Utilización de cada barbero: minutos reservados sobre minutos de su horario"""
+    barberia = await _barberia_propia(db, barberia_id, usuario)
+    desde, hasta = _rango(desde, hasta)
+    return await analytics.uso_barberos(db, barberia, desde, hasta)
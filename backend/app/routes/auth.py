@@ -1,26 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from app.config.database import get_db
 from app.config.settings import settings
 from app.models.usuario import Usuario, RolUsuario
 from app.schemas.usuario import (
-    UsuarioCreate, UsuarioResponse, Token, LoginRequest, CambiarPasswordRequest
+    UsuarioCreate, UsuarioResponse, Token, LoginRequest, RefreshRequest, CambiarPasswordRequest
 )
 from app.middlewares.auth import (
-    verificar_password, obtener_password_hash,
-    crear_access_token, crear_refresh_token, obtener_usuario_actual
+    obtener_usuario_actual
+)
+from app.services.hashing import pool_hashing
+from app.services.sesiones import (
+    emitir_tokens, rotar_refresh_token, revocar_refresh_tokens, programar_purga
 )
 
 router = APIRouter()
 
 
 @router.post("/registro", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
-def registrar_usuario(usuario: UsuarioCreate, db: Session = Depends(get_db)):
+async def registrar_usuario(usuario: UsuarioCreate, db: AsyncSession = Depends(get_db)):
     # Verificar si el email ya existe
-    db_usuario = db.query(Usuario).filter(Usuario.email == usuario.email).first()
+    db_usuario = await db.scalar(select(Usuario).where(Usuario.email == usuario.email))
     if db_usuario:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -36,22 +40,29 @@ def registrar_usuario(usuario: UsuarioCreate, db: Session = Depends(get_db)):
 
     nuevo_usuario = Usuario(
         email=usuario.email,
-        password_hash=obtener_password_hash(usuario.password),
+        password_hash=await pool_hashing.hash(usuario.password),
         nombre=usuario.nombre,
         telefono=usuario.telefono,
         rol=usuario.rol
     )
     db.add(nuevo_usuario)
-    db.commit()
-    db.refresh(nuevo_usuario)
+    await db.commit()
+    await db.refresh(nuevo_usuario)
     return nuevo_usuario
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    usuario = db.query(Usuario).filter(Usuario.email == form_data.username).first()
+async def login(
+    background_tasks: BackgroundTasks,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
+    usuario = await db.scalar(select(Usuario).where(Usuario.email == form_data.username))
 
-    if not usuario or not verificar_password(form_data.password, usuario.password_hash):
+    valida, nuevo_hash = (False, None)
+    if usuario:
+        valida, nuevo_hash = await pool_hashing.verificar(form_data.password, usuario.password_hash)
+    if not valida:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
@@ -64,38 +75,48 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             detail="Usuario inactivo"
         )
 
-    access_token = crear_access_token(
-        data={"sub": str(usuario.id), "rol": usuario.rol.value}
-    )
-    refresh_token = crear_refresh_token(
-        data={"sub": str(usuario.id)}
-    )
+    # El costo de bcrypt cambió: se guarda el hash regenerado con la contraseña en claro
+    if nuevo_hash:
+        usuario.password_hash = nuevo_hash
 
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer"
-    }
+    tokens = emitir_tokens(db, usuario.id, usuario.rol)
+    await db.commit()
+    programar_purga(background_tasks)
+    return tokens
+
+
+@router.post("/refresh", response_model=Token)
+async def refrescar_token(
+    datos: RefreshRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
+    """Canjea el refresh token por un par nuevo sin volver a enviar la contraseña"""
+    tokens = await rotar_refresh_token(db, datos.refresh_token)
+    programar_purga(background_tasks)
+    return tokens
 
 
 @router.get("/me", response_model=UsuarioResponse)
-def obtener_perfil(usuario: Usuario = Depends(obtener_usuario_actual)):
+async def obtener_perfil(usuario: Usuario = Depends(obtener_usuario_actual)):
     return usuario
 
 
 @router.put("/cambiar-password")
-def cambiar_password(
+async def cambiar_password(
     datos: CambiarPasswordRequest,
     usuario: Usuario = Depends(obtener_usuario_actual),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    if not verificar_password(datos.password_actual, usuario.password_hash):
+    valida, _ = await pool_hashing.verificar(datos.password_actual, usuario.password_hash)
+    if not valida:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Contraseña actual incorrecta"
         )
 
-    usuario.password_hash = obtener_password_hash(datos.password_nuevo)
-    db.commit()
+    usuario.password_hash = await pool_hashing.hash(datos.password_nuevo)
+    await revocar_refresh_tokens(db, usuario.id)
+    await db.commit()
 
     return {"message": "Contraseña actualizada correctamente"}
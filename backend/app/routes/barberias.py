@@ -1,89 +1,220 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
 from decimal import Decimal
 
 from app.config.database import get_db
-from app.models.usuario import Usuario, RolUsuario
+from app.models.usuario import RolUsuario
 from app.models.barberia import Barberia, EstadoBarberia, PlanMembresia
 from app.schemas.barberia import (
     BarberiaCreate, BarberiaUpdate, BarberiaUpdateAdmin,
     BarberiaResponse, BarberiaListResponse
 )
 from app.middlewares.auth import (
-    obtener_usuario_actual, requiere_super_admin, requiere_admin_barberia
+    Principal, requiere_super_admin, requiere_admin_barberia,
+    invalidar_principal
 )
+from app.schemas.paginacion import Pagina
+from app.schemas.importacion import ResultadoImportacion
+from app.services.paginacion import paginar, codificar_cursor, decodificar_cursor
+from app.services.geo import indice_barberias, caja_envolvente, distancia_haversine
+from app.services.disponibilidad import cache_agendas
+from app.services.cache import cache_catalogo, estado_filas
+from app.services.importacion import Importacion
+from app.services.serializacion import columnas
 
 router = APIRouter()
 
+# El listado público selecciona solo estas columnas: filas en lugar de objetos ORM
+COLUMNAS_LISTADO = columnas(Barberia, BarberiaListResponse)
 
-@router.get("/", response_model=List[BarberiaListResponse])
-def listar_barberias(
-    skip: int = 0,
-    limit: int = 100,
+
+@router.get("/", response_model=Pagina[BarberiaListResponse])
+async def listar_barberias(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     estado: EstadoBarberia = None,
     plan: PlanMembresia = None,
     lat: Optional[Decimal] = Query(None, description="Latitud del usuario"),
     lng: Optional[Decimal] = Query(None, description="Longitud del usuario"),
-    radio_km: Optional[float] = Query(10, description="Radio de búsqueda en km"),
-    db: Session = Depends(get_db)
+    radio_km: Optional[float] = Query(10, gt=0, description="Radio de búsqueda en km"),
+    db: AsyncSession = Depends(get_db)
 ):
     """Lista barberías públicas (solo activas para usuarios no admin)"""
-    query = db.query(Barberia)
+    return await cache_catalogo.responder(
+        request, ["barberias"],
+        lambda: _listar_barberias(
+            db, background_tasks, cursor, limit, estado, plan, lat, lng, radio_km
+        ),
+        Pagina[BarberiaListResponse]
+    )
+
+
+async def _listar_barberias(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    cursor: Optional[str],
+    limit: int,
+    estado: Optional[EstadoBarberia],
+    plan: Optional[PlanMembresia],
+    lat: Optional[Decimal],
+    lng: Optional[Decimal],
+    radio_km: float
+) -> dict:
+    if lat is not None and lng is not None:
+        return await _buscar_cercanas(
+            db, background_tasks, float(lat), float(lng), radio_km, estado, plan, cursor, limit
+        )
+
+    query = select(*COLUMNAS_LISTADO)
 
     # Por defecto solo mostrar activas
     if estado:
-        query = query.filter(Barberia.estado == estado)
+        query = query.where(Barberia.estado == estado)
     else:
-        query = query.filter(Barberia.estado == EstadoBarberia.ACTIVA)
+        query = query.where(Barberia.estado == EstadoBarberia.ACTIVA)
 
     if plan:
-        query = query.filter(Barberia.plan_membresia == plan)
+        query = query.where(Barberia.plan_membresia == plan)
 
     # Ordenar por prioridad de plan (premium primero)
-    query = query.order_by(Barberia.plan_membresia.desc(), Barberia.calificacion_promedio.desc())
+    return await paginar(db, query, [
+        (Barberia.plan_membresia, True),
+        (Barberia.calificacion_promedio, True),
+        (Barberia.id, True)
+    ], cursor, limit, filas=True)
+
+
+async def _buscar_cercanas(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    lat: float,
+    lng: float,
+    radio_km: float,
+    estado: Optional[EstadoBarberia],
+    plan: Optional[PlanMembresia],
+    cursor: Optional[str],
+    limit: int
+) -> dict:
+    """Barberías dentro del radio, ordenadas por distancia (incluye distancia_km)"""
+    estado = estado or EstadoBarberia.ACTIVA
+    desde = None
+    if cursor:
+        distancia, barberia_id = decodificar_cursor(cursor, 2)
+        if not isinstance(distancia, (int, float)) or not isinstance(barberia_id, str):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+        desde = (float(distancia), barberia_id)
+
+    if estado == EstadoBarberia.ACTIVA and indice_barberias.cargado:
+        cercanas = indice_barberias.buscar(lat, lng, radio_km, plan, limite=limit + 1, desde=desde)
+        pagina = cercanas[:limit]
+        next_cursor = None
+        if len(cercanas) > limit:
+            next_cursor = codificar_cursor([pagina[-1][1], pagina[-1][0]])
+        if not pagina:
+            return {"items": [], "next_cursor": None}
+
+        por_id = {
+            str(b.id): b
+            for b in (await db.execute(
+                select(*COLUMNAS_LISTADO).where(Barberia.id.in_([i for i, _ in pagina]))
+            )).all()
+        }
+        items = []
+        for barberia_id, distancia in pagina:
+            barberia = por_id.get(barberia_id)
+            # Puede haber cambiado de estado en otro worker
+            if barberia is None or barberia.estado != EstadoBarberia.ACTIVA:
+                continue
+            items.append({**barberia._asdict(), "distancia_km": round(distancia, 3)})
+        return {"items": items, "next_cursor": next_cursor}
+
+    # Índice frío (o estado distinto de activa): prefiltro por caja envolvente en SQL
+    if estado == EstadoBarberia.ACTIVA:
+        background_tasks.add_task(indice_barberias.cargar)
+
+    lat_min, lat_max, delta_lng = caja_envolvente(lat, lng, radio_km)
+    query = select(*COLUMNAS_LISTADO).where(
+        Barberia.estado == estado,
+        Barberia.latitud.isnot(None),
+        Barberia.longitud.isnot(None),
+        Barberia.latitud.between(lat_min, lat_max)
+    )
+    if delta_lng < 180:
+        lng_min, lng_max = lng - delta_lng, lng + delta_lng
+        if lng_min < -180:
+            query = query.where(or_(Barberia.longitud >= lng_min + 360, Barberia.longitud <= lng_max))
+        elif lng_max > 180:
+            query = query.where(or_(Barberia.longitud >= lng_min, Barberia.longitud <= lng_max - 360))
+        else:
+            query = query.where(Barberia.longitud.between(lng_min, lng_max))
+    if plan:
+        query = query.where(Barberia.plan_membresia == plan)
 
-    return query.offset(skip).limit(limit).all()
+    candidatas = []
+    for barberia in (await db.execute(query)).all():
+        distancia = distancia_haversine(lat, lng, float(barberia.latitud), float(barberia.longitud))
+        if distancia <= radio_km and (desde is None or (distancia, str(barberia.id)) > desde):
+            candidatas.append((distancia, str(barberia.id), barberia))
+    candidatas.sort(key=lambda c: (c[0], c[1]))
 
+    items = []
+    for distancia, _, barberia in candidatas[:limit]:
+        items.append({**barberia._asdict(), "distancia_km": round(distancia, 3)})
+    next_cursor = None
+    if len(candidatas) > limit:
+        distancia, barberia_id, _ = candidatas[limit - 1]
+        next_cursor = codificar_cursor([distancia, barberia_id])
+    return {"items": items, "next_cursor": next_cursor}
 
-@router.get("/admin", response_model=List[BarberiaResponse])
-def listar_todas_barberias(
-    skip: int = 0,
-    limit: int = 100,
+
+@router.get("/admin", response_model=Pagina[BarberiaResponse])
+async def listar_todas_barberias(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     estado: EstadoBarberia = None,
     plan: PlanMembresia = None,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin: lista todas las barberías con todos los estados"""
-    query = db.query(Barberia)
+    query = select(Barberia)
 
     if estado:
-        query = query.filter(Barberia.estado == estado)
+        query = query.where(Barberia.estado == estado)
     if plan:
-        query = query.filter(Barberia.plan_membresia == plan)
+        query = query.where(Barberia.plan_membresia == plan)
 
-    return query.offset(skip).limit(limit).all()
+    return await paginar(db, query, [(Barberia.created_at, True), (Barberia.id, True)], cursor, limit)
 
 
 @router.get("/{barberia_id}", response_model=BarberiaResponse)
-def obtener_barberia(barberia_id: UUID, db: Session = Depends(get_db)):
+async def obtener_barberia(barberia_id: UUID, request: Request, db: AsyncSession = Depends(get_db)):
     """Obtener detalle de una barbería"""
-    barberia = db.query(Barberia).filter(Barberia.id == barberia_id).first()
-    if not barberia:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Barbería no encontrada"
-        )
-    return barberia
+    async def construir():
+        barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
+        if not barberia:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Barbería no encontrada"
+            )
+        return barberia
+
+    return await cache_catalogo.responder(
+        request, [f"barberia:{barberia_id}"], construir, BarberiaResponse,
+        validador=estado_filas(db, Barberia, Barberia.id == barberia_id)
+    )
 
 
 @router.post("/", response_model=BarberiaResponse, status_code=status.HTTP_201_CREATED)
-def crear_barberia(
+async def crear_barberia(
     barberia_data: BarberiaCreate,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin: crea una nueva barbería"""
     nueva_barberia = Barberia(
@@ -101,20 +232,46 @@ def crear_barberia(
         estado=EstadoBarberia.PENDIENTE
     )
     db.add(nueva_barberia)
-    db.commit()
-    db.refresh(nueva_barberia)
+    await db.commit()
+    await db.refresh(nueva_barberia)
+    indice_barberias.sincronizar(nueva_barberia)
+    await cache_catalogo.invalidar("barberias")
+    invalidar_principal(nueva_barberia.propietario_id)
     return nueva_barberia
 
 
+@router.post("/importar", response_model=ResultadoImportacion)
+async def importar_barberias(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Super Admin: importa barberías desde CSV o NDJSON (una por fila; con `id` actualiza)"""
+    importacion = await Importacion(
+        db, Barberia, BarberiaCreate,
+        {"propietario_id": usuario.id, "estado": EstadoBarberia.PENDIENTE}
+    ).ejecutar(request)
+
+    await cache_catalogo.invalidar("barberias", *(f"barberia:{b}" for b in importacion.ids_actualizados))
+    for barberia_id in importacion.ids_actualizados:
+        cache_agendas.invalidar(barberia_id)
+    # Las nuevas quedan pendientes (fuera del índice); las actualizadas pueden haberse movido
+    if importacion.ids_actualizados and indice_barberias.cargado:
+        background_tasks.add_task(indice_barberias.cargar)
+    invalidar_principal(usuario.id)
+    return importacion.resultado()
+
+
 @router.put("/{barberia_id}", response_model=BarberiaResponse)
-def actualizar_barberia(
+async def actualizar_barberia(
     barberia_id: UUID,
     barberia_data: BarberiaUpdate,
-    usuario: Usuario = Depends(requiere_admin_barberia),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
 ):
     """Admin de barbería puede actualizar su barbería"""
-    barberia = db.query(Barberia).filter(Barberia.id == barberia_id).first()
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
     if not barberia:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -122,7 +279,7 @@ def actualizar_barberia(
         )
 
     # Verificar que sea el propietario o super admin
-    if str(barberia.propietario_id) != str(usuario.id) and usuario.rol != RolUsuario.SUPER_ADMIN:
+    if barberia.propietario_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos para editar esta barbería"
@@ -132,20 +289,22 @@ def actualizar_barberia(
     for key, value in update_data.items():
         setattr(barberia, key, value)
 
-    db.commit()
-    db.refresh(barberia)
+    await db.commit()
+    await db.refresh(barberia)
+    cache_agendas.invalidar(barberia.id)
+    await cache_catalogo.invalidar("barberias", f"barberia:{barberia.id}")
     return barberia
 
 
 @router.put("/{barberia_id}/admin", response_model=BarberiaResponse)
-def actualizar_barberia_admin(
+async def actualizar_barberia_admin(
     barberia_id: UUID,
     barberia_data: BarberiaUpdateAdmin,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin: puede actualizar ubicación, estado y plan"""
-    barberia = db.query(Barberia).filter(Barberia.id == barberia_id).first()
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
     if not barberia:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -156,19 +315,22 @@ def actualizar_barberia_admin(
     for key, value in update_data.items():
         setattr(barberia, key, value)
 
-    db.commit()
-    db.refresh(barberia)
+    await db.commit()
+    await db.refresh(barberia)
+    indice_barberias.sincronizar(barberia)
+    cache_agendas.invalidar(barberia.id)
+    await cache_catalogo.invalidar("barberias", f"barberia:{barberia.id}")
     return barberia
 
 
 @router.post("/{barberia_id}/activar", response_model=BarberiaResponse)
-def activar_barberia(
+async def activar_barberia(
     barberia_id: UUID,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin: activa una barbería"""
-    barberia = db.query(Barberia).filter(Barberia.id == barberia_id).first()
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
     if not barberia:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -176,19 +338,21 @@ def activar_barberia(
         )
 
     barberia.estado = EstadoBarberia.ACTIVA
-    db.commit()
-    db.refresh(barberia)
+    await db.commit()
+    await db.refresh(barberia)
+    indice_barberias.sincronizar(barberia)
+    await cache_catalogo.invalidar("barberias", f"barberia:{barberia.id}")
     return barberia
 
 
 @router.post("/{barberia_id}/suspender", response_model=BarberiaResponse)
-def suspender_barberia(
+async def suspender_barberia(
     barberia_id: UUID,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin: suspende una barbería"""
-    barberia = db.query(Barberia).filter(Barberia.id == barberia_id).first()
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
     if not barberia:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -196,6 +360,8 @@ def suspender_barberia(
         )
 
     barberia.estado = EstadoBarberia.SUSPENDIDA
-    db.commit()
-    db.refresh(barberia)
+    await db.commit()
+    await db.refresh(barberia)
+    indice_barberias.sincronizar(barberia)
+    await cache_catalogo.invalidar("barberias", f"barberia:{barberia.id}")
     return barberia
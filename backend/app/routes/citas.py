@@ -1,70 +1,214 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 
 from app.config.database import get_db
-from app.models.usuario import Usuario, RolUsuario
+from app.models.usuario import RolUsuario
 from app.models.cita import Cita, EstadoCita
 from app.models.servicio import Servicio
 from app.models.barberia import Barberia
-from app.schemas.cita import CitaCreate, CitaUpdate, CitaResponse
-from app.middlewares.auth import obtener_usuario_actual, requiere_admin_barberia
+from app.schemas.paginacion import Pagina
+from app.schemas.cita import (
+    CitaCreate, CitaUpdate, CitaResponse, CitaExpandidaResponse,
+    DisponibilidadResponse, DisponibilidadDia, SlotDisponible, FechaUTC
+)
+from app.config.settings import settings
+from app.middlewares.auth import Principal, obtener_principal, requiere_admin_barberia
+from app.services.analytics import hecho_de_cita, registrar_cambio_cita
+from app.services.disponibilidad import cache_agendas, zona_horaria
+from app.services.exportacion import FormatoExportacion, exportar
+from app.services.reservas import agenda_bloqueada, hay_solapamiento
+from app.services.paginacion import paginar
+from app.services.expansion import Expansion
+from app.services.serializacion import columnas, respuesta_json
 
 router = APIRouter()
 
+RELACIONES_CITA = {
+    "servicio": Cita.servicio,
+    "barbero": Cita.barbero,
+    "barberia": Cita.barberia,
+    "cliente": Cita.cliente,
+}
 
-@router.get("/mis-citas", response_model=List[CitaResponse])
-def mis_citas(
+COLUMNAS_CITA = columnas(Cita, CitaResponse)
+
+
+@router.get(
+    "/mis-citas", response_model=Pagina[CitaExpandidaResponse], response_model_exclude_unset=True
+)
+async def mis_citas(
     estado: EstadoCita = None,
-    usuario: Usuario = Depends(obtener_usuario_actual),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    expand: Optional[str] = Query(None, description="servicio,barbero,barberia,cliente"),
+    usuario: Principal = Depends(obtener_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """Cliente: obtiene sus citas"""
-    query = db.query(Cita).filter(Cita.cliente_id == usuario.id)
+    expansion = Expansion(expand, RELACIONES_CITA)
+    query = select(Cita).where(Cita.cliente_id == usuario.id)
     if estado:
-        query = query.filter(Cita.estado == estado)
-    return query.order_by(Cita.fecha_hora.desc()).all()
+        query = query.where(Cita.estado == estado)
+    pagina = await paginar(db, expansion.aplicar(query), [(Cita.fecha_hora, True), (Cita.id, True)], cursor, limit)
+    return expansion.serializar(pagina, CitaResponse)
 
 
-@router.get("/barberia/{barberia_id}", response_model=List[CitaResponse])
-def citas_barberia(
+@router.get(
+    "/barberia/{barberia_id}", response_model=Pagina[CitaExpandidaResponse], response_model_exclude_unset=True
+)
+async def citas_barberia(
     barberia_id: UUID,
-    fecha_inicio: datetime = None,
-    fecha_fin: datetime = None,
+    fecha_inicio: Optional[FechaUTC] = None,
+    fecha_fin: Optional[FechaUTC] = None,
     estado: EstadoCita = None,
-    usuario: Usuario = Depends(requiere_admin_barberia),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    expand: Optional[str] = Query(None, description="servicio,barbero,barberia,cliente"),
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
 ):
     """Admin barbería: obtiene citas de su barbería"""
-    barberia = db.query(Barberia).filter(Barberia.id == barberia_id).first()
+    expansion = Expansion(expand, RELACIONES_CITA)
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
+    if not barberia:
+        raise HTTPException(status_code=404, detail="Barbería no encontrada")
+
+    if barberia.propietario_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
+        raise HTTPException(status_code=403, detail="No tienes permisos")
+
+    filtros = [Cita.barberia_id == barberia_id]
+    if fecha_inicio:
+        filtros.append(Cita.fecha_hora >= fecha_inicio)
+    if fecha_fin:
+        filtros.append(Cita.fecha_hora <= fecha_fin)
+    if estado:
+        filtros.append(Cita.estado == estado)
+    orden = [(Cita.fecha_hora, False), (Cita.id, False)]
+
+    if not expansion.campos:
+        # Camino rápido: filas de columnas serializadas directamente por pydantic-core
+        pagina = await paginar(
+            db, select(*COLUMNAS_CITA).where(*filtros), orden, cursor, limit, filas=True
+        )
+        return respuesta_json(Pagina[CitaResponse], pagina)
+
+    pagina = await paginar(db, expansion.aplicar(select(Cita).where(*filtros)), orden, cursor, limit)
+    return expansion.serializar(pagina, CitaResponse)
+
+
+@router.get("/barberia/{barberia_id}/exportar")
+async def exportar_citas_barberia(
+    barberia_id: UUID,
+    formato: FormatoExportacion = FormatoExportacion.CSV,
+    fecha_inicio: Optional[FechaUTC] = None,
+    fecha_fin: Optional[FechaUTC] = None,
+    estado: EstadoCita = None,
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin barbería: exporta las citas de su barbería en CSV o NDJSON"""
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
     if not barberia:
         raise HTTPException(status_code=404, detail="Barbería no encontrada")
 
-    if str(barberia.propietario_id) != str(usuario.id) and usuario.rol != RolUsuario.SUPER_ADMIN:
+    if barberia.propietario_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
         raise HTTPException(status_code=403, detail="No tienes permisos")
 
-    query = db.query(Cita).filter(Cita.barberia_id == barberia_id)
+    query = select(
+        Cita.id, Cita.fecha_hora, Cita.duracion_minutos, Cita.estado, Cita.precio_total,
+        Cita.servicio_id, Servicio.nombre.label("servicio"), Cita.barbero_id, Cita.cliente_id,
+        Cita.notas, Cita.created_at
+    ).join(Servicio, Servicio.id == Cita.servicio_id, isouter=True).where(Cita.barberia_id == barberia_id)
 
     if fecha_inicio:
-        query = query.filter(Cita.fecha_hora >= fecha_inicio)
+        query = query.where(Cita.fecha_hora >= fecha_inicio)
     if fecha_fin:
-        query = query.filter(Cita.fecha_hora <= fecha_fin)
+        query = query.where(Cita.fecha_hora <= fecha_fin)
     if estado:
-        query = query.filter(Cita.estado == estado)
+        query = query.where(Cita.estado == estado)
+
+    return exportar(query.order_by(Cita.fecha_hora, Cita.id), formato, "citas")
 
-    return query.order_by(Cita.fecha_hora).all()
+
+@router.get("/disponibilidad", response_model=DisponibilidadResponse)
+async def disponibilidad(
+    barberia_id: UUID,
+    servicio_id: UUID,
+    fecha_inicio: Optional[date] = None,
+    dias: int = Query(7, ge=1, description="Número de días a consultar"),
+    barbero_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Horarios libres para un servicio en un rango de días"""
+    if dias > settings.DISPONIBILIDAD_MAX_DIAS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango máximo es de {settings.DISPONIBILIDAD_MAX_DIAS} días"
+        )
+
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
+    if not barberia:
+        raise HTTPException(status_code=404, detail="Barbería no encontrada")
+
+    servicio = await db.scalar(select(Servicio).where(
+        Servicio.id == servicio_id,
+        Servicio.barberia_id == barberia_id,
+        Servicio.activo == True
+    ))
+    if not servicio:
+        raise HTTPException(status_code=404, detail="Servicio no encontrado")
+
+    # Días y horarios en la zona de la barbería; los slots salen con su desfase
+    # para que se puedan enviar tal cual al reservar
+    zona = zona_horaria()
+    ahora = datetime.now(zona).replace(tzinfo=None)
+    desde = fecha_inicio or ahora.date()
+    hasta = desde + timedelta(days=dias)
+    agenda = await cache_agendas.obtener(db, barberia, desde, hasta)
+
+    if barbero_id is not None:
+        if barbero_id not in agenda.horarios:
+            raise HTTPException(status_code=404, detail="Barbero no encontrado")
+        barberos = [barbero_id]
+    else:
+        barberos = list(agenda.horarios)
+
+    duracion = timedelta(minutes=servicio.duracion_minutos)
+    resultado = []
+    for n in range(dias):
+        fecha = desde + timedelta(days=n)
+        medianoche = datetime.combine(fecha, time.min)
+        slots = []
+        for barbero in barberos:
+            for minuto in agenda.slots_libres(barbero, fecha, servicio.duracion_minutos):
+                inicio = medianoche + timedelta(minutes=minuto)
+                if inicio < ahora:
+                    continue
+                inicio = inicio.replace(tzinfo=zona)
+                slots.append(SlotDisponible(barbero_id=barbero, inicio=inicio, fin=inicio + duracion))
+        slots.sort(key=lambda slot: slot.inicio)
+        resultado.append(DisponibilidadDia(fecha=fecha, slots=slots))
+
+    return DisponibilidadResponse(
+        barberia_id=barberia_id,
+        servicio_id=servicio_id,
+        duracion_minutos=servicio.duracion_minutos,
+        dias=resultado
+    )
 
 
 @router.post("/", response_model=CitaResponse, status_code=status.HTTP_201_CREATED)
-def crear_cita(
+async def crear_cita(
     cita_data: CitaCreate,
-    usuario: Usuario = Depends(obtener_usuario_actual),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(obtener_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """Cliente: reserva una cita"""
-    servicio = db.query(Servicio).filter(Servicio.id == cita_data.servicio_id).first()
+    servicio = await db.scalar(select(Servicio).where(Servicio.id == cita_data.servicio_id))
     if not servicio:
         raise HTTPException(status_code=404, detail="Servicio no encontrado")
 
@@ -79,56 +223,92 @@ def crear_cita(
         notas=cita_data.notas,
         estado=EstadoCita.PENDIENTE
     )
-    db.add(nueva_cita)
-    db.commit()
-    db.refresh(nueva_cita)
+
+    async with agenda_bloqueada(db, cita_data.barberia_id):
+        if await hay_solapamiento(
+            db, cita_data.barberia_id, cita_data.barbero_id,
+            cita_data.fecha_hora, servicio.duracion_minutos
+        ):
+            raise HTTPException(status_code=409, detail="El horario seleccionado no está disponible")
+        db.add(nueva_cita)
+        await registrar_cambio_cita(db, None, hecho_de_cita(nueva_cita))
+        await db.commit()
+    await db.refresh(nueva_cita)
+    cache_agendas.invalidar(nueva_cita.barberia_id)
     return nueva_cita
 
 
 @router.put("/{cita_id}", response_model=CitaResponse)
-def actualizar_cita(
+async def actualizar_cita(
     cita_id: UUID,
     cita_data: CitaUpdate,
-    usuario: Usuario = Depends(obtener_usuario_actual),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(obtener_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """Actualizar estado de cita"""
-    cita = db.query(Cita).filter(Cita.id == cita_id).first()
-    if not cita:
+    fila = (await db.execute(
+        select(Cita, Barberia.propietario_id)
+        .join(Barberia, Barberia.id == Cita.barberia_id)
+        .where(Cita.id == cita_id)
+    )).first()
+    if not fila:
         raise HTTPException(status_code=404, detail="Cita no encontrada")
+    cita, propietario_id = fila
 
     # Verificar permisos
-    barberia = db.query(Barberia).filter(Barberia.id == cita.barberia_id).first()
-    es_cliente = str(cita.cliente_id) == str(usuario.id)
-    es_admin = str(barberia.propietario_id) == str(usuario.id) or usuario.rol == RolUsuario.SUPER_ADMIN
+    es_cliente = cita.cliente_id == usuario.id
+    es_admin = propietario_id == usuario.id or usuario.rol == RolUsuario.SUPER_ADMIN
 
     if not es_cliente and not es_admin:
         raise HTTPException(status_code=403, detail="No tienes permisos")
 
     update_data = cita_data.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(cita, key, value)
 
-    db.commit()
-    db.refresh(cita)
+    async with agenda_bloqueada(db, cita.barberia_id):
+        # Releer bajo el bloqueo (y bloquear la fila frente al barrido): el aporte
+        # anterior a los resúmenes debe ser el vigente
+        await db.refresh(cita, with_for_update=True)
+        antes = hecho_de_cita(cita)
+        estado_anterior, horario_anterior = cita.estado, (cita.fecha_hora, cita.barbero_id)
+        for key, value in update_data.items():
+            setattr(cita, key, value)
+
+        # Vuelve a ocupar un horario si se reprograma o si deja de estar cancelada
+        ocupa_de_nuevo = (
+            estado_anterior == EstadoCita.CANCELADA or (cita.fecha_hora, cita.barbero_id) != horario_anterior
+        )
+        if ocupa_de_nuevo and cita.estado != EstadoCita.CANCELADA and await hay_solapamiento(
+            db, cita.barberia_id, cita.barbero_id,
+            cita.fecha_hora, int(cita.duracion_minutos), excluir_cita_id=cita.id
+        ):
+            raise HTTPException(status_code=409, detail="El horario seleccionado no está disponible")
+        await registrar_cambio_cita(db, antes, hecho_de_cita(cita))
+        await db.commit()
+    await db.refresh(cita)
+    cache_agendas.invalidar(cita.barberia_id)
     return cita
 
 
 @router.post("/{cita_id}/cancelar", response_model=CitaResponse)
-def cancelar_cita(
+async def cancelar_cita(
     cita_id: UUID,
-    usuario: Usuario = Depends(obtener_usuario_actual),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(obtener_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """Cancelar una cita"""
-    cita = db.query(Cita).filter(Cita.id == cita_id).first()
+    cita = await db.scalar(select(Cita).where(Cita.id == cita_id))
     if not cita:
         raise HTTPException(status_code=404, detail="Cita no encontrada")
 
-    if str(cita.cliente_id) != str(usuario.id) and usuario.rol not in [RolUsuario.SUPER_ADMIN, RolUsuario.ADMIN_BARBERIA]:
+    if cita.cliente_id != usuario.id and usuario.rol not in [RolUsuario.SUPER_ADMIN, RolUsuario.ADMIN_BARBERIA]:
         raise HTTPException(status_code=403, detail="No tienes permisos")
 
-    cita.estado = EstadoCita.CANCELADA
-    db.commit()
-    db.refresh(cita)
+    async with agenda_bloqueada(db, cita.barberia_id):
+        await db.refresh(cita, with_for_update=True)
+        antes = hecho_de_cita(cita)
+        cita.estado = EstadoCita.CANCELADA
+        await registrar_cambio_cita(db, antes, hecho_de_cita(cita))
+        await db.commit()
+    await db.refresh(cita)
+    cache_agendas.invalidar(cita.barberia_id)
     return cita
@@ -1,33 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
 from app.config.database import get_db
-from app.models.usuario import Usuario
 from app.models.membresia import Membresia
-from app.middlewares.auth import requiere_super_admin
+from app.middlewares.auth import Principal, requiere_super_admin
+from app.services.cache import cache_catalogo
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[dict])
-def listar_membresias(db: Session = Depends(get_db)):
+async def listar_membresias(request: Request, db: AsyncSession = Depends(get_db)):
     """Lista planes de membresía disponibles"""
-    return db.query(Membresia).filter(Membresia.activo == True).all()
+    async def construir():
+        return (await db.scalars(select(Membresia).where(Membresia.activo == True))).all()
+
+    return await cache_catalogo.responder(request, ["membresias"], construir)
 
 
 @router.get("/{membresia_id}")
-def obtener_membresia(membresia_id: UUID, db: Session = Depends(get_db)):
+async def obtener_membresia(membresia_id: UUID, db: AsyncSession = Depends(get_db)):
     """Obtiene detalle de una membresía"""
-    membresia = db.query(Membresia).filter(Membresia.id == membresia_id).first()
+    membresia = await db.scalar(select(Membresia).where(Membresia.id == membresia_id))
     if not membresia:
         raise HTTPException(status_code=404, detail="Membresía no encontrada")
     return membresia
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def crear_membresia(
+async def crear_membresia(
     nombre: str,
     precio_mensual: float,
     limite_citas_mes: int = None,
@@ -37,8 +41,8 @@ def crear_membresia(
     tiene_notificaciones_push: bool = False,
     prioridad_busqueda: int = 0,
     destacado_mapa: bool = False,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin: crea un plan de membresía"""
     nueva_membresia = Membresia(
@@ -53,6 +57,7 @@ def crear_membresia(
         destacado_mapa=destacado_mapa
     )
     db.add(nueva_membresia)
-    db.commit()
-    db.refresh(nueva_membresia)
+    await db.commit()
+    await db.refresh(nueva_membresia)
+    await cache_catalogo.invalidar("membresias")
     return nueva_membresia
@@ -1,59 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
 from datetime import datetime, timedelta
 
 from app.config.database import get_db
-from app.models.usuario import Usuario, RolUsuario
+from app.models.usuario import RolUsuario
 from app.models.pago import Pago, EstadoPago
 from app.models.barberia import Barberia, EstadoBarberia
 from app.schemas.pago import PagoCreate, PagoUpdate, PagoResponse
-from app.middlewares.auth import requiere_super_admin, requiere_admin_barberia
+from app.schemas.paginacion import Pagina
+from app.middlewares.auth import Principal, requiere_super_admin, requiere_admin_barberia
+from app.services.geo import indice_barberias
+from app.services.paginacion import paginar
+from app.services.cache import cache_catalogo
+from app.services.exportacion import FormatoExportacion, exportar
 
 router = APIRouter()
 
 
-@router.get("/barberia/{barberia_id}", response_model=List[PagoResponse])
-def listar_pagos_barberia(
+@router.get("/barberia/{barberia_id}", response_model=Pagina[PagoResponse])
+async def listar_pagos_barberia(
     barberia_id: UUID,
-    usuario: Usuario = Depends(requiere_admin_barberia),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
 ):
     """Lista pagos de una barbería"""
-    barberia = db.query(Barberia).filter(Barberia.id == barberia_id).first()
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
     if not barberia:
         raise HTTPException(status_code=404, detail="Barbería no encontrada")
 
-    if str(barberia.propietario_id) != str(usuario.id) and usuario.rol != RolUsuario.SUPER_ADMIN:
+    if barberia.propietario_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
         raise HTTPException(status_code=403, detail="No tienes permisos")
 
-    return db.query(Pago).filter(Pago.barberia_id == barberia_id).order_by(Pago.fecha_pago.desc()).all()
+    query = select(Pago).where(Pago.barberia_id == barberia_id)
+    return await paginar(db, query, [(Pago.fecha_pago, True), (Pago.id, True)], cursor, limit)
 
 
-@router.get("/", response_model=List[PagoResponse])
-def listar_todos_pagos(
+@router.get("/", response_model=Pagina[PagoResponse])
+async def listar_todos_pagos(
     estado: EstadoPago = None,
-    skip: int = 0,
-    limit: int = 100,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin: lista todos los pagos"""
-    query = db.query(Pago)
+    query = select(Pago)
     if estado:
-        query = query.filter(Pago.estado == estado)
-    return query.order_by(Pago.fecha_pago.desc()).offset(skip).limit(limit).all()
+        query = query.where(Pago.estado == estado)
+    return await paginar(db, query, [(Pago.fecha_pago, True), (Pago.id, True)], cursor, limit)
+
+
+@router.get("/exportar")
+async def exportar_pagos(
+    formato: FormatoExportacion = FormatoExportacion.CSV,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    estado: EstadoPago = None,
+    barberia_id: Optional[UUID] = None,
+    usuario: Principal = Depends(requiere_super_admin)
+):
+    """Super Admin: exporta los pagos en CSV o NDJSON, ordenados por fecha de pago"""
+    query = select(
+        Pago.id, Pago.barberia_id, Pago.fecha_pago, Pago.monto, Pago.metodo_pago, Pago.estado,
+        Pago.periodo_inicio, Pago.periodo_fin, Pago.referencia_externa, Pago.factura_url,
+        Pago.registrado_por, Pago.notas
+    )
+    if barberia_id:
+        query = query.where(Pago.barberia_id == barberia_id)
+    if desde:
+        query = query.where(Pago.fecha_pago >= desde)
+    if hasta:
+        query = query.where(Pago.fecha_pago <= hasta)
+    if estado:
+        query = query.where(Pago.estado == estado)
+    return exportar(query.order_by(Pago.fecha_pago, Pago.id), formato, "pagos")
 
 
 @router.post("/", response_model=PagoResponse, status_code=status.HTTP_201_CREATED)
-def registrar_pago(
+async def registrar_pago(
     pago_data: PagoCreate,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin: registra un pago manual"""
-    barberia = db.query(Barberia).filter(Barberia.id == pago_data.barberia_id).first()
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == pago_data.barberia_id))
     if not barberia:
         raise HTTPException(status_code=404, detail="Barbería no encontrada")
 
@@ -74,20 +109,22 @@ def registrar_pago(
     if barberia.estado == EstadoBarberia.SUSPENDIDA:
         barberia.estado = EstadoBarberia.ACTIVA
 
-    db.commit()
-    db.refresh(nuevo_pago)
+    await db.commit()
+    await db.refresh(nuevo_pago)
+    indice_barberias.sincronizar(barberia)
+    await cache_catalogo.invalidar("barberias", f"barberia:{barberia.id}")
     return nuevo_pago
 
 
 @router.put("/{pago_id}", response_model=PagoResponse)
-def actualizar_pago(
+async def actualizar_pago(
     pago_id: UUID,
     pago_data: PagoUpdate,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin: actualiza un pago"""
-    pago = db.query(Pago).filter(Pago.id == pago_id).first()
+    pago = await db.scalar(select(Pago).where(Pago.id == pago_id))
     if not pago:
         raise HTTPException(status_code=404, detail="Pago no encontrado")
 
@@ -95,6 +132,6 @@ def actualizar_pago(
     for key, value in update_data.items():
         setattr(pago, key, value)
 
-    db.commit()
-    db.refresh(pago)
+    await db.commit()
+    await db.refresh(pago)
     return pago
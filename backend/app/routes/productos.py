@@ -1,28 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
 
 from app.config.database import get_db
-from app.models.usuario import Usuario, RolUsuario
+from app.models.usuario import RolUsuario
 from app.models.producto import Producto
 from app.models.barberia import Barberia, PlanMembresia
-from app.middlewares.auth import obtener_usuario_actual, requiere_admin_barberia
+from app.schemas.producto import ProductoCreate
+from app.schemas.importacion import ResultadoImportacion
+from app.middlewares.auth import (
+    Principal, requiere_admin_barberia, obtener_de_barberia_propia
+)
+from app.services.paginacion import paginar
+from app.services.cache import cache_catalogo, estado_filas
+from app.services.importacion import Importacion
 
 router = APIRouter()
 
 
 @router.get("/barberia/{barberia_id}")
-def listar_productos(barberia_id: UUID, activos: bool = True, db: Session = Depends(get_db)):
+async def listar_productos(
+    barberia_id: UUID,
+    request: Request,
+    activos: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
     """Lista productos de una barbería"""
-    query = db.query(Producto).filter(Producto.barberia_id == barberia_id)
-    if activos:
-        query = query.filter(Producto.activo == True)
-    return query.all()
+    async def construir():
+        query = select(Producto).where(Producto.barberia_id == barberia_id)
+        if activos:
+            query = query.where(Producto.activo == True)
+        return await paginar(db, query, [(Producto.created_at, False), (Producto.id, False)], cursor, limit)
+
+    return await cache_catalogo.responder(
+        request, [f"productos:{barberia_id}"], construir,
+        validador=estado_filas(db, Producto, Producto.barberia_id == barberia_id)
+    )
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def crear_producto(
+async def crear_producto(
     barberia_id: UUID,
     nombre: str,
     precio: float,
@@ -30,15 +51,15 @@ def crear_producto(
     stock: int = 0,
     categoria: str = None,
     imagen_url: str = None,
-    usuario: Usuario = Depends(requiere_admin_barberia),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
 ):
     """Admin de barbería crea un producto (requiere plan Profesional o Premium)"""
-    barberia = db.query(Barberia).filter(Barberia.id == barberia_id).first()
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
     if not barberia:
         raise HTTPException(status_code=404, detail="Barbería no encontrada")
 
-    if str(barberia.propietario_id) != str(usuario.id) and usuario.rol != RolUsuario.SUPER_ADMIN:
+    if barberia.propietario_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
         raise HTTPException(status_code=403, detail="No tienes permisos")
 
     # Verificar plan de membresía
@@ -58,13 +79,42 @@ def crear_producto(
         imagen_url=imagen_url
     )
     db.add(nuevo_producto)
-    db.commit()
-    db.refresh(nuevo_producto)
+    await db.commit()
+    await db.refresh(nuevo_producto)
+    await cache_catalogo.invalidar(f"productos:{barberia_id}")
     return nuevo_producto
 
 
+@router.post("/importar", response_model=ResultadoImportacion)
+async def importar_productos(
+    request: Request,
+    barberia_id: UUID,
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin de barbería: importa productos desde CSV o NDJSON (uno por fila; con `id` actualiza)"""
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
+    if not barberia:
+        raise HTTPException(status_code=404, detail="Barbería no encontrada")
+
+    if barberia.propietario_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
+        raise HTTPException(status_code=403, detail="No tienes permisos")
+
+    if barberia.plan_membresia == PlanMembresia.BASICO:
+        raise HTTPException(
+            status_code=403,
+            detail="El e-commerce de productos requiere plan Profesional o Premium"
+        )
+
+    importacion = await Importacion(
+        db, Producto, ProductoCreate, {"barberia_id": barberia_id}, propietario="barberia_id"
+    ).ejecutar(request)
+    await cache_catalogo.invalidar(f"productos:{barberia_id}")
+    return importacion.resultado()
+
+
 @router.put("/{producto_id}")
-def actualizar_producto(
+async def actualizar_producto(
     producto_id: UUID,
     nombre: str = None,
     descripcion: str = None,
@@ -73,17 +123,11 @@ def actualizar_producto(
     categoria: str = None,
     imagen_url: str = None,
     activo: bool = None,
-    usuario: Usuario = Depends(requiere_admin_barberia),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
 ):
     """Actualizar producto"""
-    producto = db.query(Producto).filter(Producto.id == producto_id).first()
-    if not producto:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-
-    barberia = db.query(Barberia).filter(Barberia.id == producto.barberia_id).first()
-    if str(barberia.propietario_id) != str(usuario.id) and usuario.rol != RolUsuario.SUPER_ADMIN:
-        raise HTTPException(status_code=403, detail="No tienes permisos")
+    producto = await obtener_de_barberia_propia(db, Producto, producto_id, usuario, "Producto no encontrado")
 
     if nombre is not None:
         producto.nombre = nombre
@@ -100,26 +144,22 @@ def actualizar_producto(
     if activo is not None:
         producto.activo = activo
 
-    db.commit()
-    db.refresh(producto)
+    await db.commit()
+    await db.refresh(producto)
+    await cache_catalogo.invalidar(f"productos:{producto.barberia_id}")
     return producto
 
 
 @router.delete("/{producto_id}")
-def eliminar_producto(
+async def eliminar_producto(
     producto_id: UUID,
-    usuario: Usuario = Depends(requiere_admin_barberia),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
 ):
     """Desactivar producto"""
-    producto = db.query(Producto).filter(Producto.id == producto_id).first()
-    if not producto:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-
-    barberia = db.query(Barberia).filter(Barberia.id == producto.barberia_id).first()
-    if str(barberia.propietario_id) != str(usuario.id) and usuario.rol != RolUsuario.SUPER_ADMIN:
-        raise HTTPException(status_code=403, detail="No tienes permisos")
+    producto = await obtener_de_barberia_propia(db, Producto, producto_id, usuario, "Producto no encontrado")
 
     producto.activo = False
-    db.commit()
+    await db.commit()
+    await cache_catalogo.invalidar(f"productos:{producto.barberia_id}")
     return {"message": "Producto eliminado"}
@@ -1,42 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
 
 from app.config.database import get_db
-from app.models.usuario import Usuario, RolUsuario
 from app.models.resena import Resena
-from app.models.barberia import Barberia
-from app.schemas.resena import ResenaCreate, ResenaUpdate, ResenaResponse, ResenaRespuesta
-from app.middlewares.auth import obtener_usuario_actual, requiere_admin_barberia
+from app.models.usuario import RolUsuario
+from app.schemas.resena import (
+    ResenaCreate, ResenaUpdate, ResenaResponse, ResenaExpandidaResponse, ResenaRespuesta
+)
+from app.schemas.paginacion import Pagina
+from app.middlewares.auth import (
+    Principal, obtener_principal, requiere_admin_barberia, obtener_de_barberia_propia
+)
+from app.services.paginacion import paginar
+from app.services.expansion import Expansion
+from app.services.cache import cache_catalogo
+from app.services.calificaciones import cambiar_calificacion, quitar_calificacion, registrar_calificacion
 
 router = APIRouter()
 
 
-@router.get("/barberia/{barberia_id}", response_model=List[ResenaResponse])
-def listar_resenas(barberia_id: UUID, skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
+@router.get(
+    "/barberia/{barberia_id}", response_model=Pagina[ResenaExpandidaResponse], response_model_exclude_unset=True
+)
+async def listar_resenas(
+    barberia_id: UUID,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    expand: Optional[str] = Query(None, description="cliente"),
+    db: AsyncSession = Depends(get_db)
+):
     """Lista reseñas de una barbería"""
-    return db.query(Resena).filter(
-        Resena.barberia_id == barberia_id
-    ).order_by(Resena.created_at.desc()).offset(skip).limit(limit).all()
+    expansion = Expansion(expand, {"cliente": Resena.cliente})
+    query = select(Resena).where(Resena.barberia_id == barberia_id)
+    pagina = await paginar(db, expansion.aplicar(query), [(Resena.created_at, True), (Resena.id, True)], cursor, limit)
+    return expansion.serializar(pagina, ResenaResponse)
 
 
 @router.post("/", response_model=ResenaResponse, status_code=status.HTTP_201_CREATED)
-def crear_resena(
+async def crear_resena(
     resena_data: ResenaCreate,
-    usuario: Usuario = Depends(obtener_usuario_actual),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(obtener_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """Cliente crea una reseña"""
     # Verificar que no haya reseñado ya esta barbería
-    existente = db.query(Resena).filter(
+    existente = await db.scalar(select(Resena).where(
         Resena.barberia_id == resena_data.barberia_id,
         Resena.cliente_id == usuario.id
-    ).first()
+    ))
 
     if existente:
         raise HTTPException(status_code=400, detail="Ya has reseñado esta barbería")
 
+    # Actualizar agregados de calificación de la barbería (atómico en SQL)
+    if not await registrar_calificacion(db, resena_data.barberia_id, resena_data.calificacion):
+        raise HTTPException(status_code=404, detail="Barbería no encontrada")
+
     nueva_resena = Resena(
         barberia_id=resena_data.barberia_id,
         cliente_id=usuario.id,
@@ -45,38 +67,74 @@ def crear_resena(
         comentario=resena_data.comentario
     )
     db.add(nueva_resena)
-
-    # Actualizar calificación promedio de la barbería
-    barberia = db.query(Barberia).filter(Barberia.id == resena_data.barberia_id).first()
-    if barberia:
-        total = barberia.total_resenas + 1
-        promedio_actual = float(barberia.calificacion_promedio or 0)
-        nuevo_promedio = ((promedio_actual * (total - 1)) + resena_data.calificacion) / total
-        barberia.calificacion_promedio = round(nuevo_promedio, 1)
-        barberia.total_resenas = total
-
-    db.commit()
-    db.refresh(nueva_resena)
+    await db.commit()
+    await db.refresh(nueva_resena)
+    await cache_catalogo.invalidar("barberias", f"barberia:{nueva_resena.barberia_id}")
     return nueva_resena
 
 
 @router.post("/{resena_id}/responder", response_model=ResenaResponse)
-def responder_resena(
+async def responder_resena(
     resena_id: UUID,
     respuesta: ResenaRespuesta,
-    usuario: Usuario = Depends(requiere_admin_barberia),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
 ):
     """Admin de barbería responde a una reseña"""
-    resena = db.query(Resena).filter(Resena.id == resena_id).first()
+    resena = await obtener_de_barberia_propia(db, Resena, resena_id, usuario, "Reseña no encontrada")
+
+    resena.respuesta_barberia = respuesta.respuesta_barberia
+    await db.commit()
+    await db.refresh(resena)
+    return resena
+
+
+async def _resena_bloqueada(db: AsyncSession, resena_id: UUID) -> Resena:
+    # FOR UPDATE: la calificación anterior que se resta de los agregados debe ser la vigente
+    resena = await db.scalar(select(Resena).where(Resena.id == resena_id).with_for_update())
     if not resena:
         raise HTTPException(status_code=404, detail="Reseña no encontrada")
+    return resena
+
 
-    barberia = db.query(Barberia).filter(Barberia.id == resena.barberia_id).first()
-    if str(barberia.propietario_id) != str(usuario.id) and usuario.rol != RolUsuario.SUPER_ADMIN:
+@router.put("/{resena_id}", response_model=ResenaResponse)
+async def actualizar_resena(
+    resena_id: UUID,
+    resena_data: ResenaUpdate,
+    usuario: Principal = Depends(obtener_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """Cliente edita su reseña"""
+    resena = await _resena_bloqueada(db, resena_id)
+    if resena.cliente_id != usuario.id:
         raise HTTPException(status_code=403, detail="No tienes permisos")
 
-    resena.respuesta_barberia = respuesta.respuesta_barberia
-    db.commit()
-    db.refresh(resena)
+    update_data = resena_data.model_dump(exclude_unset=True, exclude_none=True)
+    if "calificacion" in update_data:
+        await cambiar_calificacion(db, resena.barberia_id, resena.calificacion, update_data["calificacion"])
+    for key, value in update_data.items():
+        setattr(resena, key, value)
+
+    await db.commit()
+    await db.refresh(resena)
+    await cache_catalogo.invalidar("barberias", f"barberia:{resena.barberia_id}")
     return resena
+
+
+@router.delete("/{resena_id}")
+async def eliminar_resena(
+    resena_id: UUID,
+    usuario: Principal = Depends(obtener_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """Cliente elimina su reseña (o Super Admin cualquiera)"""
+    resena = await _resena_bloqueada(db, resena_id)
+    if resena.cliente_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
+        raise HTTPException(status_code=403, detail="No tienes permisos")
+
+    barberia_id = resena.barberia_id
+    await quitar_calificacion(db, barberia_id, resena.calificacion)
+    await db.delete(resena)
+    await db.commit()
+    await cache_catalogo.invalidar("barberias", f"barberia:{barberia_id}")
+    return {"message": "Reseña eliminada"}
@@ -1,89 +1,123 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
 
 from app.config.database import get_db
-from app.models.usuario import Usuario, RolUsuario
+from app.models.usuario import RolUsuario
 from app.models.servicio import Servicio
 from app.models.barberia import Barberia
 from app.schemas.servicio import ServicioCreate, ServicioUpdate, ServicioResponse
-from app.middlewares.auth import obtener_usuario_actual, requiere_admin_barberia
+from app.schemas.paginacion import Pagina
+from app.schemas.importacion import ResultadoImportacion
+from app.middlewares.auth import (
+    Principal, requiere_admin_barberia, obtener_de_barberia_propia
+)
+from app.services.paginacion import paginar
+from app.services.cache import cache_catalogo, estado_filas
+from app.services.importacion import Importacion
 
 router = APIRouter()
 
 
-@router.get("/barberia/{barberia_id}", response_model=List[ServicioResponse])
-def listar_servicios(barberia_id: UUID, activos: bool = True, db: Session = Depends(get_db)):
+@router.get("/barberia/{barberia_id}", response_model=Pagina[ServicioResponse])
+async def listar_servicios(
+    barberia_id: UUID,
+    request: Request,
+    activos: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
     """Lista servicios de una barbería"""
-    query = db.query(Servicio).filter(Servicio.barberia_id == barberia_id)
-    if activos:
-        query = query.filter(Servicio.activo == True)
-    return query.all()
+    async def construir():
+        query = select(Servicio).where(Servicio.barberia_id == barberia_id)
+        if activos:
+            query = query.where(Servicio.activo == True)
+        return await paginar(db, query, [(Servicio.created_at, False), (Servicio.id, False)], cursor, limit)
+
+    return await cache_catalogo.responder(
+        request, [f"servicios:{barberia_id}"], construir, Pagina[ServicioResponse],
+        validador=estado_filas(db, Servicio, Servicio.barberia_id == barberia_id)
+    )
 
 
 @router.post("/", response_model=ServicioResponse, status_code=status.HTTP_201_CREATED)
-def crear_servicio(
+async def crear_servicio(
     servicio_data: ServicioCreate,
     barberia_id: UUID,
-    usuario: Usuario = Depends(requiere_admin_barberia),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
 ):
     """Admin de barbería crea un servicio"""
-    barberia = db.query(Barberia).filter(Barberia.id == barberia_id).first()
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
     if not barberia:
         raise HTTPException(status_code=404, detail="Barbería no encontrada")
 
-    if str(barberia.propietario_id) != str(usuario.id) and usuario.rol != RolUsuario.SUPER_ADMIN:
+    if barberia.propietario_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
         raise HTTPException(status_code=403, detail="No tienes permisos")
 
     nuevo_servicio = Servicio(barberia_id=barberia_id, **servicio_data.model_dump())
     db.add(nuevo_servicio)
-    db.commit()
-    db.refresh(nuevo_servicio)
+    await db.commit()
+    await db.refresh(nuevo_servicio)
+    await cache_catalogo.invalidar(f"servicios:{barberia_id}")
     return nuevo_servicio
 
 
+@router.post("/importar", response_model=ResultadoImportacion)
+async def importar_servicios(
+    request: Request,
+    barberia_id: UUID,
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin de barbería: importa servicios desde CSV o NDJSON (uno por fila; con `id` actualiza)"""
+    barberia = await db.scalar(select(Barberia).where(Barberia.id == barberia_id))
+    if not barberia:
+        raise HTTPException(status_code=404, detail="Barbería no encontrada")
+
+    if barberia.propietario_id != usuario.id and usuario.rol != RolUsuario.SUPER_ADMIN:
+        raise HTTPException(status_code=403, detail="No tienes permisos")
+
+    importacion = await Importacion(
+        db, Servicio, ServicioCreate, {"barberia_id": barberia_id}, propietario="barberia_id"
+    ).ejecutar(request)
+    await cache_catalogo.invalidar(f"servicios:{barberia_id}")
+    return importacion.resultado()
+
+
 @router.put("/{servicio_id}", response_model=ServicioResponse)
-def actualizar_servicio(
+async def actualizar_servicio(
     servicio_id: UUID,
     servicio_data: ServicioUpdate,
-    usuario: Usuario = Depends(requiere_admin_barberia),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
 ):
     """Actualizar un servicio"""
-    servicio = db.query(Servicio).filter(Servicio.id == servicio_id).first()
-    if not servicio:
-        raise HTTPException(status_code=404, detail="Servicio no encontrado")
-
-    barberia = db.query(Barberia).filter(Barberia.id == servicio.barberia_id).first()
-    if str(barberia.propietario_id) != str(usuario.id) and usuario.rol != RolUsuario.SUPER_ADMIN:
-        raise HTTPException(status_code=403, detail="No tienes permisos")
+    servicio = await obtener_de_barberia_propia(db, Servicio, servicio_id, usuario, "Servicio no encontrado")
 
     update_data = servicio_data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(servicio, key, value)
 
-    db.commit()
-    db.refresh(servicio)
+    await db.commit()
+    await db.refresh(servicio)
+    await cache_catalogo.invalidar(f"servicios:{servicio.barberia_id}")
     return servicio
 
 
 @router.delete("/{servicio_id}")
-def eliminar_servicio(
+async def eliminar_servicio(
     servicio_id: UUID,
-    usuario: Usuario = Depends(requiere_admin_barberia),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_admin_barberia),
+    db: AsyncSession = Depends(get_db)
 ):
     """Desactivar un servicio"""
-    servicio = db.query(Servicio).filter(Servicio.id == servicio_id).first()
-    if not servicio:
-        raise HTTPException(status_code=404, detail="Servicio no encontrado")
-
-    barberia = db.query(Barberia).filter(Barberia.id == servicio.barberia_id).first()
-    if str(barberia.propietario_id) != str(usuario.id) and usuario.rol != RolUsuario.SUPER_ADMIN:
-        raise HTTPException(status_code=403, detail="No tienes permisos")
+    servicio = await obtener_de_barberia_propia(db, Servicio, servicio_id, usuario, "Servicio no encontrado")
 
     servicio.activo = False
-    db.commit()
+    await db.commit()
+    await cache_catalogo.invalidar(f"servicios:{servicio.barberia_id}")
     return {"message": "Servicio eliminado"}
@@ -1,41 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
 
 from app.config.database import get_db
 from app.models.usuario import Usuario, RolUsuario
 from app.schemas.usuario import UsuarioCreate, UsuarioUpdate, UsuarioResponse
+from app.schemas.paginacion import Pagina
 from app.middlewares.auth import (
-    obtener_usuario_actual, requiere_super_admin, obtener_password_hash
+    Principal, obtener_principal, requiere_super_admin,
+    invalidar_principal
 )
+from app.services.hashing import pool_hashing
+from app.services.paginacion import paginar
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[UsuarioResponse])
-def listar_usuarios(
-    skip: int = 0,
-    limit: int = 100,
+@router.get("/", response_model=Pagina[UsuarioResponse])
+async def listar_usuarios(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     rol: RolUsuario = None,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Solo Super Admin puede listar todos los usuarios"""
-    query = db.query(Usuario)
+    query = select(Usuario)
     if rol:
-        query = query.filter(Usuario.rol == rol)
-    return query.offset(skip).limit(limit).all()
+        query = query.where(Usuario.rol == rol)
+    return await paginar(db, query, [(Usuario.created_at, True), (Usuario.id, True)], cursor, limit)
 
 
 @router.get("/{usuario_id}", response_model=UsuarioResponse)
-def obtener_usuario(
+async def obtener_usuario(
     usuario_id: UUID,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Solo Super Admin puede ver detalles de cualquier usuario"""
-    db_usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    db_usuario = await db.scalar(select(Usuario).where(Usuario.id == usuario_id))
     if not db_usuario:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -45,13 +50,13 @@ def obtener_usuario(
 
 
 @router.post("/", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
-def crear_usuario(
+async def crear_usuario(
     usuario_data: UsuarioCreate,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin puede crear usuarios con cualquier rol"""
-    db_usuario = db.query(Usuario).filter(Usuario.email == usuario_data.email).first()
+    db_usuario = await db.scalar(select(Usuario).where(Usuario.email == usuario_data.email))
     if db_usuario:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -60,32 +65,32 @@ def crear_usuario(
 
     nuevo_usuario = Usuario(
         email=usuario_data.email,
-        password_hash=obtener_password_hash(usuario_data.password),
+        password_hash=await pool_hashing.hash(usuario_data.password),
         nombre=usuario_data.nombre,
         telefono=usuario_data.telefono,
         rol=usuario_data.rol
     )
     db.add(nuevo_usuario)
-    db.commit()
-    db.refresh(nuevo_usuario)
+    await db.commit()
+    await db.refresh(nuevo_usuario)
     return nuevo_usuario
 
 
 @router.put("/{usuario_id}", response_model=UsuarioResponse)
-def actualizar_usuario(
+async def actualizar_usuario(
     usuario_id: UUID,
     usuario_data: UsuarioUpdate,
-    usuario_actual: Usuario = Depends(obtener_usuario_actual),
-    db: Session = Depends(get_db)
+    usuario_actual: Principal = Depends(obtener_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """Usuario puede actualizarse a sí mismo o Super Admin a cualquiera"""
-    if str(usuario_actual.id) != str(usuario_id) and usuario_actual.rol != RolUsuario.SUPER_ADMIN:
+    if usuario_actual.id != usuario_id and usuario_actual.rol != RolUsuario.SUPER_ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos para editar este usuario"
         )
 
-    db_usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    db_usuario = await db.scalar(select(Usuario).where(Usuario.id == usuario_id))
     if not db_usuario:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -96,19 +101,20 @@ def actualizar_usuario(
     for key, value in update_data.items():
         setattr(db_usuario, key, value)
 
-    db.commit()
-    db.refresh(db_usuario)
+    await db.commit()
+    await db.refresh(db_usuario)
+    invalidar_principal(db_usuario.id)
     return db_usuario
 
 
 @router.delete("/{usuario_id}")
-def desactivar_usuario(
+async def desactivar_usuario(
     usuario_id: UUID,
-    usuario: Usuario = Depends(requiere_super_admin),
-    db: Session = Depends(get_db)
+    usuario: Principal = Depends(requiere_super_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Super Admin puede desactivar usuarios"""
-    db_usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    db_usuario = await db.scalar(select(Usuario).where(Usuario.id == usuario_id))
     if not db_usuario:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -116,6 +122,7 @@ def desactivar_usuario(
         )
 
     db_usuario.activo = False
-    db.commit()
+    await db.commit()
+    invalidar_principal(db_usuario.id)
 
     return {"message": "Usuario desactivado correctamente"}
@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+from typing import Optional, List, Dict
+from uuid import UUID
+from datetime import date
+from decimal import Decimal
+
+from app.models.cita import EstadoCita
+from app.models.resumen_cita import Granularidad
+
+
+class PeriodoAnalytics(BaseModel):
+    inicio: date
+    total_citas: int
+    citas_por_estado: Dict[EstadoCita, int]
+    ingresos: Decimal
+    ingresos_previstos: Decimal
+    tasa_no_asistencia: Optional[float] = None
+
+
+class AnalyticsResponse(BaseModel):
+    barberia_id: UUID
+    granularidad: Granularidad
+    desde: date
+    hasta: date
+    total_citas: int
+    ingresos: Decimal
+    tasa_no_asistencia: Optional[float] = None
+    periodos: List[PeriodoAnalytics]
+
+
+class ServicioAnalytics(BaseModel):
+    servicio_id: UUID
+    nombre: Optional[str] = None
+    citas: int
+    ingresos: Decimal
+
+
+class BarberoAnalytics(BaseModel):
+    barbero_id: Optional[UUID] = None
+    nombre: Optional[str] = None
+    citas: int
+    minutos_reservados: int
+    minutos_disponibles: int
+    utilizacion: Optional[float] = None
@@ -53,6 +53,7 @@ class BarberiaResponse(BarberiaBase):
     horario: Optional[Dict[str, Any]] = None
     calificacion_promedio: Decimal
     total_resenas: int
+    histograma_calificaciones: Dict[int, int] = {}
     logo_url: Optional[str] = None
     fotos: List[str] = []
     fecha_vencimiento: Optional[datetime] = None
@@ -72,6 +73,18 @@ class BarberiaListResponse(BaseModel):
     logo_url: Optional[str] = None
     estado: EstadoBarberia
     plan_membresia: PlanMembresia
+    distancia_km: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class BarberiaResumen(BaseModel):
+    id: UUID
+    nombre: str
+    direccion: str
+    telefono: Optional[str] = None
+    logo_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Optional
+from uuid import UUID
+
+
+class BarberoResumen(BaseModel):
+    id: UUID
+    nombre: str
+    foto_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
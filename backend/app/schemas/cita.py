@@ -1,17 +1,32 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import AfterValidator, BaseModel
+from typing import Annotated, Optional, List
 from uuid import UUID
 from decimal import Decimal
-from datetime import datetime
+from datetime import date, datetime, timezone
 
 from app.models.cita import EstadoCita
+from app.schemas.barberia import BarberiaResumen
+from app.schemas.barbero import BarberoResumen
+from app.schemas.servicio import ServicioResumen
+from app.schemas.usuario import UsuarioResumen
+
+
+def _a_utc_sin_zona(valor: datetime) -> datetime:
+    if valor.tzinfo is not None:
+        return valor.astimezone(timezone.utc).replace(tzinfo=None)
+    return valor
+
+
+# Las citas se guardan en UTC sin zona: una fecha con desfase ("Z", "-05:00")
+# se convierte; una sin zona se toma como UTC
+FechaUTC = Annotated[datetime, AfterValidator(_a_utc_sin_zona)]
 
 
 class CitaBase(BaseModel):
     barberia_id: UUID
     servicio_id: UUID
     barbero_id: Optional[UUID] = None
-    fecha_hora: datetime
+    fecha_hora: FechaUTC
     notas: Optional[str] = None
 
 
@@ -21,7 +36,7 @@ class CitaCreate(CitaBase):
 
 class CitaUpdate(BaseModel):
     barbero_id: Optional[UUID] = None
-    fecha_hora: Optional[datetime] = None
+    fecha_hora: Optional[FechaUTC] = None
     estado: Optional[EstadoCita] = None
     notas: Optional[str] = None
 
@@ -41,3 +56,29 @@ class CitaResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class CitaExpandidaResponse(CitaResponse):
+    """CitaResponse con las relaciones pedidas en ?expand"""
+    servicio: Optional[ServicioResumen] = None
+    barbero: Optional[BarberoResumen] = None
+    barberia: Optional[BarberiaResumen] = None
+    cliente: Optional[UsuarioResumen] = None
+
+
+class SlotDisponible(BaseModel):
+    barbero_id: Optional[UUID] = None
+    inicio: datetime
+    fin: datetime
+
+
+class DisponibilidadDia(BaseModel):
+    fecha: date
+    slots: List[SlotDisponible]
+
+
+class DisponibilidadResponse(BaseModel):
+    barberia_id: UUID
+    servicio_id: UUID
+    duracion_minutos: int
+    dias: List[DisponibilidadDia]
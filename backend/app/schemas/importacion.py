@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class ErrorImportacion(BaseModel):
+    fila: int
+    errores: List[str]
+
+
+class ResultadoImportacion(BaseModel):
+    procesadas: int
+    creadas: int
+    actualizadas: int
+    con_error: int
+    errores: List[ErrorImportacion]
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Optional
+from decimal import Decimal
+
+
+class ProductoCreate(BaseModel):
+    nombre: str
+    descripcion: Optional[str] = None
+    precio: Decimal
+    stock: int = 0
+    categoria: Optional[str] = None
+    imagen_url: Optional[str] = None
@@ -3,6 +3,8 @@ from typing import Optional
 from uuid import UUID
 from datetime import datetime
 
+from app.schemas.usuario import UsuarioResumen
+
 
 class ResenaBase(BaseModel):
     calificacion: int = Field(..., ge=1, le=5)
@@ -33,3 +35,8 @@ class ResenaResponse(ResenaBase):
 
     class Config:
         from_attributes = True
+
+
+class ResenaExpandidaResponse(ResenaResponse):
+    """ResenaResponse con las relaciones pedidas en ?expand"""
+    cliente: Optional[UsuarioResumen] = None
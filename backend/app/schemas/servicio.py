@@ -34,3 +34,13 @@ class ServicioResponse(ServicioBase):
 
     class Config:
         from_attributes = True
+
+
+class ServicioResumen(BaseModel):
+    id: UUID
+    nombre: str
+    precio: Decimal
+    duracion_minutos: int
+
+    class Config:
+        from_attributes = True
@@ -38,6 +38,16 @@ class UsuarioResponse(UsuarioBase):
         from_attributes = True
 
 
+class UsuarioResumen(BaseModel):
+    """Datos públicos de un usuario (autor de una reseña, cliente de una cita)"""
+    id: UUID
+    nombre: str
+    avatar_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
 class Token(BaseModel):
     access_token: str
     refresh_token: str
@@ -48,6 +58,10 @@ class TokenData(BaseModel):
     user_id: Optional[str] = None
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
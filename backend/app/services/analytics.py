@@ -0,0 +1,243 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, select
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.models.barberia import Barberia
+from app.models.barbero import Barbero
+from app.models.cita import Cita, EstadoCita
+from app.models.resumen_cita import ResumenCita, Granularidad, SIN_BARBERO
+from app.models.servicio import Servicio
+from app.services.disponibilidad import SIN_BARBERO as SIN_BARBERO_AGENDA, a_local, compilar_horarios
+
+# Estados que ocupan tiempo del barbero
+ESTADOS_OCUPAN = [e for e in EstadoCita if e != EstadoCita.CANCELADA]
+ESTADOS_PREVISTOS = [EstadoCita.PENDIENTE, EstadoCita.CONFIRMADA, EstadoCita.EN_PROGRESO]
+
+_CLAVE = ["barberia_id", "granularidad", "inicio", "barbero_id", "servicio_id", "estado"]
+
+
+class HechoCita(NamedTuple):
+    """Lo que aporta una cita a los resúmenes (fecha: día local de la barbería)"""
+    barberia_id: UUID
+    fecha: date
+    barbero_id: UUID
+    servicio_id: UUID
+    estado: EstadoCita
+    minutos: int
+    ingresos: Decimal
+
+
+def hecho_de_cita(cita: Cita) -> HechoCita:
+    return HechoCita(
+        barberia_id=cita.barberia_id,
+        fecha=a_local(cita.fecha_hora).date(),
+        barbero_id=cita.barbero_id or SIN_BARBERO,
+        servicio_id=cita.servicio_id,
+        estado=cita.estado or EstadoCita.PENDIENTE,
+        minutos=int(cita.duracion_minutos),
+        ingresos=Decimal(cita.precio_total or 0),
+    )
+
+
+def inicio_semana(fecha: date) -> date:
+    return fecha - timedelta(days=fecha.weekday())
+
+
+def _periodos(fecha: date):
+    return [(Granularidad.DIA, fecha), (Granularidad.SEMANA, inicio_semana(fecha))]
+
+
+def _sumar(dialecto: str, fila: dict, citas: int, minutos: int, ingresos: Decimal):
+    """INSERT ... ON CONFLICT que suma al acumulado existente"""
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+    else:
+        from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+    stmt = insert_dialecto(ResumenCita).values(**fila, citas=citas, minutos=minutos, ingresos=ingresos)
+    return stmt.on_conflict_do_update(
+        index_elements=_CLAVE,
+        set_={
+            "citas": ResumenCita.citas + stmt.excluded.citas,
+            "minutos": ResumenCita.minutos + stmt.excluded.minutos,
+            "ingresos": ResumenCita.ingresos + stmt.excluded.ingresos,
+        }
+    )
+
+
+def _deltas(cambios) -> Dict[tuple, list]:
+    """Suma por fila de resumen lo que restan los estados anteriores y suman los nuevos"""
+    deltas = defaultdict(lambda: [0, 0, Decimal(0)])
+    for antes, despues in cambios:
+        if antes == despues:
+            continue
+        for hecho, signo in ((antes, -1), (despues, 1)):
+            if hecho is None:
+                continue
+            for granularidad, inicio in _periodos(hecho.fecha):
+                delta = deltas[(hecho.barberia_id, granularidad, inicio, hecho.barbero_id,
+                                hecho.servicio_id, hecho.estado)]
+                delta[0] += signo
+                delta[1] += signo * hecho.minutos
+                delta[2] += signo * hecho.ingresos
+    return deltas
+
+
+def _sentencias(dialecto: str, cambios):
+    # Orden fijo de filas para que dos transacciones no se bloqueen en cruz
+    deltas = _deltas(cambios)
+    for clave in sorted(deltas, key=lambda c: tuple(str(v) for v in c)):
+        citas, minutos, ingresos = deltas[clave]
+        if citas or minutos or ingresos:
+            yield _sumar(dialecto, dict(zip(_CLAVE, clave)), citas, minutos, ingresos)
+
+
+async def registrar_cambio_cita(db, antes: Optional[HechoCita], despues: Optional[HechoCita]) -> None:
+    """Resta el aporte anterior de la cita y suma el nuevo (sin commit)"""
+    for stmt in _sentencias(db.get_bind().dialect.name, [(antes, despues)]):
+        await db.execute(stmt)
+
+
+def registrar_cambios(db, cambios: List[Tuple[Optional[HechoCita], Optional[HechoCita]]]) -> None:
+    """Versión síncrona por lotes de registrar_cambio_cita (sin commit)"""
+    for stmt in _sentencias(db.get_bind().dialect.name, cambios):
+        db.execute(stmt)
+
+
+async def serie(db, barberia_id, granularidad: Granularidad, desde: date, hasta: date) -> list:
+    """Filas (inicio, estado, citas, ingresos) por periodo"""
+    if granularidad == Granularidad.SEMANA:
+        desde = inicio_semana(desde)
+    return (await db.execute(
+        select(
+            ResumenCita.inicio,
+            ResumenCita.estado,
+            func.sum(ResumenCita.citas),
+            func.sum(ResumenCita.ingresos)
+        ).where(
+            ResumenCita.barberia_id == barberia_id,
+            ResumenCita.granularidad == granularidad,
+            ResumenCita.inicio >= desde,
+            ResumenCita.inicio <= hasta
+        ).group_by(ResumenCita.inicio, ResumenCita.estado).order_by(ResumenCita.inicio)
+    )).all()
+
+
+def _filtro_dias(barberia_id, desde: date, hasta: date):
+    return (
+        ResumenCita.barberia_id == barberia_id,
+        ResumenCita.granularidad == Granularidad.DIA,
+        ResumenCita.inicio >= desde,
+        ResumenCita.inicio <= hasta,
+    )
+
+
+async def top_servicios(db, barberia_id, desde: date, hasta: date, limite: int) -> list:
+    """Filas (servicio_id, nombre, citas, ingresos) de los servicios más reservados"""
+    citas = func.sum(ResumenCita.citas).label("citas")
+    ingresos = func.sum(ResumenCita.ingresos).filter(ResumenCita.estado == EstadoCita.COMPLETADA)
+    agregados = select(
+        ResumenCita.servicio_id, citas, ingresos.label("ingresos")
+    ).where(
+        *_filtro_dias(barberia_id, desde, hasta),
+        ResumenCita.estado.in_(ESTADOS_OCUPAN)
+    ).group_by(ResumenCita.servicio_id).order_by(citas.desc()).limit(limite).subquery()
+
+    return (await db.execute(
+        select(agregados.c.servicio_id, Servicio.nombre, agregados.c.citas, agregados.c.ingresos)
+        .join(Servicio, Servicio.id == agregados.c.servicio_id, isouter=True)
+        .order_by(agregados.c.citas.desc())
+    )).all()
+
+
+async def uso_barberos(db, barberia: Barberia, desde: date, hasta: date) -> List[dict]:
+    """Minutos reservados frente a minutos disponibles según horario, por barbero"""
+    reservados = {
+        barbero_id: (int(minutos or 0), int(citas or 0))
+        for barbero_id, minutos, citas in (await db.execute(
+            select(
+                ResumenCita.barbero_id, func.sum(ResumenCita.minutos), func.sum(ResumenCita.citas)
+            ).where(
+                *_filtro_dias(barberia.id, desde, hasta),
+                ResumenCita.estado.in_(ESTADOS_OCUPAN)
+            ).group_by(ResumenCita.barbero_id)
+        )).all()
+    }
+
+    # Minutos por día de la semana según las máscaras compiladas del horario
+    intervalo = settings.DISPONIBILIDAD_INTERVALO_MINUTOS
+    dias_por_semana = [0] * 7
+    for n in range((hasta - desde).days + 1):
+        dias_por_semana[(desde + timedelta(days=n)).weekday()] += 1
+    disponibles: Dict[UUID, int] = {}
+    for clave, mascaras in (await compilar_horarios(db, barberia)).items():
+        barbero_id = SIN_BARBERO if clave is SIN_BARBERO_AGENDA else clave
+        disponibles[barbero_id] = sum(
+            bin(mascara).count("1") * intervalo * dias for mascara, dias in zip(mascaras, dias_por_semana)
+        )
+
+    nombres = dict((await db.execute(
+        select(Barbero.id, Barbero.nombre).where(Barbero.barberia_id == barberia.id)
+    )).all())
+
+    resultado = []
+    for barbero_id in sorted(set(disponibles) | set(reservados), key=str):
+        minutos, citas = reservados.get(barbero_id, (0, 0))
+        disponible = disponibles.get(barbero_id, 0)
+        resultado.append({
+            "barbero_id": None if barbero_id == SIN_BARBERO else barbero_id,
+            "nombre": nombres.get(barbero_id),
+            "citas": citas,
+            "minutos_reservados": minutos,
+            "minutos_disponibles": disponible,
+            "utilizacion": round(minutos / disponible, 4) if disponible else None,
+        })
+    return resultado
+
+
+def reconstruir_resumenes(db, barberia_id=None) -> int:
+    """Recalcula los resúmenes desde `citas` (todas las barberías o una); retorna filas"""
+    borrar = delete(ResumenCita)
+    consulta = select(
+        Cita.barberia_id, Cita.fecha_hora, Cita.barbero_id, Cita.servicio_id,
+        Cita.estado, Cita.duracion_minutos, Cita.precio_total
+    ).execution_options(yield_per=5000)
+    if barberia_id is not None:
+        borrar = borrar.where(ResumenCita.barberia_id == barberia_id)
+        consulta = consulta.where(Cita.barberia_id == barberia_id)
+
+    acumulados = defaultdict(lambda: [0, 0, Decimal(0)])
+    for b_id, fecha_hora, barbero_id, servicio_id, estado, duracion, precio in db.execute(consulta):
+        for granularidad, inicio in _periodos(a_local(fecha_hora).date()):
+            clave = (b_id, granularidad, inicio, barbero_id or SIN_BARBERO, servicio_id,
+                     estado or EstadoCita.PENDIENTE)
+            acumulado = acumulados[clave]
+            acumulado[0] += 1
+            acumulado[1] += int(duracion)
+            acumulado[2] += Decimal(precio or 0)
+
+    db.execute(borrar)
+    filas = [
+        dict(zip(_CLAVE, clave), citas=citas, minutos=minutos, ingresos=ingresos)
+        for clave, (citas, minutos, ingresos) in acumulados.items()
+    ]
+    if filas:
+        db.execute(insert(ResumenCita), filas)
+    db.commit()
+    return len(filas)
+
+
+if __name__ == "__main__":
+    # Reconstrucción completa: python -m app.services.analytics
+    import app.models  # noqa: F401  registra todos los modelos
+
+    db = SessionLocal()
+    try:
+        print(f"Filas de resumen generadas: {reconstruir_resumenes(db)}")
+    finally:
+        db.close()
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from sqlalchemy import select, update
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.models.barberia import Barberia, EstadoBarberia
+from app.models.cita import Cita, EstadoCita
+from app.models.ejecucion_barrido import EjecucionBarrido
+from app.services.analytics import hecho_de_cita, registrar_cambios
+from app.services.cache import cache_catalogo
+from app.services.geo import indice_barberias
+
+logger = logging.getLogger(__name__)
+
+
+def _siguiente_lote(consulta, lote: int):
+    # En PostgreSQL las filas que otra transacción tiene bloqueadas se dejan para la próxima pasada
+    return consulta.limit(lote).with_for_update(skip_locked=True)
+
+
+def suspender_vencidas(db, ahora: datetime, lote: int) -> int:
+    """Suspende un lote de barberías activas con la suscripción vencida"""
+    ids = _siguiente_lote(
+        select(Barberia.id).where(
+            Barberia.estado == EstadoBarberia.ACTIVA,
+            Barberia.fecha_vencimiento < ahora
+        ).order_by(Barberia.fecha_vencimiento),
+        lote
+    )
+    suspendidas = db.execute(
+        update(Barberia)
+        .where(Barberia.id.in_(ids), Barberia.estado == EstadoBarberia.ACTIVA)
+        .values(estado=EstadoBarberia.SUSPENDIDA)
+        .returning(Barberia.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+
+    # Solo alcanza a las cachés de este proceso (o a Redis); el listado público
+    # vuelve a comprobar el estado en la base de datos
+    for barberia_id in suspendidas:
+        indice_barberias.quitar(barberia_id)
+    if suspendidas:
+        cache_catalogo.invalidar_en_hilo("barberias", *(f"barberia:{b}" for b in suspendidas))
+    return len(suspendidas)
+
+
+def marcar_no_asistidas(db, ahora: datetime, lote: int) -> int:
+    """Pasa a NO_ASISTIO un lote de citas que siguen pendientes tras el periodo de gracia"""
+    limite = ahora - timedelta(hours=settings.BARRIDO_GRACIA_CITAS_HORAS)
+    ids = _siguiente_lote(
+        select(Cita.id).where(
+            Cita.estado == EstadoCita.PENDIENTE,
+            Cita.fecha_hora < limite
+        ).order_by(Cita.fecha_hora),
+        lote
+    )
+    filas = db.execute(
+        update(Cita)
+        .where(Cita.id.in_(ids), Cita.estado == EstadoCita.PENDIENTE)
+        .values(estado=EstadoCita.NO_ASISTIO)
+        .returning(
+            Cita.barberia_id, Cita.fecha_hora, Cita.barbero_id, Cita.servicio_id,
+            Cita.estado, Cita.duracion_minutos, Cita.precio_total
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    cambios = []
+    for fila in filas:
+        despues = hecho_de_cita(fila)
+        cambios.append((despues._replace(estado=EstadoCita.PENDIENTE), despues))
+    registrar_cambios(db, cambios)
+    db.commit()
+    return len(filas)
+
+
+TAREAS: Dict[str, Callable[..., int]] = {
+    "suscripciones_vencidas": suspender_vencidas,
+    "citas_no_asistidas": marcar_no_asistidas,
+}
+
+
+def _acumular(dialecto: str, nombre: str, filas: int, lotes: int, duracion_ms: float, error: bool):
+    """INSERT ... ON CONFLICT que suma la ejecución al acumulado de la tarea"""
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+    else:
+        from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+    ultima = {
+        "ultima_ejecucion": datetime.utcnow(),
+        "filas_ultima": filas,
+        "lotes_ultima": lotes,
+        "duracion_ms_ultima": duracion_ms,
+    }
+    stmt = insert_dialecto(EjecucionBarrido).values(
+        tarea=nombre, ejecuciones=1, filas_total=filas, errores=int(error), **ultima
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["tarea"],
+        set_={
+            "ejecuciones": EjecucionBarrido.ejecuciones + 1,
+            "filas_total": EjecucionBarrido.filas_total + stmt.excluded.filas_total,
+            "errores": EjecucionBarrido.errores + stmt.excluded.errores,
+            **{columna: getattr(stmt.excluded, columna) for columna in ultima},
+        }
+    )
+
+
+class Barrido:
+    """Ejecuta las tareas en lotes acotados y acumula sus métricas en ejecuciones_barrido.
+
+    Cada lote es una transacción corta; entre lotes se hace una pausa para no
+    acaparar conexiones ni bloqueos frente a la API.
+    """
+
+    def _ejecutar_tarea(self, nombre: str, tarea: Callable[..., int]) -> int:
+        lote = settings.BARRIDO_LOTE
+        inicio = time.perf_counter()
+        filas = lotes = 0
+        error = False
+        db = SessionLocal()
+        try:
+            while True:
+                procesadas = tarea(db, datetime.utcnow(), lote)
+                filas += procesadas
+                lotes += 1
+                if procesadas < lote:
+                    break
+                time.sleep(settings.BARRIDO_PAUSA_MS / 1000)
+        except Exception:
+            db.rollback()
+            error = True
+            logger.exception("Barrido %s falló tras %d filas", nombre, filas)
+
+        duracion_ms = round((time.perf_counter() - inicio) * 1000, 1)
+        try:
+            db.execute(_acumular(db.get_bind().dialect.name, nombre, filas, lotes, duracion_ms, error))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("No se pudieron guardar las métricas del barrido %s", nombre)
+        finally:
+            db.close()
+        if filas:
+            logger.info("Barrido %s: %d filas en %d lotes (%.1f ms)", nombre, filas, lotes, duracion_ms)
+        return filas
+
+    def ejecutar(self) -> Dict[str, int]:
+        """Una pasada completa de todas las tareas; retorna filas procesadas por tarea"""
+        return {nombre: self._ejecutar_tarea(nombre, tarea) for nombre, tarea in TAREAS.items()}
+
+    async def en_segundo_plano(self) -> None:
+        """Bucle dentro del proceso de la API; cada pasada corre en un hilo"""
+        while True:
+            await asyncio.to_thread(self.ejecutar)
+            await asyncio.sleep(settings.BARRIDO_INTERVALO_SEGUNDOS)
+
+    def estadisticas(self) -> dict:
+        """Acumulados por tarea de todas las ejecuciones, de este proceso o del worker"""
+        resultado = {nombre: {"ejecuciones": 0, "filas_total": 0, "errores": 0} for nombre in TAREAS}
+        db = SessionLocal()
+        try:
+            for fila in db.scalars(select(EjecucionBarrido)):
+                resultado[fila.tarea] = {
+                    "ejecuciones": fila.ejecuciones,
+                    "filas_total": fila.filas_total,
+                    "errores": fila.errores,
+                    "ultima_ejecucion": fila.ultima_ejecucion.isoformat() if fila.ultima_ejecucion else None,
+                    "filas_ultima": fila.filas_ultima,
+                    "lotes_ultima": fila.lotes_ultima,
+                    "duracion_ms_ultima": fila.duracion_ms_ultima,
+                }
+        finally:
+            db.close()
+        return resultado
+
+
+barrido = Barrido()
+
+
+if __name__ == "__main__":
+    # Worker separado, uno solo por despliegue: python -m app.services.barrido [--una-vez]
+    import app.models  # noqa: F401  registra todos los modelos
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    while True:
+        logger.info("Pasada del barrido: %s", barrido.ejecutar())
+        if "--una-vez" in sys.argv:
+            break
+        time.sleep(settings.BARRIDO_INTERVALO_SEGUNDOS)
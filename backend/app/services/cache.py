@@ -0,0 +1,290 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+import orjson
+from sqlalchemy import func, select
+
+from app.config.settings import settings
+from app.services.serializacion import a_json
+
+
+def estado_filas(db, modelo, *filtros) -> Callable[[], Awaitable[Tuple]]:
+    """Estado barato de las filas de una respuesta: (max(updated_at), count(*)).
+
+    Cambia con cualquier alta, baja o modificación sin cargar las filas.
+    """
+    async def estado() -> Tuple:
+        consulta = select(func.max(modelo.updated_at), func.count()).select_from(modelo).where(*filtros)
+        return tuple((await db.execute(consulta)).one())
+    return estado
+
+
+def _etag(*partes) -> str:
+    return '"' + hashlib.blake2b(repr(partes).encode(), digest_size=16).hexdigest() + '"'
+
+
+def _coincide(request: Request, etag: str) -> bool:
+    """If-None-Match usa comparación débil: se ignora el prefijo W/"""
+    cabecera = request.headers.get("if-none-match")
+    if not cabecera:
+        return False
+    if cabecera.strip() == "*":
+        return True
+    return any(e.strip().removeprefix("W/") == etag for e in cabecera.split(","))
+
+
+class CacheMemoria:
+    """LRU en proceso con expiración por TTL e invalidación por etiquetas.
+
+    Los métodos son corrutinas por el contrato común con CacheRedis; no esperan nada.
+    """
+
+    def __init__(self, max_entradas: int, ttl: int):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[str, Tuple[float, bytes, Tuple[str, ...]]]" = OrderedDict()
+        self._por_etiqueta: Dict[str, Set[str]] = {}
+        self._versiones: Dict[str, int] = {}
+
+    async def versiones(self, etiquetas: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versiones.get(e, 0) for e in etiquetas)
+
+    async def obtener(self, clave: str) -> Optional[bytes]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            expira, cuerpo, _ = entrada
+            if expira < time.monotonic():
+                self._quitar(clave)
+                return None
+            self._entradas.move_to_end(clave)
+            return cuerpo
+
+    async def guardar(self, clave: str, cuerpo: bytes, etiquetas: Tuple[str, ...], versiones: Tuple[int, ...]) -> None:
+        with self._lock:
+            # Si hubo una escritura mientras se construía la respuesta, no se guarda
+            if tuple(self._versiones.get(e, 0) for e in etiquetas) != versiones:
+                return
+            self._quitar(clave)
+            self._entradas[clave] = (time.monotonic() + self.ttl, cuerpo, etiquetas)
+            for etiqueta in etiquetas:
+                self._por_etiqueta.setdefault(etiqueta, set()).add(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._quitar(next(iter(self._entradas)))
+
+    async def invalidar(self, etiqueta: str) -> None:
+        self.invalidar_en_hilo(etiqueta)
+
+    def invalidar_en_hilo(self, etiqueta: str) -> None:
+        with self._lock:
+            self._versiones[etiqueta] = self._versiones.get(etiqueta, 0) + 1
+            for clave in list(self._por_etiqueta.pop(etiqueta, ())):
+                self._quitar(clave)
+
+    async def cerrar(self) -> None:
+        pass
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _quitar(self, clave: str) -> None:
+        entrada = self._entradas.pop(clave, None)
+        if entrada is None:
+            return
+        for etiqueta in entrada[2]:
+            claves = self._por_etiqueta.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_etiqueta[etiqueta]
+
+
+class CacheRedis:
+    """Mismo contrato que CacheMemoria sobre un servidor compatible con Redis.
+
+    Permite compartir la caché (y sus invalidaciones) entre varios workers. Las
+    peticiones usan el cliente asyncio; el barrido, que corre en un hilo o en su
+    propio proceso, invalida con un cliente bloqueante aparte.
+    """
+
+    PREFIJO = "nextbarber:cache:"
+
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio
+
+        self.url = url
+        self.ttl = ttl
+        self._redis = redis.asyncio.Redis.from_url(url)
+        self._redis_bloqueante = None
+
+    async def versiones(self, etiquetas: Iterable[str]) -> Tuple[int, ...]:
+        etiquetas = list(etiquetas)
+        if not etiquetas:
+            return ()
+        valores = await self._redis.mget([f"{self.PREFIJO}version:{e}" for e in etiquetas])
+        return tuple(int(v or 0) for v in valores)
+
+    async def obtener(self, clave: str) -> Optional[bytes]:
+        return await self._redis.get(self.PREFIJO + clave)
+
+    async def guardar(self, clave: str, cuerpo: bytes, etiquetas: Tuple[str, ...], versiones: Tuple[int, ...]) -> None:
+        if await self.versiones(etiquetas) != versiones:
+            return
+        pipe = self._redis.pipeline()
+        pipe.set(self.PREFIJO + clave, cuerpo, ex=self.ttl)
+        for etiqueta in etiquetas:
+            pipe.sadd(f"{self.PREFIJO}etiqueta:{etiqueta}", clave)
+            pipe.expire(f"{self.PREFIJO}etiqueta:{etiqueta}", self.ttl)
+        await pipe.execute()
+
+    async def invalidar(self, etiqueta: str) -> None:
+        llave_etiqueta = f"{self.PREFIJO}etiqueta:{etiqueta}"
+        claves = await self._redis.smembers(llave_etiqueta)
+        pipe = self._redis.pipeline()
+        self._borrar(pipe, etiqueta, llave_etiqueta, claves)
+        await pipe.execute()
+
+    def invalidar_en_hilo(self, etiqueta: str) -> None:
+        if self._redis_bloqueante is None:
+            import redis
+
+            self._redis_bloqueante = redis.Redis.from_url(self.url)
+        llave_etiqueta = f"{self.PREFIJO}etiqueta:{etiqueta}"
+        claves = self._redis_bloqueante.smembers(llave_etiqueta)
+        pipe = self._redis_bloqueante.pipeline()
+        self._borrar(pipe, etiqueta, llave_etiqueta, claves)
+        pipe.execute()
+
+    def _borrar(self, pipe, etiqueta: str, llave_etiqueta: str, claves) -> None:
+        pipe.incr(f"{self.PREFIJO}version:{etiqueta}")
+        for clave in claves:
+            pipe.delete(self.PREFIJO + clave.decode())
+        pipe.delete(llave_etiqueta)
+
+    async def cerrar(self) -> None:
+        await self._redis.aclose()
+        if self._redis_bloqueante is not None:
+            self._redis_bloqueante.close()
+
+    def __len__(self):
+        return 0
+
+
+class CacheCatalogo:
+    """Caché de respuestas públicas del catálogo con contadores de aciertos"""
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.no_modificadas = 0
+        self.invalidaciones = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    if settings.CACHE_REDIS_URL:
+                        self._backend = CacheRedis(
+                            settings.CACHE_REDIS_URL, settings.CACHE_CATALOGO_TTL_SEGUNDOS
+                        )
+                    else:
+                        self._backend = CacheMemoria(
+                            settings.CACHE_CATALOGO_MAX_ENTRADAS, settings.CACHE_CATALOGO_TTL_SEGUNDOS
+                        )
+        return self._backend
+
+    def _serializar(self, modelo, datos) -> bytes:
+        if modelo is None:
+            return orjson.dumps(jsonable_encoder(datos), option=orjson.OPT_NON_STR_KEYS)
+        return a_json(modelo, datos)
+
+    def _respuesta(self, request: Request, cuerpo: Optional[bytes], etag: str) -> Response:
+        cabeceras = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={settings.CACHE_HTTP_MAX_AGE_SEGUNDOS}",
+        }
+        if cuerpo is None or _coincide(request, etag):
+            with self._lock:
+                self.no_modificadas += 1
+            return Response(status_code=304, headers=cabeceras)
+        return Response(content=cuerpo, media_type="application/json", headers=cabeceras)
+
+    async def responder(
+        self,
+        request: Request,
+        etiquetas: List[str],
+        construir: Callable[[], Awaitable[Any]],
+        modelo: Any = None,
+        validador: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Response:
+        """Devuelve la respuesta cacheada para la ruta y sus parámetros, o la construye.
+
+        Con `validador` el ETag sale de su estado (sin construir la respuesta) y
+        forma parte de la clave, así que un cuerpo cacheado nunca es más viejo
+        que su ETag aunque otro worker no haya visto la invalidación. Sin él,
+        el ETag es el hash del cuerpo. If-None-Match coincidente responde 304.
+        """
+        parametros = sorted(f"{k}={v}" for k, v in request.query_params.multi_items())
+        clave = request.url.path + "?" + "&".join(parametros)
+        etag = None
+        if validador is not None:
+            etag = _etag(clave, await validador())
+            if _coincide(request, etag):
+                return self._respuesta(request, None, etag)
+            clave += "#" + etag
+
+        etiquetas = tuple(etiquetas)
+        cuerpo = await self.backend.obtener(clave)
+        if cuerpo is not None:
+            with self._lock:
+                self.aciertos += 1
+        else:
+            with self._lock:
+                self.fallos += 1
+            versiones = await self.backend.versiones(etiquetas)
+            cuerpo = self._serializar(modelo, await construir())
+            await self.backend.guardar(clave, cuerpo, etiquetas, versiones)
+        return self._respuesta(request, cuerpo, etag or _etag(cuerpo))
+
+    async def invalidar(self, *etiquetas: str) -> None:
+        for etiqueta in etiquetas:
+            await self.backend.invalidar(etiqueta)
+        with self._lock:
+            self.invalidaciones += len(etiquetas)
+
+    def invalidar_en_hilo(self, *etiquetas: str) -> None:
+        """invalidar() para código síncrono fuera del event loop (barrido)"""
+        for etiqueta in etiquetas:
+            self.backend.invalidar_en_hilo(etiqueta)
+        with self._lock:
+            self.invalidaciones += len(etiquetas)
+
+    async def cerrar(self) -> None:
+        if self._backend is not None:
+            await self._backend.cerrar()
+
+    def estadisticas(self) -> dict:
+        total = self.aciertos + self.fallos
+        return {
+            "backend": "redis" if isinstance(self._backend, CacheRedis) else "memoria",
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "no_modificadas": self.no_modificadas,
+            "invalidaciones": self.invalidaciones,
+            "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+            "entradas": len(self.backend),
+        }
+
+
+cache_catalogo = CacheCatalogo()
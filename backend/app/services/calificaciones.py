@@ -0,0 +1,108 @@
+from typing import Optional
+
+from sqlalchemy import case, exists, func, or_, select, update
+
+from app.config.database import SessionLocal
+from app.models.barberia import Barberia
+from app.models.resena import Resena
+
+ESTRELLAS = range(1, 6)
+
+
+def _promedio(suma, total):
+    """Promedio con un decimal calculado en SQL desde la suma y el conteo exactos (0 sin reseñas)"""
+    return func.coalesce(func.round(suma * 1.0 / func.nullif(total, 0), 1), 0)
+
+
+async def _ajustar(db, barberia_id, agregar: Optional[int], quitar: Optional[int]) -> bool:
+    """Suma la calificación `agregar` y resta `quitar` en un único UPDATE atómico"""
+    total = int(agregar is not None) - int(quitar is not None)
+    suma = (agregar or 0) - (quitar or 0)
+    estrellas = {}
+    for calificacion, signo in ((agregar, 1), (quitar, -1)):
+        if calificacion is not None:
+            columna = getattr(Barberia, f"estrellas_{calificacion}")
+            estrellas[columna] = estrellas.get(columna, columna) + signo
+    resultado = await db.execute(
+        update(Barberia)
+        .where(Barberia.id == barberia_id)
+        .values({
+            Barberia.total_resenas: Barberia.total_resenas + total,
+            Barberia.suma_calificaciones: Barberia.suma_calificaciones + suma,
+            **estrellas,
+            Barberia.calificacion_promedio: _promedio(
+                Barberia.suma_calificaciones + suma, Barberia.total_resenas + total
+            ),
+        })
+    )
+    return resultado.rowcount == 1
+
+
+async def registrar_calificacion(db, barberia_id, calificacion: int) -> bool:
+    """Suma una calificación a los agregados de la barbería; False si la barbería no existe"""
+    return await _ajustar(db, barberia_id, calificacion, None)
+
+
+async def cambiar_calificacion(db, barberia_id, anterior: int, nueva: int) -> None:
+    """Reemplaza una calificación por otra en los agregados"""
+    if anterior != nueva:
+        await _ajustar(db, barberia_id, nueva, anterior)
+
+
+async def quitar_calificacion(db, barberia_id, calificacion: int) -> None:
+    """Resta una calificación de los agregados (reseña eliminada)"""
+    await _ajustar(db, barberia_id, None, calificacion)
+
+
+def recalcular_calificaciones(db) -> int:
+    """Reconstruye los agregados de todas las barberías desde `resenas` en una pasada.
+
+    Retorna cuántas barberías con reseñas se actualizaron.
+    """
+    agregados = select(
+        Resena.barberia_id,
+        func.count().label("total"),
+        func.sum(Resena.calificacion).label("suma"),
+        *[
+            func.sum(case((Resena.calificacion == n, 1), else_=0)).label(f"estrellas_{n}")
+            for n in ESTRELLAS
+        ]
+    ).group_by(Resena.barberia_id).subquery()
+
+    # Barberías sin reseñas que aún conservan agregados
+    db.execute(
+        update(Barberia)
+        .where(
+            ~exists().where(Resena.barberia_id == Barberia.id),
+            or_(Barberia.total_resenas != 0, Barberia.suma_calificaciones != 0)
+        )
+        .values(
+            total_resenas=0,
+            suma_calificaciones=0,
+            calificacion_promedio=0,
+            **{f"estrellas_{n}": 0 for n in ESTRELLAS}
+        )
+    )
+    actualizadas = db.execute(
+        update(Barberia)
+        .where(Barberia.id == agregados.c.barberia_id)
+        .values(
+            total_resenas=agregados.c.total,
+            suma_calificaciones=agregados.c.suma,
+            calificacion_promedio=_promedio(agregados.c.suma, agregados.c.total),
+            **{f"estrellas_{n}": agregados.c[f"estrellas_{n}"] for n in ESTRELLAS}
+        )
+    ).rowcount
+    db.commit()
+    return actualizadas
+
+
+if __name__ == "__main__":
+    # Reparación manual: python -m app.services.calificaciones
+    import app.models  # noqa: F401  registra todos los modelos
+
+    db = SessionLocal()
+    try:
+        print(f"Barberías recalculadas: {recalcular_calificaciones(db)}")
+    finally:
+        db.close()
@@ -0,0 +1,266 @@
+import math
+import threading
+import time as reloj
+import unicodedata
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+
+from app.config.settings import settings
+from app.models.barberia import Barberia
+from app.models.barbero import Barbero
+from app.models.cita import Cita, EstadoCita
+
+DIAS_SEMANA = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
+
+# Clave usada para la barbería cuando no tiene barberos registrados
+SIN_BARBERO = None
+
+
+def _minutos_intervalo() -> int:
+    return settings.DISPONIBILIDAD_INTERVALO_MINUTOS
+
+
+@lru_cache(maxsize=None)
+def zona_horaria() -> ZoneInfo:
+    """Zona de los horarios de las barberías (las citas se guardan en UTC sin zona)"""
+    return ZoneInfo(settings.ZONA_HORARIA)
+
+
+def a_local(valor: datetime) -> datetime:
+    """UTC sin zona -> hora local sin zona"""
+    return valor.replace(tzinfo=timezone.utc).astimezone(zona_horaria()).replace(tzinfo=None)
+
+
+def a_utc(valor: datetime) -> datetime:
+    """Hora local sin zona -> UTC sin zona"""
+    return valor.replace(tzinfo=zona_horaria()).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _normalizar_dia(nombre: str) -> str:
+    sin_tildes = unicodedata.normalize("NFKD", nombre).encode("ascii", "ignore").decode()
+    return sin_tildes.strip().lower()
+
+
+def _a_minutos(valor: str) -> int:
+    horas, minutos = valor.split(":")[:2]
+    return int(horas) * 60 + int(minutos)
+
+
+def _mascara_rango(inicio_min: int, fin_min: int) -> int:
+    """Bits de los intervalos completamente contenidos en [inicio_min, fin_min)"""
+    paso = _minutos_intervalo()
+    desde = math.ceil(inicio_min / paso)
+    hasta = fin_min // paso
+    if hasta <= desde:
+        return 0
+    return ((1 << (hasta - desde)) - 1) << desde
+
+
+def _mascara_ocupada(inicio_min: int, fin_min: int) -> int:
+    """Bits de los intervalos que tocan [inicio_min, fin_min)"""
+    paso = _minutos_intervalo()
+    desde = max(0, inicio_min // paso)
+    hasta = min(24 * 60 // paso, math.ceil(fin_min / paso))
+    if hasta <= desde:
+        return 0
+    return ((1 << (hasta - desde)) - 1) << desde
+
+
+def compilar_horario(horario: Optional[dict]) -> Optional[List[int]]:
+    """Convierte el JSON de horario en una máscara de bits por día de la semana.
+
+    Acepta {"lunes": {"apertura": "08:00", "cierre": "20:00"}, ...} o una lista
+    de bloques por día. Retorna None si no hay horario definido.
+    """
+    if not horario:
+        return None
+    semana = [0] * 7
+    for nombre, bloques in horario.items():
+        dia = _normalizar_dia(nombre)
+        if dia not in DIAS_SEMANA or not bloques:
+            continue
+        if isinstance(bloques, dict):
+            bloques = [bloques]
+        for bloque in bloques:
+            if not bloque or bloque.get("cerrado"):
+                continue
+            try:
+                mascara = _mascara_rango(_a_minutos(bloque["apertura"]), _a_minutos(bloque["cierre"]))
+            except (KeyError, ValueError, AttributeError):
+                continue
+            semana[DIAS_SEMANA.index(dia)] |= mascara
+    return semana
+
+
+class AgendaCompilada:
+    """Horarios y ocupación de una barbería expresados como máscaras de bits por día.
+
+    Fechas y minutos en hora local (ZONA_HORARIA), como el horario de la barbería.
+    """
+
+    def __init__(self, horarios: Dict[Optional[UUID], List[int]]):
+        self.creada = reloj.monotonic()
+        # barbero_id -> [máscara lunes..domingo]
+        self.horarios = horarios
+        # (barbero_id, fecha) -> máscara de intervalos ocupados
+        self.ocupacion: Dict[Tuple[Optional[UUID], date], int] = {}
+        self.desde: Optional[date] = None
+        self.hasta: Optional[date] = None
+
+    def cubre(self, desde: date, hasta: date) -> bool:
+        return self.desde is not None and self.desde <= desde and hasta <= self.hasta
+
+    def cargar_ocupacion(self, citas: List[Tuple[Optional[UUID], datetime, int]], desde: date, hasta: date) -> None:
+        ocupacion: Dict[Tuple[Optional[UUID], date], int] = {}
+        sin_asignar = []
+        for barbero_id, inicio, duracion in citas:
+            if barbero_id is None and SIN_BARBERO not in self.horarios:
+                sin_asignar.append((inicio, duracion))
+                continue
+            self._ocupar(ocupacion, barbero_id, inicio, duracion)
+
+        # Citas sin barbero asignado consumen al primer barbero libre en ese horario
+        for inicio, duracion in sin_asignar:
+            for barbero_id in self.horarios:
+                if not self._choca(ocupacion, barbero_id, inicio, duracion):
+                    self._ocupar(ocupacion, barbero_id, inicio, duracion)
+                    break
+
+        self.ocupacion = ocupacion
+        self.desde = desde
+        self.hasta = hasta
+
+    @staticmethod
+    def _tramos(inicio: datetime, duracion: int):
+        """Divide una cita en tramos (fecha, minuto_inicio, minuto_fin) por día"""
+        fin = inicio + timedelta(minutes=duracion)
+        actual = inicio
+        while actual < fin:
+            medianoche = datetime.combine(actual.date() + timedelta(days=1), time.min)
+            corte = min(fin, medianoche)
+            inicio_min = actual.hour * 60 + actual.minute
+            fin_min = inicio_min + math.ceil((corte - actual).total_seconds() / 60)
+            yield actual.date(), inicio_min, fin_min
+            actual = corte
+
+    def _ocupar(self, ocupacion, barbero_id, inicio: datetime, duracion: int) -> None:
+        for fecha, inicio_min, fin_min in self._tramos(inicio, duracion):
+            clave = (barbero_id, fecha)
+            ocupacion[clave] = ocupacion.get(clave, 0) | _mascara_ocupada(inicio_min, fin_min)
+
+    def _choca(self, ocupacion, barbero_id, inicio: datetime, duracion: int) -> bool:
+        for fecha, inicio_min, fin_min in self._tramos(inicio, duracion):
+            if ocupacion.get((barbero_id, fecha), 0) & _mascara_ocupada(inicio_min, fin_min):
+                return True
+        return False
+
+    def slots_libres(self, barbero_id: Optional[UUID], fecha: date, duracion: int) -> List[int]:
+        """Minutos del día en que puede iniciar un servicio de la duración dada"""
+        libres = self.horarios[barbero_id][fecha.weekday()] & ~self.ocupacion.get((barbero_id, fecha), 0)
+        if not libres:
+            return []
+        paso = _minutos_intervalo()
+        # Un inicio es válido si los n intervalos consecutivos están libres
+        inicios = libres
+        for desplazamiento in range(1, math.ceil(duracion / paso)):
+            inicios &= libres >> desplazamiento
+        resultado = []
+        indice = 0
+        while inicios:
+            if inicios & 1:
+                resultado.append(indice * paso)
+            inicios >>= 1
+            indice += 1
+        return resultado
+
+
+async def compilar_horarios(db, barberia: Barberia) -> Dict[Optional[UUID], List[int]]:
+    """Máscaras semanales por barbero activo (o SIN_BARBERO si no hay barberos)"""
+    horario_barberia = compilar_horario(barberia.horario)
+    barberos = (await db.execute(
+        select(Barbero.id, Barbero.horario).where(
+            Barbero.barberia_id == barberia.id,
+            Barbero.activo == True
+        )
+    )).all()
+    if not barberos:
+        return {SIN_BARBERO: horario_barberia or [0] * 7}
+
+    horarios = {}
+    for barbero_id, horario in barberos:
+        propio = compilar_horario(horario)
+        if propio is None:
+            horarios[barbero_id] = horario_barberia or [0] * 7
+        elif horario_barberia is None:
+            horarios[barbero_id] = propio
+        else:
+            # El barbero no puede atender fuera del horario de la barbería
+            horarios[barbero_id] = [a & b for a, b in zip(propio, horario_barberia)]
+    return horarios
+
+
+class CacheAgendas:
+    """Agendas compiladas por barbería, invalidadas al cambiar horarios o citas.
+
+    La invalidación es local al proceso: los cambios hechos en otro worker se
+    ven al vencer DISPONIBILIDAD_CACHE_SEGUNDOS. La reserva vuelve a verificar
+    el solapamiento contra la base, así que una agenda vencida no produce
+    citas dobles, solo ofrece un horario que ya se tomó.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agendas: Dict[UUID, AgendaCompilada] = {}
+        self._versiones: Dict[UUID, int] = {}
+
+    def invalidar(self, barberia_id: UUID) -> None:
+        with self._lock:
+            self._agendas.pop(barberia_id, None)
+            self._versiones[barberia_id] = self._versiones.get(barberia_id, 0) + 1
+
+    async def obtener(self, db, barberia: Barberia, desde: date, hasta: date) -> AgendaCompilada:
+        barberia_id = barberia.id
+        with self._lock:
+            agenda = self._agendas.get(barberia_id)
+            version = self._versiones.get(barberia_id, 0)
+        if agenda is not None and reloj.monotonic() - agenda.creada > settings.DISPONIBILIDAD_CACHE_SEGUNDOS:
+            agenda = None
+        if agenda is not None and agenda.cubre(desde, hasta):
+            return agenda
+
+        # Los horarios compilados se reutilizan; la ocupación se recarga para el nuevo rango
+        horarios = agenda.horarios if agenda is not None else await compilar_horarios(db, barberia)
+        nueva = AgendaCompilada(horarios)
+        if agenda is not None:
+            # Los horarios vencen con la agenda de la que salieron
+            nueva.creada = agenda.creada
+        agenda = nueva
+
+        # Se consulta desde el día anterior por citas que cruzan la medianoche
+        inicio = a_utc(datetime.combine(desde - timedelta(days=1), time.min))
+        fin = a_utc(datetime.combine(hasta, time.min))
+        citas = (await db.execute(
+            select(Cita.barbero_id, Cita.fecha_hora, Cita.duracion_minutos).where(
+                Cita.barberia_id == barberia_id,
+                Cita.estado != EstadoCita.CANCELADA,
+                Cita.fecha_hora >= inicio,
+                Cita.fecha_hora < fin
+            )
+        )).all()
+        agenda.cargar_ocupacion(
+            [(b, a_local(f), int(d)) for b, f, d in citas], desde, hasta
+        )
+
+        with self._lock:
+            # No guardar si hubo una invalidación mientras se consultaba
+            if self._versiones.get(barberia_id, 0) == version:
+                self._agendas[barberia_id] = agenda
+        return agenda
+
+
+cache_agendas = CacheAgendas()
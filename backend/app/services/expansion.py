@@ -0,0 +1,44 @@
+from typing import Any, Dict, List, Optional, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.orm import joinedload
+
+
+class Expansion:
+    """Relaciones opcionales de una respuesta (`?expand=a,b`).
+
+    Son relaciones muchos-a-uno: se cargan con joinedload en la misma consulta
+    de la página, así que el número de consultas no depende del tamaño de página.
+    """
+
+    def __init__(self, expand: Optional[str], relaciones: Dict[str, Any]):
+        self.relaciones = relaciones
+        self.campos: List[str] = []
+        for campo in (expand or "").split(","):
+            campo = campo.strip()
+            if not campo or campo in self.campos:
+                continue
+            if campo not in relaciones:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"No se puede expandir '{campo}'; opciones: {', '.join(relaciones)}"
+                )
+            self.campos.append(campo)
+
+    def aplicar(self, stmt: Select) -> Select:
+        return stmt.options(*(joinedload(self.relaciones[c]) for c in self.campos))
+
+    def serializar(self, pagina: dict, esquema: Type[BaseModel]) -> dict:
+        """Items como dicts con las columnas de `esquema` más solo las relaciones pedidas.
+
+        Las rutas usan response_model_exclude_unset: lo no expandido no aparece y
+        nunca se toca una relación sin cargar.
+        """
+        columnas = list(esquema.model_fields)
+        pagina["items"] = [
+            {**{c: getattr(item, c) for c in columnas}, **{c: getattr(item, c) for c in self.campos}}
+            for item in pagina["items"]
+        ]
+        return pagina
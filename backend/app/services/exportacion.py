@@ -0,0 +1,82 @@
+import csv
+import enum
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, List, Sequence
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.config.database import AsyncSessionLocal, SessionLocal
+from app.config.settings import settings
+
+
+class FormatoExportacion(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+TIPOS_MEDIO = {
+    FormatoExportacion.CSV: "text/csv; charset=utf-8",
+    FormatoExportacion.NDJSON: "application/x-ndjson",
+}
+
+
+def _texto(valor):
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+async def _particiones(consulta) -> AsyncIterator[Sequence]:
+    """Filas en bloques de EXPORTACION_LOTE leídas con un cursor del servidor.
+
+    Usa su propia sesión: la de la petición se cierra antes de que empiece el envío.
+    """
+    consulta = consulta.execution_options(yield_per=settings.EXPORTACION_LOTE)
+    if settings.DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            resultado = await db.stream(consulta)
+            async for particion in resultado.partitions():
+                yield particion
+        return
+
+    db = SessionLocal()
+    try:
+        particiones = (await run_in_threadpool(db.execute, consulta)).partitions()
+        while (particion := await run_in_threadpool(next, particiones, None)) is not None:
+            yield particion
+    finally:
+        await run_in_threadpool(db.close)
+
+
+def _csv(filas: List[Sequence]) -> bytes:
+    salida = io.StringIO()
+    csv.writer(salida).writerows([_texto(v) for v in fila] for fila in filas)
+    return salida.getvalue().encode()
+
+
+async def _cuerpo(consulta, formato: FormatoExportacion) -> AsyncIterator[bytes]:
+    columnas = [c.key for c in consulta.selected_columns]
+    if formato == FormatoExportacion.CSV:
+        # El encabezado sale antes de ejecutar la consulta
+        yield _csv([columnas])
+    async for filas in _particiones(consulta):
+        if formato == FormatoExportacion.CSV:
+            yield _csv(filas)
+        else:
+            yield "".join(
+                json.dumps(dict(zip(columnas, map(_texto, fila))), default=str) + "\n" for fila in filas
+            ).encode()
+
+
+def exportar(consulta, formato: FormatoExportacion, nombre: str) -> StreamingResponse:
+    """Respuesta que emite el resultado de `consulta` (select de columnas) en streaming"""
+    return StreamingResponse(
+        _cuerpo(consulta, formato),
+        media_type=TIPOS_MEDIO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato.value}"'}
+    )
@@ -0,0 +1,262 @@
+import asyncio
+import heapq
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.models.barberia import Barberia, EstadoBarberia, PlanMembresia
+
+logger = logging.getLogger(__name__)
+
+RADIO_TIERRA_KM = 6371.0088
+KM_POR_GRADO = 111.32
+
+# Tamaño de celda de la grilla en grados (~1,1 km en el ecuador): en el centro
+# de una ciudad una celda tiene del orden de cien barberías
+TAMANO_CELDA = 0.01
+CELDAS_LONGITUD = int(round(360 / TAMANO_CELDA))
+
+
+def distancia_haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distancia en km entre dos puntos geográficos"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def caja_envolvente(lat: float, lng: float, radio_km: float) -> Tuple[float, float, float]:
+    """Devuelve (lat_min, lat_max, delta_lng) de la caja que contiene el círculo de búsqueda"""
+    delta_lat = radio_km / KM_POR_GRADO
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-6 or abs(lat) + delta_lat >= 90:
+        delta_lng = 180.0
+    else:
+        delta_lng = min(180.0, radio_km / (KM_POR_GRADO * cos_lat))
+    return max(-90.0, lat - delta_lat), min(90.0, lat + delta_lat), delta_lng
+
+
+def _celda(lat: float, lng: float) -> Tuple[int, int]:
+    return math.floor(lat / TAMANO_CELDA), math.floor(lng / TAMANO_CELDA) % CELDAS_LONGITUD
+
+
+class IndiceEspacial:
+    """Índice en memoria (grilla lat/lng) de barberías activas con ubicación"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._celdas: Dict[Tuple[int, int], Set[str]] = {}
+        self._puntos: Dict[str, Tuple[float, float, PlanMembresia]] = {}
+        self._pendientes: Optional[Dict[str, Optional[Tuple[float, float, PlanMembresia]]]] = None
+        self._huella: Optional[tuple] = None
+        self.cargado = False
+
+    def __len__(self):
+        return len(self._puntos)
+
+    @staticmethod
+    def _entrada(barberia: Barberia) -> Optional[Tuple[float, float, PlanMembresia]]:
+        if barberia.estado != EstadoBarberia.ACTIVA:
+            return None
+        if barberia.latitud is None or barberia.longitud is None:
+            return None
+        return float(barberia.latitud), float(barberia.longitud), barberia.plan_membresia
+
+    @staticmethod
+    def _poner(celdas, puntos, barberia_id: str, entrada) -> None:
+        anterior = puntos.pop(barberia_id, None)
+        if anterior is not None:
+            celda = _celda(anterior[0], anterior[1])
+            ids = celdas.get(celda)
+            if ids is not None:
+                ids.discard(barberia_id)
+                if not ids:
+                    del celdas[celda]
+        if entrada is not None:
+            puntos[barberia_id] = entrada
+            celdas.setdefault(_celda(entrada[0], entrada[1]), set()).add(barberia_id)
+
+    def sincronizar(self, barberia: Barberia) -> None:
+        """Agrega, mueve o quita una barbería según su estado y ubicación actuales"""
+        barberia_id = str(barberia.id)
+        entrada = self._entrada(barberia)
+        with self._lock:
+            self._poner(self._celdas, self._puntos, barberia_id, entrada)
+            if self._pendientes is not None:
+                self._pendientes[barberia_id] = entrada
+
+    def quitar(self, barberia_id) -> None:
+        """Quita una barbería dada solo por id (p. ej. suspendida por el barrido)"""
+        barberia_id = str(barberia_id)
+        with self._lock:
+            self._poner(self._celdas, self._puntos, barberia_id, None)
+            if self._pendientes is not None:
+                self._pendientes[barberia_id] = None
+
+    def cargar(self) -> None:
+        """Reconstruye el índice completo desde la base de datos"""
+        with self._lock:
+            if self._pendientes is not None:
+                return
+            self._pendientes = {}
+
+        celdas: Dict[Tuple[int, int], Set[str]] = {}
+        puntos: Dict[str, Tuple[float, float, PlanMembresia]] = {}
+        db = SessionLocal()
+        try:
+            # Se leen todas las filas (no solo las activas) para que la huella de
+            # esta carga salga de la misma lectura, sin otra consulta
+            filas = db.query(
+                Barberia.id, Barberia.estado, Barberia.latitud, Barberia.longitud,
+                Barberia.plan_membresia, Barberia.updated_at
+            ).yield_per(5000)
+            total, ultima = 0, None
+            for barberia_id, estado, latitud, longitud, plan, actualizada in filas:
+                total += 1
+                if actualizada is not None and (ultima is None or actualizada > ultima):
+                    ultima = actualizada
+                if estado == EstadoBarberia.ACTIVA and latitud is not None and longitud is not None:
+                    self._poner(celdas, puntos, str(barberia_id), (float(latitud), float(longitud), plan))
+            huella = (total, ultima)
+        except Exception:
+            with self._lock:
+                self._pendientes = None
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            # Cambios recibidos mientras se leía la tabla
+            for barberia_id, entrada in self._pendientes.items():
+                self._poner(celdas, puntos, barberia_id, entrada)
+            self._celdas = celdas
+            self._puntos = puntos
+            self._pendientes = None
+            self._huella = huella
+            self.cargado = True
+
+    @staticmethod
+    def _leer_huella(db) -> tuple:
+        # Toda escritura a barberías (ORM o update() del barrido) actualiza updated_at
+        return tuple(db.execute(select(func.count(Barberia.id), func.max(Barberia.updated_at))).one())
+
+    def refrescar(self) -> bool:
+        """Recarga el índice si la tabla cambió desde la última carga (p. ej. en otro worker)"""
+        if not self.cargado:
+            return False
+        db = SessionLocal()
+        try:
+            huella = self._leer_huella(db)
+        finally:
+            db.close()
+        if huella == self._huella:
+            return False
+        self.cargar()
+        return True
+
+    async def en_segundo_plano(self) -> None:
+        """Bucle dentro del proceso de la API; cada verificación corre en un hilo"""
+        while True:
+            await asyncio.sleep(settings.GEO_INDICE_REFRESCO_SEGUNDOS)
+            try:
+                await asyncio.to_thread(self.refrescar)
+            except Exception:
+                logger.exception("No se pudo refrescar el índice de barberías")
+
+    def buscar(
+        self,
+        lat: float,
+        lng: float,
+        radio_km: float,
+        plan: Optional[PlanMembresia] = None,
+        limite: Optional[int] = None,
+        desde: Optional[Tuple[float, str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Devuelve [(barberia_id, distancia_km)] dentro del radio, ordenado por (distancia, id).
+
+        Con `limite` solo los `limite` más cercanos posteriores a `desde` (cursor
+        (distancia, id)): recorre anillos de celdas desde la del punto y se detiene
+        cuando el anillo siguiente ya no puede mejorar el peor de los seleccionados.
+        """
+        lat_min, lat_max, delta_lng = caja_envolvente(lat, lng, radio_km)
+        fila_centro, col_centro = math.floor(lat / TAMANO_CELDA), math.floor(lng / TAMANO_CELDA)
+        fila_min = math.floor(lat_min / TAMANO_CELDA)
+        fila_max = math.floor(lat_max / TAMANO_CELDA)
+        anillos = max(fila_centro - fila_min, fila_max - fila_centro, math.ceil(delta_lng / TAMANO_CELDA) + 1)
+        # Cota inferior de la distancia a una celda del anillo r: hay r - 1 celdas
+        # completas de por medio en latitud o en longitud (medida en la latitud más
+        # alejada del ecuador). Para diferencias de longitud grandes deja de ser
+        # cota y no se corta antes.
+        if delta_lng <= 5:
+            cos_min = math.cos(math.radians(min(90.0, max(abs(lat_min), abs(lat_max)))))
+            km_celda = 0.999 * RADIO_TIERRA_KM * math.radians(TAMANO_CELDA) * cos_min
+        else:
+            km_celda = 0.0
+
+        candidatos: List[Tuple[float, str]] = []
+        with self._lock:
+            celdas = self._celdas
+            puntos = self._puntos
+            lado = 2 * anillos + 1
+            if delta_lng < 180 and lado * lado <= len(celdas):
+                celdas_por_anillo = (
+                    (r, celdas.get((fila, columna % CELDAS_LONGITUD)))
+                    for r in range(anillos + 1)
+                    for fila in range(max(fila_centro - r, fila_min), min(fila_centro + r, fila_max) + 1)
+                    for columna in range(
+                        col_centro - r, col_centro + r + 1, 1 if abs(fila - fila_centro) == r else 2 * r
+                    )
+                )
+            else:
+                # Radio grande frente a las celdas ocupadas: ordenarlas por anillo
+                col_min = math.floor((lng - delta_lng) / TAMANO_CELDA)
+                ancho = CELDAS_LONGITUD if delta_lng >= 180 else math.floor((lng + delta_lng) / TAMANO_CELDA) - col_min
+                col_centro %= CELDAS_LONGITUD
+                celdas_por_anillo = sorted(
+                    (
+                        (max(abs(fila - fila_centro), min((columna - col_centro) % CELDAS_LONGITUD,
+                                                          (col_centro - columna) % CELDAS_LONGITUD)), ids)
+                        for (fila, columna), ids in celdas.items()
+                        if fila_min <= fila <= fila_max and (columna - col_min) % CELDAS_LONGITUD <= ancho
+                    ),
+                    key=lambda anillo_ids: anillo_ids[0]
+                )
+
+            anillo_actual = 0
+            for r, ids in celdas_por_anillo:
+                if r != anillo_actual:
+                    anillo_actual = r
+                    cota = (r - 1) * km_celda
+                    if cota > radio_km:
+                        break
+                    if limite and len(candidatos) >= limite:
+                        candidatos = heapq.nsmallest(limite, candidatos)
+                        if cota > candidatos[-1][0]:
+                            break
+                if not ids:
+                    continue
+                for barberia_id in ids:
+                    p_lat, p_lng, p_plan = puntos[barberia_id]
+                    if plan is not None and p_plan != plan:
+                        continue
+                    distancia = distancia_haversine(lat, lng, p_lat, p_lng)
+                    if distancia > radio_km:
+                        continue
+                    if desde is not None and (distancia, barberia_id) <= desde:
+                        continue
+                    candidatos.append((distancia, barberia_id))
+
+        if limite is not None:
+            candidatos = heapq.nsmallest(limite, candidatos)
+        else:
+            candidatos.sort()
+        return [(barberia_id, distancia) for distancia, barberia_id in candidatos]
+
+
+indice_barberias = IndiceEspacial()
@@ -0,0 +1,58 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.config.settings import settings
+from app.middlewares.auth import pwd_context
+
+
+class PoolHashing:
+    """Ejecuta bcrypt en un pool de hilos propio con un límite de trabajos pendientes.
+
+    bcrypt libera el GIL mientras calcula, así que los hilos trabajan en paralelo
+    sin ocupar el threadpool de la API. Si se supera el límite se responde 503.
+    """
+
+    def __init__(self, hilos: int, max_pendientes: int):
+        self.hilos = hilos
+        self.max_pendientes = max_pendientes
+        self.pendientes = 0
+        self.rechazados = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _ejecutar(self, fn, *args):
+        if self.pendientes >= self.max_pendientes:
+            self.rechazados += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio saturado, intenta de nuevo en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+        self.pendientes += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pendientes -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._ejecutar(pwd_context.hash, password)
+
+    async def verificar(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """Devuelve (válida, nuevo_hash); nuevo_hash solo si el costo configurado cambió"""
+        return await self._ejecutar(pwd_context.verify_and_update, password, password_hash)
+
+    def cerrar(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+pool_hashing = PoolHashing(settings.BCRYPT_HILOS, settings.BCRYPT_MAX_PENDIENTES)
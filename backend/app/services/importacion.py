@@ -0,0 +1,207 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
+from uuid import UUID
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config.settings import settings
+
+FORMATOS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+def formato_de(request: Request) -> str:
+    tipo = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if tipo not in FORMATOS:
+        raise HTTPException(
+            status_code=415,
+            detail="Formato no soportado: usa text/csv o application/x-ndjson"
+        )
+    return FORMATOS[tipo]
+
+
+async def _lineas(request: Request) -> AsyncIterator[str]:
+    """Líneas del cuerpo a medida que llegan, sin cargarlo entero en memoria"""
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    pendiente = ""
+    try:
+        async for bloque in request.stream():
+            pendiente += decodificador.decode(bloque)
+            *lineas, pendiente = pendiente.split("\n")
+            for linea in lineas:
+                yield linea
+        pendiente += decodificador.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar codificado en UTF-8")
+    if pendiente:
+        yield pendiente
+
+
+async def _registros_csv(lineas: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    """(número de fila, dict | mensaje de error); la primera fila es el encabezado"""
+    encabezado = None
+    registro: List[str] = []
+    abierto = False
+    numero = 0
+    async for linea in lineas:
+        # Un campo entre comillas puede contener saltos de línea
+        registro.append(linea)
+        if linea.count('"') % 2:
+            abierto = not abierto
+        if abierto:
+            continue
+        texto = "\n".join(registro)
+        registro = []
+        if not texto.strip():
+            continue
+        valores = next(csv.reader([texto]))
+        if encabezado is None:
+            encabezado = [v.strip() for v in valores]
+            continue
+        numero += 1
+        if len(valores) != len(encabezado):
+            yield numero, f"Se esperaban {len(encabezado)} columnas y hay {len(valores)}"
+            continue
+        # Celda vacía = valor no informado
+        yield numero, {c: v for c, v in zip(encabezado, valores) if v != ""}
+    if registro:
+        yield numero + 1, "Comillas sin cerrar al final del archivo"
+
+
+async def _registros_ndjson(lineas: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    numero = 0
+    async for linea in lineas:
+        if not linea.strip():
+            continue
+        numero += 1
+        try:
+            datos = json.loads(linea)
+        except ValueError:
+            yield numero, "JSON inválido"
+            continue
+        yield numero, datos if isinstance(datos, dict) else "Cada línea debe ser un objeto JSON"
+
+
+class Importacion:
+    """Importa filas validadas con `esquema` en lotes de executemany.
+
+    Las filas con un `id` existente actualizan ese registro (si pertenece al
+    mismo propietario); el resto se insertan con las columnas `fijas`. Cada
+    lote se confirma por separado: un lote fallido no deshace los anteriores.
+    """
+
+    def __init__(
+        self,
+        db,
+        modelo,
+        esquema: Type[BaseModel],
+        fijas: Dict[str, Any],
+        propietario: Optional[str] = None
+    ):
+        self.db = db
+        self.modelo = modelo
+        self.esquema = esquema
+        self.fijas = fijas
+        self.propietario = propietario
+        self.procesadas = 0
+        self.creadas = 0
+        self.actualizadas = 0
+        self.con_error = 0
+        self.errores: List[dict] = []
+        self.ids_actualizados: List[UUID] = []
+
+    def _error(self, fila: int, *mensajes: str) -> None:
+        self.con_error += 1
+        if len(self.errores) < settings.IMPORTACION_MAX_ERRORES:
+            self.errores.append({"fila": fila, "errores": list(mensajes)})
+
+    def _validar(self, fila: int, datos: Any) -> Optional[Tuple[int, Optional[UUID], BaseModel]]:
+        if isinstance(datos, str):
+            self._error(fila, datos)
+            return None
+        try:
+            registro_id = UUID(str(datos["id"])) if datos.get("id") else None
+        except ValueError:
+            self._error(fila, "id: no es un UUID válido")
+            return None
+        try:
+            validado = self.esquema.model_validate(datos)
+        except ValidationError as e:
+            self._error(fila, *(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+            return None
+        return fila, registro_id, validado
+
+    async def _escribir(self, lote: List[Tuple[int, Optional[UUID], BaseModel]]) -> None:
+        existentes = {}
+        ids = [registro_id for _, registro_id, _ in lote if registro_id]
+        if ids:
+            dueno = getattr(self.modelo, self.propietario) if self.propietario else self.modelo.id
+            existentes = dict((await self.db.execute(
+                select(self.modelo.id, dueno).where(self.modelo.id.in_(ids))
+            )).all())
+
+        nuevos, cambios, filas = [], [], []
+        for fila, registro_id, validado in lote:
+            if registro_id in existentes:
+                if self.propietario and existentes[registro_id] != self.fijas[self.propietario]:
+                    self._error(fila, "id: el registro pertenece a otra barbería")
+                    continue
+                # Al actualizar solo se tocan las columnas presentes en la fila
+                cambios.append({"id": registro_id, **validado.model_dump(exclude_unset=True)})
+            else:
+                nuevos.append({
+                    **validado.model_dump(), **self.fijas, **({"id": registro_id} if registro_id else {})
+                })
+            filas.append(fila)
+
+        try:
+            if nuevos:
+                # insert de Core sobre la tabla: executemany sin la contabilidad del ORM
+                await self.db.execute(insert(self.modelo.__table__), nuevos)
+            if cambios:
+                await self.db.execute(update(self.modelo), cambios)
+            await self.db.commit()
+        except SQLAlchemyError:
+            await self.db.rollback()
+            for fila in filas:
+                self._error(fila, "No se pudo guardar el lote de esta fila")
+            return
+        self.creadas += len(nuevos)
+        self.actualizadas += len(cambios)
+        self.ids_actualizados.extend(c["id"] for c in cambios)
+
+    async def ejecutar(self, request: Request) -> "Importacion":
+        formato = formato_de(request)
+        registros = (_registros_csv if formato == "csv" else _registros_ndjson)(_lineas(request))
+        lote = []
+        async for fila, datos in registros:
+            self.procesadas += 1
+            validada = self._validar(fila, datos)
+            if validada is None:
+                continue
+            lote.append(validada)
+            if len(lote) >= settings.IMPORTACION_LOTE:
+                await self._escribir(lote)
+                lote = []
+        if lote:
+            await self._escribir(lote)
+        return self
+
+    def resultado(self) -> dict:
+        return {
+            "procesadas": self.procesadas,
+            "creadas": self.creadas,
+            "actualizadas": self.actualizadas,
+            "con_error": self.con_error,
+            "errores": self.errores,
+        }
@@ -0,0 +1,246 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as TimeoutPool
+from sqlalchemy.pool import QueuePool
+
+from app.config.database import estado_pool
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_SENTENCIAS = (0, 1, 2, 5, 10, 20, 50, 100)
+LIMITES_ESPERA_POOL = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# [sentencias, segundos] de SQL de la petición en curso; la lista se comparte
+# con las copias del contexto que hacen el threadpool y los greenlets del motor async
+_sql_peticion: ContextVar[Optional[List]] = ContextVar("sql_peticion", default=None)
+
+
+class Histograma:
+    __slots__ = ("limites", "cubetas", "suma", "cuenta")
+
+    def __init__(self, limites: Tuple[float, ...]):
+        self.limites = limites
+        self.cubetas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, valor: float) -> None:
+        self.cubetas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
+
+    def lineas(self, nombre: str, etiquetas: str) -> Iterable[str]:
+        separador = "," if etiquetas else ""
+        acumulado = 0
+        for limite, cantidad in zip(self.limites + (float("inf"),), self.cubetas):
+            acumulado += cantidad
+            le = "+Inf" if limite == float("inf") else repr(limite)
+            yield f'{nombre}_bucket{{{etiquetas}{separador}le="{le}"}} {acumulado}'
+        yield f"{nombre}_sum{{{etiquetas}}} {self.suma}"
+        yield f"{nombre}_count{{{etiquetas}}} {self.cuenta}"
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(**valores) -> str:
+    return ",".join(f'{k}="{_escapar(v)}"' for k, v in valores.items())
+
+
+class Metricas:
+    """Registro en proceso de métricas HTTP y SQL, exportado en formato de texto de Prometheus.
+
+    Con varios workers cada proceso expone las suyas; Prometheus las agrega.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.en_curso = 0
+        self._peticiones: Dict[Tuple[str, str, int], int] = {}
+        self._duracion: Dict[Tuple[str, str], Histograma] = {}
+        self._sentencias: Dict[str, Histograma] = {}
+        self._segundos_sql: Dict[str, Histograma] = {}
+        self._espera_pool: Dict[str, Histograma] = {}
+        self._timeouts_pool: Dict[str, int] = {}
+        self._motores: Dict[str, object] = {}
+        self.sql_total = 0
+        self.sql_segundos = 0.0
+
+    # --- Peticiones ---
+
+    def iniciar_peticion(self):
+        with self._lock:
+            self.en_curso += 1
+        return _sql_peticion.set([0, 0.0])
+
+    def terminar_peticion(self, token, metodo: str, ruta: str, estado: int, segundos: float) -> None:
+        sentencias, segundos_sql = _sql_peticion.get()
+        _sql_peticion.reset(token)
+        with self._lock:
+            self.en_curso -= 1
+            clave = (metodo, ruta, estado)
+            self._peticiones[clave] = self._peticiones.get(clave, 0) + 1
+            if (metodo, ruta) not in self._duracion:
+                self._duracion[(metodo, ruta)] = Histograma(LIMITES_SEGUNDOS)
+            if ruta not in self._sentencias:
+                self._sentencias[ruta] = Histograma(LIMITES_SENTENCIAS)
+                self._segundos_sql[ruta] = Histograma(LIMITES_SEGUNDOS)
+            self._duracion[(metodo, ruta)].observar(segundos)
+            self._sentencias[ruta].observar(sentencias)
+            self._segundos_sql[ruta].observar(segundos_sql)
+
+    # --- SQL ---
+
+    def observar_sql(self, segundos: float) -> None:
+        acumulado = _sql_peticion.get()
+        if acumulado is not None:
+            acumulado[0] += 1
+            acumulado[1] += segundos
+        with self._lock:
+            self.sql_total += 1
+            self.sql_segundos += segundos
+
+    def observar_espera_pool(self, motor: str, segundos: float) -> None:
+        with self._lock:
+            histograma = self._espera_pool.get(motor)
+            if histograma is None:
+                histograma = self._espera_pool[motor] = Histograma(LIMITES_ESPERA_POOL)
+            histograma.observar(segundos)
+
+    def observar_timeout_pool(self, motor: str) -> None:
+        with self._lock:
+            self._timeouts_pool[motor] = self._timeouts_pool.get(motor, 0) + 1
+
+    def instrumentar(self, engine, nombre: str) -> None:
+        """Cronometra las sentencias y la espera por una conexión del pool de `engine` (síncrono)"""
+        # create_app puede llamarse más de una vez por proceso: los eventos se registran una sola
+        if engine in self._motores.values():
+            return
+        self._motores[nombre] = engine
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _antes(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _despues(conn, cursor, statement, parameters, context, executemany):
+            self.observar_sql(time.perf_counter() - conn.info["metricas_inicio"].pop())
+
+        @event.listens_for(engine, "handle_error")
+        def _error(contexto):
+            # La sentencia falló: after_cursor_execute no llega a ejecutarse
+            pila = contexto.connection.info.get("metricas_inicio") if contexto.connection else None
+            if pila:
+                self.observar_sql(time.perf_counter() - pila.pop())
+
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            # El pool no tiene evento previo al checkout: se envuelve la obtención de la conexión
+            obtener = pool._do_get
+
+            def _do_get():
+                inicio = time.perf_counter()
+                try:
+                    return obtener()
+                except TimeoutPool:
+                    self.observar_timeout_pool(nombre)
+                    raise
+                finally:
+                    self.observar_espera_pool(nombre, time.perf_counter() - inicio)
+
+            pool._do_get = _do_get
+
+    # --- Exportación ---
+
+    def exportar(self) -> str:
+        with self._lock:
+            lineas = [
+                "# HELP http_requests_in_flight Peticiones HTTP en curso",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.en_curso}",
+                "# HELP http_requests_total Peticiones HTTP por ruta y estado",
+                "# TYPE http_requests_total counter",
+            ]
+            lineas += [
+                f"http_requests_total{{{_etiquetas(method=m, route=r, status=e)}}} {n}"
+                for (m, r, e), n in sorted(self._peticiones.items())
+            ]
+            lineas += [
+                "# HELP http_request_duration_seconds Latencia de las peticiones HTTP",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (m, r), histograma in sorted(self._duracion.items()):
+                lineas += histograma.lineas("http_request_duration_seconds", _etiquetas(method=m, route=r))
+            lineas += [
+                "# HELP http_request_db_statements Sentencias SQL por petición",
+                "# TYPE http_request_db_statements histogram",
+            ]
+            for r, histograma in sorted(self._sentencias.items()):
+                lineas += histograma.lineas("http_request_db_statements", _etiquetas(route=r))
+            lineas += [
+                "# HELP http_request_db_seconds Tiempo en SQL por petición",
+                "# TYPE http_request_db_seconds histogram",
+            ]
+            for r, histograma in sorted(self._segundos_sql.items()):
+                lineas += histograma.lineas("http_request_db_seconds", _etiquetas(route=r))
+            lineas += [
+                "# HELP db_pool_checkout_wait_seconds Espera por una conexión del pool",
+                "# TYPE db_pool_checkout_wait_seconds histogram",
+            ]
+            for motor, histograma in sorted(self._espera_pool.items()):
+                lineas += histograma.lineas("db_pool_checkout_wait_seconds", _etiquetas(engine=motor))
+            lineas += [
+                "# HELP db_pool_checkout_timeouts_total Esperas por conexión que agotaron el timeout del pool",
+                "# TYPE db_pool_checkout_timeouts_total counter",
+            ]
+            lineas += [
+                f"db_pool_checkout_timeouts_total{{{_etiquetas(engine=m)}}} {n}"
+                for m, n in sorted(self._timeouts_pool.items())
+            ]
+            lineas += self._lineas_pools()
+            lineas += [
+                "# HELP db_statements_total Sentencias SQL ejecutadas (incluye tareas en segundo plano)",
+                "# TYPE db_statements_total counter",
+                f"db_statements_total {self.sql_total}",
+                "# HELP db_statement_seconds_total Tiempo total en sentencias SQL",
+                "# TYPE db_statement_seconds_total counter",
+                f"db_statement_seconds_total {self.sql_segundos}",
+            ]
+        return "\n".join(lineas) + "\n"
+
+    def _lineas_pools(self) -> List[str]:
+        estados = {m: estado_pool(e) for m, e in sorted(self._motores.items())}
+        estados = {m: e for m, e in estados.items() if "tamano" in e}
+        lineas = []
+        for metrica, campo, ayuda in (
+            ("db_pool_size", "tamano", "Conexiones permanentes configuradas en el pool"),
+            ("db_pool_checked_out", "en_uso", "Conexiones del pool en uso"),
+            ("db_pool_checked_in", "libres", "Conexiones abiertas y libres en el pool"),
+            ("db_pool_overflow", "overflow", "Conexiones abiertas por encima del tamaño del pool"),
+        ):
+            lineas += [f"# HELP {metrica} {ayuda}", f"# TYPE {metrica} gauge"]
+            lineas += [f"{metrica}{{{_etiquetas(engine=m)}}} {e[campo]}" for m, e in estados.items()]
+        return lineas
+
+    def espera_pool(self) -> Dict[str, dict]:
+        """Resumen de las esperas por conexión de cada motor"""
+        with self._lock:
+            return {
+                motor: {
+                    "esperas": h.cuenta,
+                    "media_ms": round(h.suma / h.cuenta * 1000, 3) if h.cuenta else 0.0,
+                    "mas_de_10ms": sum(h.cubetas[bisect_left(h.limites, 0.01) + 1:]),
+                    "timeouts": self._timeouts_pool.get(motor, 0),
+                }
+                for motor, h in sorted(self._espera_pool.items())
+            }
+
+
+metricas = Metricas()
@@ -0,0 +1,114 @@
+import base64
+import enum
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, and_, literal, or_, tuple_
+from sqlalchemy.types import DateTime, Enum, Integer, Numeric
+
+from app.models.tipos import UUIDNativo
+
+# (columna, descendente)
+Orden = List[Tuple[Any, bool]]
+
+
+def _a_json(valor):
+    if isinstance(valor, enum.Enum):
+        return valor.name
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if valor is None or isinstance(valor, (int, float, str)):
+        return valor
+    return str(valor)
+
+
+def codificar_cursor(valores: list) -> str:
+    datos = json.dumps([_a_json(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, cantidad: int) -> list:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        valores = None
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    return valores
+
+
+def _convertir(columna, valor):
+    """Reconstruye el valor del cursor con el tipo de la columna"""
+    if valor is None:
+        return None
+    tipo = columna.type
+    try:
+        if isinstance(tipo, Enum) and tipo.enum_class is not None:
+            return tipo.enum_class[valor]
+        if isinstance(tipo, DateTime):
+            return datetime.fromisoformat(valor)
+        if isinstance(tipo, Numeric):
+            return Decimal(valor)
+        if isinstance(tipo, Integer):
+            return int(valor)
+        if isinstance(tipo, UUIDNativo):
+            return uuid.UUID(valor)
+    except (KeyError, ValueError, TypeError, AttributeError, ArithmeticError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    return valor
+
+
+def _condicion_keyset(orden: Orden, valores: list):
+    columnas = [columna for columna, _ in orden]
+    direcciones = {descendente for _, descendente in orden}
+    if len(direcciones) == 1:
+        # Comparación de tuplas: aprovecha un índice compuesto en el mismo orden
+        cursor = tuple_(*[literal(v, c.type) for c, v in zip(columnas, valores)])
+        if direcciones.pop():
+            return tuple_(*columnas) < cursor
+        return tuple_(*columnas) > cursor
+
+    condiciones = []
+    for i, (columna, descendente) in enumerate(orden):
+        iguales = [c == v for c, v in zip(columnas[:i], valores[:i])]
+        siguiente = columna < valores[i] if descendente else columna > valores[i]
+        condiciones.append(and_(*iguales, siguiente))
+    return or_(*condiciones)
+
+
+async def paginar(
+    db, stmt: Select, orden: Orden, cursor: Optional[str], limit: int, filas: bool = False
+) -> dict:
+    """Aplica paginación por cursor (keyset) sobre las columnas de orden.
+
+    La última columna debe ser única (normalmente el id) para desempatar.
+    Con `filas=True` el select es de columnas (que deben incluir las de orden)
+    y los items son dicts en vez de objetos ORM: pydantic valida un dict bastante
+    más rápido que los atributos de una fila.
+    """
+    stmt = stmt.order_by(*[c.desc() if d else c.asc() for c, d in orden])
+    if cursor:
+        crudos = decodificar_cursor(cursor, len(orden))
+        valores = [_convertir(columna, valor) for (columna, _), valor in zip(orden, crudos)]
+        stmt = stmt.where(_condicion_keyset(orden, valores))
+
+    stmt = stmt.limit(limit + 1)
+    if filas:
+        items = [fila._asdict() for fila in (await db.execute(stmt)).all()]
+    else:
+        items = list((await db.scalars(stmt)).all())
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        ultimo = items[-1]
+        next_cursor = codificar_cursor([
+            ultimo[columna.key] if filas else getattr(ultimo, columna.key) for columna, _ in orden
+        ])
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,137 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Máximo de sentencias SQL por petición (método, plantilla de ruta), contando el
+# camino más caro con la caché de principales y la del catálogo frías, y las
+# tareas de fondo que corren dentro de la petición (purga de refresh tokens).
+# Las rutas que toman la agenda cuentan el pg_advisory_xact_lock de PostgreSQL.
+# None: sin presupuesto fijo, las importaciones crecen con el número de lotes.
+PRESUPUESTOS: Dict[Tuple[str, str], Optional[int]] = {
+    # Autenticación
+    ("POST", "/api/v1/auth/registro"): 3,
+    ("POST", "/api/v1/auth/login"): 4,
+    ("POST", "/api/v1/auth/refresh"): 4,
+    ("GET", "/api/v1/auth/me"): 1,
+    ("PUT", "/api/v1/auth/cambiar-password"): 3,
+    # Usuarios
+    ("GET", "/api/v1/usuarios/"): 2,
+    ("GET", "/api/v1/usuarios/{usuario_id}"): 2,
+    ("POST", "/api/v1/usuarios/"): 4,
+    ("PUT", "/api/v1/usuarios/{usuario_id}"): 4,
+    ("DELETE", "/api/v1/usuarios/{usuario_id}"): 3,
+    # Barberías
+    ("GET", "/api/v1/barberias/"): 2,
+    ("GET", "/api/v1/barberias/admin"): 2,
+    ("GET", "/api/v1/barberias/{barberia_id}"): 2,
+    ("POST", "/api/v1/barberias/"): 3,
+    ("POST", "/api/v1/barberias/importar"): None,
+    ("PUT", "/api/v1/barberias/{barberia_id}"): 4,
+    ("PUT", "/api/v1/barberias/{barberia_id}/admin"): 4,
+    ("POST", "/api/v1/barberias/{barberia_id}/activar"): 4,
+    ("POST", "/api/v1/barberias/{barberia_id}/suspender"): 4,
+    # Analytics
+    ("GET", "/api/v1/barberias/{barberia_id}/analytics"): 3,
+    ("GET", "/api/v1/barberias/{barberia_id}/analytics/servicios"): 3,
+    ("GET", "/api/v1/barberias/{barberia_id}/analytics/barberos"): 5,
+    # Servicios
+    ("GET", "/api/v1/servicios/barberia/{barberia_id}"): 2,
+    ("POST", "/api/v1/servicios/"): 4,
+    ("POST", "/api/v1/servicios/importar"): None,
+    ("PUT", "/api/v1/servicios/{servicio_id}"): 4,
+    ("DELETE", "/api/v1/servicios/{servicio_id}"): 3,
+    # Citas
+    ("GET", "/api/v1/citas/mis-citas"): 2,
+    ("GET", "/api/v1/citas/barberia/{barberia_id}"): 3,
+    ("GET", "/api/v1/citas/barberia/{barberia_id}/exportar"): 3,
+    ("GET", "/api/v1/citas/disponibilidad"): 4,
+    ("POST", "/api/v1/citas/"): 9,
+    ("PUT", "/api/v1/citas/{cita_id}"): 11,
+    ("POST", "/api/v1/citas/{cita_id}/cancelar"): 10,
+    # Reseñas
+    ("GET", "/api/v1/resenas/barberia/{barberia_id}"): 1,
+    ("POST", "/api/v1/resenas/"): 5,
+    ("POST", "/api/v1/resenas/{resena_id}/responder"): 4,
+    ("PUT", "/api/v1/resenas/{resena_id}"): 5,
+    ("DELETE", "/api/v1/resenas/{resena_id}"): 4,
+    # Membresías
+    ("GET", "/api/v1/membresias/"): 1,
+    ("GET", "/api/v1/membresias/{membresia_id}"): 1,
+    ("POST", "/api/v1/membresias/"): 3,
+    # Pagos
+    ("GET", "/api/v1/pagos/barberia/{barberia_id}"): 3,
+    ("GET", "/api/v1/pagos/"): 2,
+    ("GET", "/api/v1/pagos/exportar"): 2,
+    ("POST", "/api/v1/pagos/"): 5,
+    ("PUT", "/api/v1/pagos/{pago_id}"): 4,
+    # Productos
+    ("GET", "/api/v1/productos/barberia/{barberia_id}"): 2,
+    ("POST", "/api/v1/productos/"): 4,
+    ("POST", "/api/v1/productos/importar"): None,
+    ("PUT", "/api/v1/productos/{producto_id}"): 4,
+    ("DELETE", "/api/v1/productos/{producto_id}"): 3,
+}
+
+
+class PresupuestoSQLExcedido(AssertionError):
+    """Una petición ejecutó más sentencias que las presupuestadas para su ruta"""
+
+
+def rutas_sin_presupuesto(app) -> List[Tuple[str, str]]:
+    """Rutas de app/routes que no están en PRESUPUESTOS"""
+    faltantes = []
+    for ruta in app.routes:
+        endpoint = getattr(ruta, "endpoint", None)
+        if endpoint is None or not endpoint.__module__.startswith("app.routes."):
+            continue
+        for metodo in sorted(ruta.methods - {"HEAD"}):
+            if (metodo, ruta.path) not in PRESUPUESTOS:
+                faltantes.append((metodo, ruta.path))
+    return faltantes
+
+
+class PresupuestosSQL:
+    """Compara las sentencias de cada petición con PRESUPUESTOS.
+
+    Por defecto los excesos se registran en el log y en estadísticas; con
+    SQL_PRESUPUESTO_ESTRICTO la petición falla con PresupuestoSQLExcedido
+    (pensado para el entorno de pruebas y el arnés de carga).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._excesos: Dict[str, dict] = {}
+
+    def comprobar_rutas(self, app) -> None:
+        faltantes = rutas_sin_presupuesto(app)
+        if not faltantes:
+            return
+        detalle = ", ".join(f"{metodo} {ruta}" for metodo, ruta in faltantes)
+        if settings.SQL_PRESUPUESTO_ESTRICTO:
+            raise RuntimeError(f"Rutas sin presupuesto de SQL: {detalle}")
+        logger.warning("Rutas sin presupuesto de SQL: %s", detalle)
+
+    def verificar(self, metodo: str, ruta: str, sentencias: int) -> None:
+        presupuesto = PRESUPUESTOS.get((metodo, ruta))
+        if presupuesto is None or sentencias <= presupuesto:
+            return
+        clave = f"{metodo} {ruta}"
+        with self._lock:
+            exceso = self._excesos.setdefault(clave, {"presupuesto": presupuesto, "veces": 0, "maximo": 0})
+            exceso["veces"] += 1
+            exceso["maximo"] = max(exceso["maximo"], sentencias)
+        mensaje = f"{clave} ejecutó {sentencias} sentencias SQL (presupuesto {presupuesto})"
+        if settings.SQL_PRESUPUESTO_ESTRICTO:
+            raise PresupuestoSQLExcedido(mensaje)
+        logger.warning(mensaje)
+
+    def excesos(self) -> Dict[str, dict]:
+        with self._lock:
+            return {clave: dict(exceso) for clave, exceso in self._excesos.items()}
+
+
+presupuestos_sql = PresupuestosSQL()
@@ -0,0 +1,86 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+
+from app.models.barberia import Barberia
+from app.models.barbero import Barbero
+from app.models.cita import Cita, EstadoCita
+
+# Ninguna cita dura más de un día; acota la búsqueda de citas que empiezan antes
+VENTANA_SOLAPAMIENTO = timedelta(days=1)
+
+# En SQLite no hay bloqueos de fila: las reservas se serializan en el proceso
+_lock_sqlite = None
+
+
+def _obtener_lock_sqlite() -> asyncio.Lock:
+    global _lock_sqlite
+    if _lock_sqlite is None:
+        _lock_sqlite = asyncio.Lock()
+    return _lock_sqlite
+
+
+@asynccontextmanager
+async def agenda_bloqueada(db, barberia_id: UUID):
+    """Serializa las reservas de una barbería hasta el commit de la transacción"""
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "sqlite":
+        async with _obtener_lock_sqlite():
+            yield
+        return
+
+    if dialecto == "postgresql":
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:clave))"),
+            {"clave": f"agenda:{barberia_id}"}
+        )
+    else:
+        await db.execute(
+            select(Barberia.id).where(Barberia.id == barberia_id).with_for_update()
+        )
+    yield
+
+
+async def hay_solapamiento(
+    db,
+    barberia_id: UUID,
+    barbero_id: Optional[UUID],
+    inicio: datetime,
+    duracion_minutos: int,
+    excluir_cita_id: Optional[UUID] = None
+) -> bool:
+    """Indica si la franja [inicio, inicio + duración) choca con citas vigentes.
+
+    Con barbero se compara contra sus citas; sin barbero, contra la capacidad
+    de la barbería (número de barberos activos, mínimo uno).
+    """
+    fin = inicio + timedelta(minutes=duracion_minutos)
+    stmt = select(Cita.fecha_hora, Cita.duracion_minutos).where(
+        Cita.barberia_id == barberia_id,
+        Cita.estado != EstadoCita.CANCELADA,
+        Cita.fecha_hora >= inicio - VENTANA_SOLAPAMIENTO,
+        Cita.fecha_hora < fin
+    )
+    if barbero_id is not None:
+        stmt = stmt.where(Cita.barbero_id == barbero_id)
+    if excluir_cita_id is not None:
+        stmt = stmt.where(Cita.id != excluir_cita_id)
+
+    solapadas = sum(
+        1 for fecha_hora, duracion in (await db.execute(stmt)).all()
+        if fecha_hora + timedelta(minutes=int(duracion)) > inicio
+    )
+    if barbero_id is not None:
+        return solapadas > 0
+
+    capacidad = await db.scalar(
+        select(func.count()).select_from(Barbero).where(
+            Barbero.barberia_id == barberia_id,
+            Barbero.activo == True
+        )
+    )
+    return solapadas >= max(1, capacidad)
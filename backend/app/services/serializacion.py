@@ -0,0 +1,36 @@
+import threading
+from typing import Any, Dict, List
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+_adaptadores: Dict[Any, TypeAdapter] = {}
+_lock = threading.Lock()
+
+
+def adaptador(modelo) -> TypeAdapter:
+    """TypeAdapter compilado una sola vez por modelo de respuesta"""
+    resultado = _adaptadores.get(modelo)
+    if resultado is None:
+        with _lock:
+            resultado = _adaptadores.setdefault(modelo, TypeAdapter(modelo))
+    return resultado
+
+
+def a_json(modelo, datos) -> bytes:
+    """Valida (desde objetos, filas o dicts) y serializa a JSON en una sola pasada de pydantic-core"""
+    adaptador_modelo = adaptador(modelo)
+    return adaptador_modelo.dump_json(adaptador_modelo.validate_python(datos, from_attributes=True))
+
+
+def respuesta_json(modelo, datos) -> Response:
+    return Response(content=a_json(modelo, datos), media_type="application/json")
+
+
+def columnas(entidad, esquema: type[BaseModel]) -> List[Any]:
+    """Columnas de `entidad` que usa `esquema`, para seleccionar filas en vez de objetos ORM.
+
+    Los campos del esquema sin columna (p. ej. distancia_km) se omiten.
+    """
+    tabla = entidad.__table__.c
+    return [getattr(entidad, campo) for campo in esquema.model_fields if campo in tabla]
@@ -0,0 +1,120 @@
+import hashlib
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import BackgroundTasks, HTTPException, status
+from jose import JWTError, jwt
+from sqlalchemy import delete, select, update
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.middlewares.auth import crear_access_token, crear_refresh_token
+from app.models.refresh_token import RefreshToken
+from app.models.usuario import Usuario
+
+_ultima_purga = 0.0
+
+
+def _hash_jti(jti: str) -> str:
+    return hashlib.sha256(jti.encode()).hexdigest()
+
+
+def _token_invalido() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token inválido o expirado",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def emitir_tokens(db, usuario_id: str, rol, familia_id: Optional[str] = None) -> dict:
+    """Crea access + refresh token y registra el refresh en su familia (sin commit)"""
+    jti = str(uuid.uuid4())
+    familia_id = familia_id or str(uuid.uuid4())
+    db.add(RefreshToken(
+        id=_hash_jti(jti),
+        familia_id=familia_id,
+        usuario_id=usuario_id,
+        expira_en=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return {
+        "access_token": crear_access_token(data={"sub": str(usuario_id), "rol": rol.value}),
+        "refresh_token": crear_refresh_token(data={"sub": str(usuario_id), "jti": jti, "fam": familia_id}),
+        "token_type": "bearer"
+    }
+
+
+async def rotar_refresh_token(db, token: str) -> dict:
+    """Canjea un refresh token por un par nuevo de la misma familia.
+
+    Presentar un token ya canjeado indica que fue robado: se revoca toda la familia.
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise _token_invalido()
+    jti, familia_id = payload.get("jti"), payload.get("fam")
+    if payload.get("type") != "refresh" or not jti or not familia_id:
+        raise _token_invalido()
+
+    token_id = _hash_jti(jti)
+    # Marcar como usado de forma atómica: de dos canjes simultáneos solo uno gana
+    marcado = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.id == token_id,
+            RefreshToken.usado == False,
+            RefreshToken.expira_en > datetime.utcnow()
+        )
+        .values(usado=True)
+    )
+    if marcado.rowcount != 1:
+        reutilizado = await db.scalar(
+            select(RefreshToken.id).where(RefreshToken.id == token_id, RefreshToken.usado == True)
+        )
+        if reutilizado:
+            await db.execute(delete(RefreshToken).where(RefreshToken.familia_id == familia_id))
+            await db.commit()
+        raise _token_invalido()
+
+    fila = (await db.execute(
+        select(Usuario.id, Usuario.rol, Usuario.activo).where(Usuario.id == payload.get("sub"))
+    )).first()
+    if fila is None:
+        raise _token_invalido()
+    if not fila.activo:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuario inactivo")
+
+    tokens = emitir_tokens(db, fila.id, fila.rol, familia_id)
+    await db.commit()
+    return tokens
+
+
+async def revocar_refresh_tokens(db, usuario_id) -> None:
+    """Invalida todas las sesiones del usuario (sin commit)"""
+    await db.execute(delete(RefreshToken).where(RefreshToken.usuario_id == str(usuario_id)))
+
+
+def purgar_refresh_tokens() -> int:
+    """Elimina los refresh tokens expirados; devuelve cuántos borró"""
+    db = SessionLocal()
+    try:
+        borrados = db.execute(
+            delete(RefreshToken).where(RefreshToken.expira_en < datetime.utcnow())
+        ).rowcount
+        db.commit()
+        return borrados
+    finally:
+        db.close()
+
+
+def programar_purga(background_tasks: BackgroundTasks) -> None:
+    """Agenda la purga como tarea de fondo como máximo una vez por intervalo"""
+    global _ultima_purga
+    ahora = time.monotonic()
+    if ahora - _ultima_purga < settings.REFRESH_PURGA_INTERVALO_MINUTOS * 60:
+        return
+    _ultima_purga = ahora
+    background_tasks.add_task(purgar_refresh_tokens)
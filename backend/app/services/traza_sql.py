@@ -0,0 +1,168 @@
+import hmac
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+from uuid import uuid4
+
+from sqlalchemy import event
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_SQL = 2000
+
+
+class _Peticion:
+    __slots__ = ("scope", "inicio", "traza_id", "sentencias", "total", "segundos")
+
+    def __init__(self, scope, depurar: bool):
+        self.scope = scope
+        self.inicio = time.perf_counter()
+        self.traza_id = uuid4().hex if depurar else None
+        self.sentencias: Optional[List[dict]] = [] if depurar else None
+        self.total = 0
+        self.segundos = 0.0
+
+    @property
+    def ruta(self) -> str:
+        # Antes de resolver la ruta solo se conoce la URL
+        return getattr(self.scope.get("route"), "path", None) or self.scope.get("path", "")
+
+
+# Objeto mutable: lo ven las copias del contexto del threadpool y de los greenlets del motor async
+_peticion: ContextVar[Optional[_Peticion]] = ContextVar("traza_sql_peticion", default=None)
+
+
+def forma_parametros(parametros, executemany: bool) -> str:
+    """Tipos de los parámetros enlazados, nunca sus valores (pueden ser datos personales)"""
+    if executemany and parametros:
+        return f"{len(parametros)} x {forma_parametros(parametros[0], False)}"
+    if isinstance(parametros, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parametros.items()) + "}"
+    if isinstance(parametros, (list, tuple)):
+        return "(" + ", ".join(type(v).__name__ for v in parametros) + ")"
+    return type(parametros).__name__
+
+
+def _texto(statement: str) -> str:
+    return " ".join(statement.split())[:MAX_SQL]
+
+
+class TrazaSQL:
+    """Log de sentencias lentas y trazas completas de SQL por petición.
+
+    Ambas se guardan en buffers circulares: la memoria no crece con el tráfico.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lentas: deque = deque(maxlen=settings.SQL_LENTAS_MAX)
+        self._trazas: "OrderedDict[str, dict]" = OrderedDict()
+        self._motores: set = set()
+
+    def depuracion_permitida(self, valor: Optional[str]) -> bool:
+        """Sin SQL_DEBUG_TOKEN configurado no hay trazas, tampoco con DEBUG"""
+        if not valor or not settings.SQL_DEBUG_TOKEN:
+            return False
+        return hmac.compare_digest(valor, settings.SQL_DEBUG_TOKEN)
+
+    # --- Petición ---
+
+    def iniciar(self, scope, depurar: bool):
+        return _peticion.set(_Peticion(scope, depurar))
+
+    def actual(self) -> Optional[_Peticion]:
+        return _peticion.get()
+
+    def terminar(self, token) -> None:
+        peticion = _peticion.get()
+        _peticion.reset(token)
+        if peticion is None or peticion.traza_id is None:
+            return
+        traza = {
+            "id": peticion.traza_id,
+            "metodo": peticion.scope.get("method"),
+            "ruta": peticion.ruta,
+            "fecha": datetime.utcnow().isoformat(),
+            "duracion_ms": round((time.perf_counter() - peticion.inicio) * 1000, 3),
+            "total_sentencias": peticion.total,
+            "sql_ms": round(peticion.segundos * 1000, 3),
+            "sentencias": peticion.sentencias,
+            "truncada": peticion.total > len(peticion.sentencias),
+        }
+        with self._lock:
+            self._trazas[peticion.traza_id] = traza
+            while len(self._trazas) > settings.SQL_TRAZAS_MAX:
+                self._trazas.popitem(last=False)
+
+    # --- SQL ---
+
+    def _registrar(self, statement: str, parametros, executemany: bool, inicio: float, segundos: float) -> None:
+        peticion = _peticion.get()
+        if peticion is not None:
+            peticion.total += 1
+            peticion.segundos += segundos
+            if peticion.sentencias is not None and len(peticion.sentencias) < settings.SQL_TRAZA_MAX_SENTENCIAS:
+                peticion.sentencias.append({
+                    "inicio_ms": round((inicio - peticion.inicio) * 1000, 3),
+                    "duracion_ms": round(segundos * 1000, 3),
+                    "sql": _texto(statement),
+                    "parametros": forma_parametros(parametros, executemany),
+                })
+
+        if settings.SQL_LENTA_MS and segundos * 1000 >= settings.SQL_LENTA_MS:
+            ruta = peticion.ruta if peticion is not None else "segundo plano"
+            lenta = {
+                "fecha": datetime.utcnow().isoformat(),
+                "ruta": ruta,
+                "duracion_ms": round(segundos * 1000, 3),
+                "sql": _texto(statement),
+                "parametros": forma_parametros(parametros, executemany),
+            }
+            with self._lock:
+                self._lentas.append(lenta)
+            logger.warning(
+                "SQL lenta (%.1f ms) en %s: %s | parámetros %s",
+                lenta["duracion_ms"], ruta, lenta["sql"], lenta["parametros"]
+            )
+
+    def instrumentar(self, engine) -> None:
+        if engine in self._motores:
+            return
+        self._motores.add(engine)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _antes(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("traza_inicio", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _despues(conn, cursor, statement, parameters, context, executemany):
+            inicio = conn.info["traza_inicio"].pop()
+            self._registrar(statement, parameters, executemany, inicio, time.perf_counter() - inicio)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(contexto):
+            pila = contexto.connection.info.get("traza_inicio") if contexto.connection else None
+            if pila:
+                inicio = pila.pop()
+                self._registrar(
+                    contexto.statement or "", contexto.parameters, False, inicio, time.perf_counter() - inicio
+                )
+
+    # --- Consulta ---
+
+    def lentas(self) -> List[dict]:
+        with self._lock:
+            return list(reversed(self._lentas))
+
+    def traza(self, traza_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._trazas.get(traza_id)
+
+
+traza_sql = TrazaSQL()
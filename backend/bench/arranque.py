@@ -0,0 +1,130 @@
+"""Tiempo de arranque de un worker: intérprete, imports de app.main y create_app().
+
+Uso (desde backend/): python -m bench.arranque [--repeticiones 5] [--objetivo-ms 800] [--top 15]
+
+Cada repetición es un proceso nuevo con `python -X importtime`; se informa la
+mediana y los módulos con más tiempo propio de import. El piso es un proceso
+que importa los mismos módulos de terceros y de la biblioteca estándar sin
+nada de app/: lo que cuestan fastapi, sqlalchemy y pydantic en esta máquina.
+Sale con código 1 si la mediana supera --objetivo-ms o si importar y construir
+la app abrió conexiones a la base de datos. Si el piso solo ya supera el
+objetivo (máquinas lentas), el objetivo se aplica a lo que añade la app.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+HIJO = """
+import time
+inicio = time.perf_counter()
+from app.main import create_app
+importado = time.perf_counter()
+create_app()
+construido = time.perf_counter()
+from app.config.database import engine
+conexiones = engine.pool.checkedin() + engine.pool.checkedout()
+print(f"{(importado - inicio) * 1000:.1f} {(construido - importado) * 1000:.1f} {conexiones}")
+"""
+
+PISO = """
+import importlib, sys
+for modulo in sys.stdin.read().split():
+    try:
+        importlib.import_module(modulo)
+    except Exception:
+        pass
+"""
+
+LINEA_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def medir() -> Tuple[float, float, float, int, Dict[str, int]]:
+    inicio = time.perf_counter()
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", HIJO],
+        cwd=RAIZ, capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    total = (time.perf_counter() - inicio) * 1000
+    if proceso.returncode != 0:
+        sys.exit(proceso.stderr)
+    importar, construir, conexiones = proceso.stdout.split()[-3:]
+    propios = {}
+    for linea in proceso.stderr.splitlines():
+        coincidencia = LINEA_IMPORTTIME.match(linea)
+        if coincidencia:
+            propios[coincidencia.group(4)] = int(coincidencia.group(1))
+    return total, float(importar), float(construir), int(conexiones), propios
+
+
+def medir_piso(modulos: List[str]) -> float:
+    """Arranque de un proceso que importa solo las dependencias, también con -X importtime"""
+    inicio = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PISO], input="\n".join(modulos), cwd=RAIZ, check=True,
+        capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    return (time.perf_counter() - inicio) * 1000
+
+
+def _de_la_app(modulo: str) -> bool:
+    return modulo == "app" or modulo.startswith("app.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--objetivo-ms", type=float, default=800, help="mediana máxima del arranque completo")
+    parser.add_argument("--top", type=int, default=15, help="módulos con más tiempo propio a mostrar")
+    args = parser.parse_args()
+
+    # La app y el piso se alternan para que los dos vean la misma carga de la máquina
+    medidas: List[Tuple[float, float, float, int, Dict[str, int]]] = [medir()]
+    dependencias = [mod for mod in medidas[0][4] if not _de_la_app(mod)]
+    pisos = [medir_piso(dependencias)]
+    for _ in range(args.repeticiones - 1):
+        medidas.append(medir())
+        pisos.append(medir_piso(dependencias))
+    total = statistics.median(m[0] for m in medidas)
+    importar = statistics.median(m[1] for m in medidas)
+    construir = statistics.median(m[2] for m in medidas)
+    conexiones = max(m[3] for m in medidas)
+    piso = statistics.median(pisos)
+    propio = statistics.median(m[0] - p for m, p in zip(medidas, pisos))
+
+    print(f"{'arranque completo':<22}{total:>10.1f} ms")
+    print(f"{'imports de app.main':<22}{importar:>10.1f} ms")
+    print(f"{'create_app()':<22}{construir:>10.1f} ms")
+    print(f"{'piso (dependencias)':<22}{piso:>10.1f} ms")
+    print(f"{'propio de la app':<22}{propio:>10.1f} ms")
+    print(f"{'conexiones abiertas':<22}{conexiones:>10}")
+    print("\nMódulos con más tiempo propio de import (mediana, ms):")
+    modulos = set().union(*(m[4] for m in medidas))
+    propios = {mod: statistics.median(m[4].get(mod, 0) for m in medidas) / 1000 for mod in modulos}
+    for modulo, ms in sorted(propios.items(), key=lambda par: -par[1])[:args.top]:
+        print(f"  {ms:>8.1f}  {modulo}")
+
+    fallos = []
+    if piso > args.objetivo_ms:
+        print(f"AVISO: las dependencias solas tardan {piso:.1f} ms en esta máquina; "
+              f"el objetivo de {args.objetivo_ms:.0f} ms se aplica a lo que añade la app")
+        if propio > args.objetivo_ms:
+            fallos.append(f"la app añade {propio:.1f} ms al piso, objetivo {args.objetivo_ms:.0f} ms")
+    elif total > args.objetivo_ms:
+        fallos.append(f"arranque de {total:.1f} ms, objetivo {args.objetivo_ms:.0f} ms")
+    if conexiones:
+        fallos.append(f"importar y construir la app abrió {conexiones} conexiones a la base de datos")
+    for fallo in fallos:
+        print("REGRESIÓN", fallo)
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Arnés de carga: ejecuta los endpoints más usados contra la app en proceso y
+compara latencias y throughput con una línea base guardada.
+
+Uso (desde backend/, sobre una base sembrada con `python -m bench.datos`):
+
+    python -m bench.carga [--peticiones 500] [--concurrencia 16] [--escenarios login,mis_citas]
+    python -m bench.carga --guardar-linea-base      # fija la línea base de esta máquina
+
+Sale con código 1 si algún escenario tiene errores, si alguna ruta supera su
+presupuesto de sentencias SQL (app/services/presupuestos_sql.py) o si empeora más
+que --tolerancia respecto a la línea base (p95 más alto o throughput más bajo).
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+from sqlalchemy import func, select
+
+from app.config.database import SessionLocal
+from app.main import create_app
+from app.middlewares.auth import crear_access_token
+from app.models.barberia import Barberia, EstadoBarberia
+from app.models.cita import Cita
+from app.models.resena import Resena
+from app.models.servicio import Servicio
+from app.models.usuario import Usuario, RolUsuario
+from app.services.presupuestos_sql import presupuestos_sql
+from bench.datos import CIUDADES, DOMINIO, PASSWORD, email_cliente
+
+LINEA_BASE = Path(__file__).with_name("linea_base.json")
+MUESTRA = 200
+
+
+def _token(usuario_id, rol: RolUsuario) -> Dict[str, str]:
+    # Tokens firmados directamente: solo el escenario login paga bcrypt
+    return {"Authorization": "Bearer " + crear_access_token({"sub": str(usuario_id), "rol": rol.value})}
+
+
+class Contexto:
+    """Ids de la base sembrada que usan los escenarios"""
+
+    def __init__(self, azar: random.Random):
+        self.azar = azar
+        db = SessionLocal()
+        try:
+            # Las primeras barberías son las más populares del generador (más citas)
+            self.barberias = db.execute(
+                select(Barberia.id, Barberia.propietario_id)
+                .where(Barberia.estado == EstadoBarberia.ACTIVA)
+                .order_by(Barberia.id).limit(MUESTRA)
+            ).all()
+            if not self.barberias:
+                sys.exit("La base no tiene barberías activas: siembra primero con python -m bench.datos")
+            ids = [b for b, _ in self.barberias]
+            self.servicios = dict(db.execute(
+                select(Servicio.barberia_id, func.min(Servicio.id))
+                .where(Servicio.barberia_id.in_(ids)).group_by(Servicio.barberia_id)
+            ).all())
+            self.clientes = db.scalars(
+                select(Usuario.id).where(Usuario.email.like(f"cliente%@{DOMINIO}")).limit(MUESTRA)
+            ).all()
+            self.emails = db.scalars(
+                select(Usuario.email).where(Usuario.email.like(f"cliente%@{DOMINIO}")).limit(MUESTRA)
+            ).all() or [email_cliente(0)]
+            self.carga = db.scalars(
+                select(Usuario.id).where(Usuario.email.like(f"carga%@{DOMINIO}")).order_by(Usuario.email)
+            ).all()
+            # Pares ya reseñados en corridas anteriores y última cita creada por el arnés
+            self.resenados = set(map(tuple, db.execute(
+                select(Resena.cliente_id, Resena.barberia_id).where(Resena.cliente_id.in_(self.carga))
+            ).all()))
+            ultima = db.scalar(select(func.max(Cita.fecha_hora)).where(Cita.cliente_id.in_(self.carga)))
+        finally:
+            db.close()
+        self.siguiente_fecha = max(ultima or datetime(2100, 1, 1), datetime(2100, 1, 1)) + timedelta(hours=1)
+        self.pares_resena = (
+            (c, b) for b, _ in self.barberias for c in self.carga if (c, b) not in self.resenados
+        )
+
+    def nueva_fecha(self) -> datetime:
+        # Horas consecutivas lejos del calendario real: nunca se solapan entre sí
+        fecha = self.siguiente_fecha
+        self.siguiente_fecha += timedelta(hours=1)
+        return fecha
+
+
+Escenario = Callable[[httpx.AsyncClient, Contexto], Awaitable[httpx.Response]]
+
+
+async def login(cliente: httpx.AsyncClient, ctx: Contexto) -> httpx.Response:
+    return await cliente.post("/api/v1/auth/login", data={
+        "username": ctx.azar.choice(ctx.emails), "password": PASSWORD
+    })
+
+
+async def listar_barberias(cliente: httpx.AsyncClient, ctx: Contexto) -> httpx.Response:
+    if ctx.azar.random() < 0.5:
+        return await cliente.get("/api/v1/barberias/", params={"limit": 100})
+    lat, lng = ctx.azar.choice(CIUDADES)
+    return await cliente.get("/api/v1/barberias/", params={"lat": lat, "lng": lng, "radio_km": 5, "limit": 50})
+
+
+async def mis_citas(cliente: httpx.AsyncClient, ctx: Contexto) -> httpx.Response:
+    return await cliente.get(
+        "/api/v1/citas/mis-citas", params={"limit": 50},
+        headers=_token(ctx.azar.choice(ctx.clientes), RolUsuario.CLIENTE)
+    )
+
+
+async def citas_barberia(cliente: httpx.AsyncClient, ctx: Contexto) -> httpx.Response:
+    barberia_id, propietario_id = ctx.azar.choice(ctx.barberias[:20])
+    return await cliente.get(
+        f"/api/v1/citas/barberia/{barberia_id}", params={"limit": 100},
+        headers=_token(propietario_id, RolUsuario.ADMIN_BARBERIA)
+    )
+
+
+async def crear_cita(cliente: httpx.AsyncClient, ctx: Contexto) -> httpx.Response:
+    barberia_id, _ = ctx.azar.choice(ctx.barberias)
+    return await cliente.post(
+        "/api/v1/citas/",
+        json={
+            "barberia_id": str(barberia_id),
+            "servicio_id": str(ctx.servicios[barberia_id]),
+            "fecha_hora": ctx.nueva_fecha().isoformat(),
+        },
+        headers=_token(ctx.azar.choice(ctx.carga), RolUsuario.CLIENTE)
+    )
+
+
+async def crear_resena(cliente: httpx.AsyncClient, ctx: Contexto) -> httpx.Response:
+    cliente_id, barberia_id = next(ctx.pares_resena)
+    return await cliente.post(
+        "/api/v1/resenas/",
+        json={"barberia_id": str(barberia_id), "calificacion": ctx.azar.randint(1, 5)},
+        headers=_token(cliente_id, RolUsuario.CLIENTE)
+    )
+
+
+ESCENARIOS: Dict[str, Escenario] = {
+    "login": login,
+    "listar_barberias": listar_barberias,
+    "mis_citas": mis_citas,
+    "citas_barberia": citas_barberia,
+    "crear_cita": crear_cita,
+    "crear_resena": crear_resena,
+}
+
+
+async def ejecutar(
+    cliente: httpx.AsyncClient, ctx: Contexto, escenario: Escenario,
+    peticiones: int, concurrencia: int
+) -> dict:
+    latencias: List[float] = []
+    errores: Dict[int, int] = {}
+    pendientes = iter(range(peticiones))
+
+    async def trabajador():
+        for _ in pendientes:
+            inicio = time.perf_counter()
+            respuesta = await escenario(cliente, ctx)
+            latencias.append(time.perf_counter() - inicio)
+            if respuesta.status_code >= 400:
+                errores[respuesta.status_code] = errores.get(respuesta.status_code, 0) + 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+    cuantiles = statistics.quantiles(latencias, n=100, method="inclusive")
+    return {
+        "peticiones": len(latencias),
+        "errores": errores,
+        "p50_ms": round(cuantiles[49] * 1000, 2),
+        "p95_ms": round(cuantiles[94] * 1000, 2),
+        "p99_ms": round(cuantiles[98] * 1000, 2),
+        "rps": round(len(latencias) / duracion, 1),
+    }
+
+
+def regresiones(resultados: Dict[str, dict], base: Dict[str, dict], tolerancia: float) -> List[str]:
+    fallos = []
+    for nombre, r in resultados.items():
+        if r["errores"]:
+            fallos.append(f"{nombre}: respuestas con error {r['errores']}")
+        b = base.get(nombre)
+        if b is None:
+            continue
+        if r["p95_ms"] > b["p95_ms"] * (1 + tolerancia):
+            fallos.append(f"{nombre}: p95 {r['p95_ms']} ms frente a {b['p95_ms']} ms de la línea base")
+        if r["rps"] < b["rps"] * (1 - tolerancia):
+            fallos.append(f"{nombre}: {r['rps']} req/s frente a {b['rps']} req/s de la línea base")
+    return fallos
+
+
+async def principal(args) -> int:
+    nombres = args.escenarios.split(",") if args.escenarios else list(ESCENARIOS)
+    desconocidos = [n for n in nombres if n not in ESCENARIOS]
+    if desconocidos:
+        sys.exit(f"Escenarios desconocidos: {', '.join(desconocidos)}; opciones: {', '.join(ESCENARIOS)}")
+
+    ctx = Contexto(random.Random(args.semilla))
+    resultados = {}
+    transporte = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=60) as cliente:
+        for nombre in nombres:
+            # Calentamiento: cachés, sentencias compiladas y conexiones del pool
+            await ejecutar(cliente, ctx, ESCENARIOS[nombre], args.calentamiento, args.concurrencia)
+            resultados[nombre] = await ejecutar(
+                cliente, ctx, ESCENARIOS[nombre], args.peticiones, args.concurrencia
+            )
+
+    print(f"{'escenario':<18}{'n':>6}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<18}{r['peticiones']:>6}{sum(r['errores'].values()):>6}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['rps']:>10}")
+
+    excesos = [
+        f"{clave}: hasta {e['maximo']} sentencias SQL ({e['veces']} veces), presupuesto {e['presupuesto']}"
+        for clave, e in presupuestos_sql.excesos().items()
+    ]
+    for exceso in excesos:
+        print("PRESUPUESTO SQL", exceso)
+
+    ruta = Path(args.linea_base)
+    if args.guardar_linea_base:
+        ruta.write_text(json.dumps(resultados, indent=2, ensure_ascii=False) + "\n")
+        print(f"Línea base guardada en {ruta}")
+        return 0
+    if not ruta.exists():
+        print(f"Sin línea base en {ruta}: usa --guardar-linea-base para fijarla")
+        return 1 if excesos or any(r["errores"] for r in resultados.values()) else 0
+
+    fallos = regresiones(resultados, json.loads(ruta.read_text()), args.tolerancia)
+    for fallo in fallos:
+        print("REGRESIÓN", fallo)
+    return 1 if fallos or excesos else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escenarios", default="", help="separados por comas (por defecto todos)")
+    parser.add_argument("--peticiones", type=int, default=500)
+    parser.add_argument("--calentamiento", type=int, default=20)
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="empeoramiento admitido (0.25 = 25 %%)")
+    parser.add_argument("--linea-base", default=str(LINEA_BASE))
+    parser.add_argument("--guardar-linea-base", action="store_true")
+    sys.exit(asyncio.run(principal(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
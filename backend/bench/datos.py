@@ -0,0 +1,251 @@
+"""Siembra la base de datos de DATABASE_URL con volúmenes realistas para los benchmarks.
+
+Uso (desde backend/): python -m bench.datos [--escala 0.01] [--semilla 7] [--crear-esquema]
+
+Con --escala 1: 50k barberías, 500k usuarios, 20M citas y 2M reseñas. Las
+filas se insertan con executemany de Core por lotes (sin el ORM) y al final se
+recalculan los agregados de calificaciones y los resúmenes de analytics. Usa
+una base vacía con el esquema al día (`alembic upgrade head`).
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, Iterator, List
+
+from sqlalchemy import insert
+
+import app.models  # noqa: F401  registra todos los modelos
+from app.config.database import Base, SessionLocal, engine
+from app.middlewares.auth import obtener_password_hash
+from app.models.barberia import Barberia, EstadoBarberia, PlanMembresia
+from app.models.barbero import Barbero
+from app.models.cita import Cita, EstadoCita
+from app.models.resena import Resena
+from app.models.servicio import Servicio
+from app.models.tipos import uuid7
+from app.models.usuario import Usuario, RolUsuario
+from app.services.analytics import reconstruir_resumenes
+from app.services.calificaciones import recalcular_calificaciones
+
+logger = logging.getLogger("bench.datos")
+
+VOLUMENES = {"barberias": 50_000, "usuarios": 500_000, "citas": 20_000_000, "resenas": 2_000_000}
+BARBEROS_POR_BARBERIA = 3
+SERVICIOS = [
+    ("Corte clásico", Decimal("25000"), 30),
+    ("Corte + barba", Decimal("40000"), 45),
+    ("Arreglo de barba", Decimal("18000"), 20),
+    ("Afeitado tradicional", Decimal("22000"), 30),
+    ("Corte infantil", Decimal("20000"), 30),
+]
+CIUDADES = [(4.711, -74.072), (6.244, -75.581), (3.451, -76.532), (10.964, -74.796), (7.119, -73.122)]
+HORARIO = {
+    dia: {"apertura": "08:00", "cierre": "20:00"}
+    for dia in ("lunes", "martes", "miercoles", "jueves", "viernes", "sabado")
+}
+
+# Usuarios que el arnés de carga usa para escribir (crear_cita, crear_resena): sin citas ni reseñas sembradas
+CLIENTES_CARGA = 1000
+PASSWORD = "bench-nextbarber"
+DOMINIO = "bench.nextbarber.co"
+
+LOTE = 10_000
+
+
+def email_admin(i: int) -> str:
+    return f"admin{i}@{DOMINIO}"
+
+
+def email_cliente(i: int) -> str:
+    return f"cliente{i}@{DOMINIO}"
+
+
+def email_carga(i: int) -> str:
+    return f"carga{i}@{DOMINIO}"
+
+
+def _lotes(filas: Iterable[dict]) -> Iterator[List[dict]]:
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= LOTE:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _insertar(db, modelo, filas: Iterable[dict], total: int) -> None:
+    inicio = time.perf_counter()
+    hechas = 0
+    for lote in _lotes(filas):
+        db.execute(insert(modelo.__table__), lote)
+        db.commit()
+        hechas += len(lote)
+        if hechas % (LOTE * 20) == 0 or hechas == total:
+            logger.info("%s: %d/%d (%.0f filas/s)", modelo.__tablename__, hechas, total,
+                        hechas / (time.perf_counter() - inicio))
+
+
+class Generador:
+    def __init__(self, escala: float, semilla: int):
+        self.azar = random.Random(semilla)
+        self.n_barberias = max(10, int(VOLUMENES["barberias"] * escala))
+        self.n_clientes = max(100, int(VOLUMENES["usuarios"] * escala) - self.n_barberias)
+        self.n_citas = int(VOLUMENES["citas"] * escala)
+        self.n_resenas = min(int(VOLUMENES["resenas"] * escala), self.n_clientes * self.n_barberias // 2)
+        self.ahora = datetime.utcnow().replace(second=0, microsecond=0)
+
+        self.admins = [uuid7() for _ in range(self.n_barberias)]
+        self.clientes = [uuid7() for _ in range(self.n_clientes)]
+        self.barberias = [uuid7() for _ in range(self.n_barberias)]
+        self.barberos = [uuid7() for _ in range(self.n_barberias * BARBEROS_POR_BARBERIA)]
+        self.servicios = [uuid7() for _ in range(self.n_barberias * len(SERVICIOS))]
+        # Popularidad sesgada: unas pocas barberías concentran buena parte de las citas
+        self.pesos_barberias = list(_acumulados(1 / (r + 1) ** 0.8 for r in range(self.n_barberias)))
+
+    def _barberia_al_azar(self) -> int:
+        return self.azar.choices(range(self.n_barberias), cum_weights=self.pesos_barberias)[0]
+
+    def usuarios(self) -> Iterator[dict]:
+        password_hash = obtener_password_hash(PASSWORD)  # bcrypt una sola vez para todos
+        comun = {"password_hash": password_hash, "activo": True, "created_at": self.ahora}
+        for i, usuario_id in enumerate(self.admins):
+            yield {**comun, "id": usuario_id, "email": email_admin(i), "nombre": f"Admin {i}",
+                   "rol": RolUsuario.ADMIN_BARBERIA}
+        for i, usuario_id in enumerate(self.clientes):
+            yield {**comun, "id": usuario_id, "email": email_cliente(i), "nombre": f"Cliente {i}",
+                   "rol": RolUsuario.CLIENTE}
+        for i in range(CLIENTES_CARGA):
+            yield {**comun, "id": uuid7(), "email": email_carga(i), "nombre": f"Carga {i}",
+                   "rol": RolUsuario.CLIENTE}
+
+    def filas_barberias(self) -> Iterator[dict]:
+        estados = [EstadoBarberia.ACTIVA, EstadoBarberia.PENDIENTE, EstadoBarberia.SUSPENDIDA,
+                   EstadoBarberia.CANCELADA]
+        planes = [PlanMembresia.BASICO, PlanMembresia.PROFESIONAL, PlanMembresia.PREMIUM]
+        for i, barberia_id in enumerate(self.barberias):
+            lat, lng = self.azar.choice(CIUDADES)
+            # Las más populares (primeros ids) siempre activas: son las que usa el arnés
+            estado = EstadoBarberia.ACTIVA if i < 100 else self.azar.choices(estados, [85, 5, 5, 5])[0]
+            yield {
+                "id": barberia_id,
+                "propietario_id": self.admins[i],
+                "nombre": f"Barbería {i}",
+                "direccion": f"Calle {self.azar.randint(1, 200)} # {self.azar.randint(1, 99)}-{i % 100}",
+                "latitud": Decimal(str(round(self.azar.gauss(lat, 0.05), 6))),
+                "longitud": Decimal(str(round(self.azar.gauss(lng, 0.05), 6))),
+                "horario": HORARIO,
+                "estado": estado,
+                "plan_membresia": self.azar.choices(planes, [60, 30, 10])[0],
+                "fecha_vencimiento": self.ahora + timedelta(days=self.azar.randint(-30, 365)),
+                "calificacion_promedio": Decimal("0.0"),
+                "fotos": [],
+                "created_at": self.ahora,
+            }
+
+    def filas_barberos(self) -> Iterator[dict]:
+        for i, barbero_id in enumerate(self.barberos):
+            yield {"id": barbero_id, "barberia_id": self.barberias[i // BARBEROS_POR_BARBERIA],
+                   "nombre": f"Barbero {i}", "activo": True, "created_at": self.ahora}
+
+    def filas_servicios(self) -> Iterator[dict]:
+        for i, servicio_id in enumerate(self.servicios):
+            nombre, precio, duracion = SERVICIOS[i % len(SERVICIOS)]
+            yield {"id": servicio_id, "barberia_id": self.barberias[i // len(SERVICIOS)], "nombre": nombre,
+                   "precio": precio, "duracion_minutos": duracion, "activo": True, "created_at": self.ahora}
+
+    def filas_citas(self) -> Iterator[dict]:
+        pasados = [EstadoCita.COMPLETADA, EstadoCita.CANCELADA, EstadoCita.NO_ASISTIO]
+        futuros = [EstadoCita.PENDIENTE, EstadoCita.CONFIRMADA, EstadoCita.CANCELADA]
+        for _ in range(self.n_citas):
+            b = self._barberia_al_azar()
+            k = self.azar.randrange(len(SERVICIOS))
+            _, precio, duracion = SERVICIOS[k]
+            # Un año hacia atrás y un mes hacia adelante, en franjas de 15 minutos dentro del horario
+            dia = self.ahora.date() - timedelta(days=self.azar.randint(-30, 365))
+            fecha_hora = datetime(dia.year, dia.month, dia.day, 8) + timedelta(minutes=15 * self.azar.randrange(44))
+            if fecha_hora < self.ahora:
+                estado = self.azar.choices(pasados, [82, 10, 8])[0]
+            else:
+                estado = self.azar.choices(futuros, [65, 30, 5])[0]
+            yield {
+                "id": uuid7(),
+                "barberia_id": self.barberias[b],
+                "cliente_id": self.clientes[self.azar.randrange(self.n_clientes)],
+                "barbero_id": (self.barberos[b * BARBEROS_POR_BARBERIA + self.azar.randrange(BARBEROS_POR_BARBERIA)]
+                               if self.azar.random() < 0.8 else None),
+                "servicio_id": self.servicios[b * len(SERVICIOS) + k],
+                "fecha_hora": fecha_hora,
+                "duracion_minutos": duracion,
+                "precio_total": precio,
+                "estado": estado,
+                "created_at": fecha_hora - timedelta(days=self.azar.randint(0, 14)),
+            }
+
+    def filas_resenas(self) -> Iterator[dict]:
+        # Una reseña por cliente y barbería (la API rechaza la segunda)
+        vistas = set()
+        while len(vistas) < self.n_resenas:
+            b = self._barberia_al_azar()
+            c = self.azar.randrange(self.n_clientes)
+            if c * self.n_barberias + b in vistas:
+                continue
+            vistas.add(c * self.n_barberias + b)
+            yield {
+                "id": uuid7(),
+                "barberia_id": self.barberias[b],
+                "cliente_id": self.clientes[c],
+                "calificacion": self.azar.choices(range(1, 6), [3, 5, 12, 35, 45])[0],
+                "comentario": None if self.azar.random() < 0.6 else "Buen servicio",
+                "created_at": self.ahora - timedelta(days=self.azar.randint(0, 365)),
+            }
+
+    def sembrar(self) -> None:
+        logger.info(
+            "Sembrando %d barberías, %d usuarios, %d citas y %d reseñas",
+            self.n_barberias, self.n_barberias + self.n_clientes + CLIENTES_CARGA, self.n_citas, self.n_resenas
+        )
+        db = SessionLocal()
+        try:
+            total_usuarios = self.n_barberias + self.n_clientes + CLIENTES_CARGA
+            _insertar(db, Usuario, self.usuarios(), total_usuarios)
+            _insertar(db, Barberia, self.filas_barberias(), self.n_barberias)
+            _insertar(db, Barbero, self.filas_barberos(), len(self.barberos))
+            _insertar(db, Servicio, self.filas_servicios(), len(self.servicios))
+            _insertar(db, Cita, self.filas_citas(), self.n_citas)
+            _insertar(db, Resena, self.filas_resenas(), self.n_resenas)
+            logger.info("Agregados de calificaciones: %d barberías", recalcular_calificaciones(db))
+            logger.info("Resúmenes de analytics: %d filas", reconstruir_resumenes(db))
+        finally:
+            db.close()
+
+
+def _acumulados(valores: Iterable[float]) -> Iterator[float]:
+    total = 0.0
+    for valor in valores:
+        total += valor
+        yield total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escala", type=float, default=0.01, help="1 = volumen completo")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--crear-esquema", action="store_true",
+                        help="create_all en lugar de migraciones (bases desechables)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    if args.crear_esquema:
+        Base.metadata.create_all(engine)
+    inicio = time.perf_counter()
+    Generador(args.escala, args.semilla).sembrar()
+    logger.info("Listo en %.1f s", time.perf_counter() - inicio)
+
+
+if __name__ == "__main__":
+    main()
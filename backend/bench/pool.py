@@ -0,0 +1,98 @@
+"""Throughput según el tamaño del pool de conexiones (PostgreSQL).
+
+Uso (desde backend/, sobre una base sembrada con `python -m bench.datos`):
+
+    python -m bench.pool [--tamanos 2,5,10,20] [--concurrencia 32] [--escenarios mis_citas,crear_cita]
+
+Cada tamaño corre en un proceso nuevo con DB_POOL_SIZE=n y DB_MAX_OVERFLOW=0,
+los mismos escenarios de bench.carga y las métricas habilitadas para medir la
+espera por conexión. Con SQLite el pool no se configura y todas las filas
+salen iguales.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+
+from bench.carga import ESCENARIOS
+
+
+async def _hijo(args) -> None:
+    import httpx
+
+    from app.config.database import async_engine, engine, estado_pool
+    from app.config.settings import settings
+    from app.main import create_app
+    from app.services.metricas import metricas
+    from bench.carga import Contexto, ejecutar
+
+    ctx = Contexto(random.Random(args.semilla))
+    resultados = {}
+    transporte = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=60) as cliente:
+        for nombre in args.escenarios.split(","):
+            await ejecutar(cliente, ctx, ESCENARIOS[nombre], args.calentamiento, args.concurrencia)
+            resultados[nombre] = await ejecutar(
+                cliente, ctx, ESCENARIOS[nombre], args.peticiones, args.concurrencia
+            )
+    motor = "async" if settings.DB_ASYNC else "sync"
+    print(json.dumps({
+        "pool": estado_pool(async_engine.sync_engine if settings.DB_ASYNC else engine),
+        "espera": metricas.espera_pool().get(motor, {}),
+        "escenarios": resultados,
+    }))
+
+
+def _medir(tamano: int, args) -> dict:
+    entorno = {
+        **os.environ,
+        "DB_POOL_SIZE": str(tamano),
+        "DB_MAX_OVERFLOW": "0",
+        "METRICAS_HABILITADAS": "true",
+        "BARRIDO_EN_PROCESO": "false",
+    }
+    proceso = subprocess.run(
+        [sys.executable, "-m", "bench.pool", "--hijo", "--escenarios", args.escenarios,
+         "--peticiones", str(args.peticiones), "--calentamiento", str(args.calentamiento),
+         "--concurrencia", str(args.concurrencia), "--semilla", str(args.semilla)],
+        env=entorno, capture_output=True, text=True
+    )
+    if proceso.returncode != 0:
+        sys.exit(proceso.stderr)
+    return json.loads(proceso.stdout.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", default="2,5,10,20", help="DB_POOL_SIZE a comparar, separados por comas")
+    parser.add_argument("--escenarios", default="mis_citas,citas_barberia,crear_cita")
+    parser.add_argument("--peticiones", type=int, default=500)
+    parser.add_argument("--calentamiento", type=int, default=20)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    desconocidos = [n for n in args.escenarios.split(",") if n not in ESCENARIOS]
+    if desconocidos:
+        sys.exit(f"Escenarios desconocidos: {', '.join(desconocidos)}; opciones: {', '.join(ESCENARIOS)}")
+    if args.hijo:
+        asyncio.run(_hijo(args))
+        return
+
+    print(f"{'pool':>5}{'escenario':>18}{'req/s':>10}{'p95 ms':>10}{'espera media ms':>18}{'timeouts':>10}")
+    for tamano in (int(t) for t in args.tamanos.split(",")):
+        medida = _medir(tamano, args)
+        espera = medida["espera"]
+        if medida["pool"].get("tamano") != tamano:
+            print(f"{tamano:>5}  el motor no usa el pool configurado: {medida['pool']}")
+        for nombre, r in medida["escenarios"].items():
+            print(f"{tamano:>5}{nombre:>18}{r['rps']:>10}{r['p95_ms']:>10}"
+                  f"{espera.get('media_ms', 0.0):>18}{espera.get('timeouts', 0):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compara la resolución del usuario autenticado: la entidad Usuario completa
+por petición (antes) frente a JWT + caché de principales (después).
+
+Uso (desde backend/): python -m bench.principal [--llamadas 5000]
+
+Mide solo la dependencia, sobre SQLite en memoria con el driver asíncrono;
+contra PostgreSQL la diferencia crece con la latencia de red de cada SELECT.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  registra todos los modelos
+from app.config.database import Base
+from app.middlewares.auth import (
+    cache_principales, crear_access_token, obtener_principal, obtener_usuario_actual
+)
+from app.models.barberia import Barberia, EstadoBarberia
+from app.models.usuario import RolUsuario, Usuario
+
+
+async def _medir(db: AsyncSession, contador: list, funcion, llamadas: int):
+    await funcion()  # calentamiento (compila la sentencia)
+    contador[0] = 0
+    inicio = time.perf_counter()
+    for _ in range(llamadas):
+        await funcion()
+    return (time.perf_counter() - inicio) / llamadas, contador[0] / llamadas
+
+
+async def _principal(args) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    contador = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def contar(*_):
+        contador[0] += 1
+
+    async with engine.begin() as conexion:
+        await conexion.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        usuario = Usuario(
+            email="admin@bench.com", password_hash="x", nombre="Admin", rol=RolUsuario.ADMIN_BARBERIA
+        )
+        db.add(usuario)
+        await db.flush()
+        db.add(Barberia(
+            propietario_id=usuario.id, nombre="Bench", direccion="Calle 1", estado=EstadoBarberia.ACTIVA
+        ))
+        await db.commit()
+        token = crear_access_token({"sub": str(usuario.id), "rol": usuario.rol.value})
+
+        async def antes():
+            db.expunge_all()
+            await obtener_usuario_actual(token, db)
+
+        async def despues_fria():
+            cache_principales.invalidar(usuario.id)
+            await obtener_principal(token, db)
+
+        async def despues():
+            await obtener_principal(token, db)
+
+        print(f"Resolución del usuario autenticado, media de {args.llamadas} llamadas")
+        print(f"{'variante':<26}{'µs/llamada':>12}{'SQL/llamada':>13}")
+        for nombre, funcion in (
+            ("antes (Usuario completo)", antes),
+            ("después, caché fría", despues_fria),
+            ("después, caché caliente", despues),
+        ):
+            segundos, sentencias = await _medir(db, contador, funcion, args.llamadas)
+            print(f"{nombre:<26}{segundos * 1e6:>12.1f}{sentencias:>13.2f}")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llamadas", type=int, default=5000)
+    asyncio.run(_principal(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
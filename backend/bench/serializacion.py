@@ -0,0 +1,103 @@
+"""Compara la serialización de páginas de listado: objetos ORM + response_model
+de FastAPI frente al camino rápido (columnas + TypeAdapter precompilado).
+
+Uso (desde backend/): python -m bench.serializacion [--items 1000] [--repeticiones 50]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from fastapi._compat import ModelField
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from pydantic.fields import FieldInfo
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401  registra todos los modelos
+from app.config.database import Base
+from app.models.barberia import Barberia, EstadoBarberia
+from app.models.cita import Cita
+from app.schemas.barberia import BarberiaListResponse
+from app.schemas.cita import CitaResponse
+from app.schemas.paginacion import Pagina
+from app.services.serializacion import a_json, columnas
+
+
+def _poblar(db: Session, items: int) -> None:
+    propietario = uuid4()
+    barberias = [
+        Barberia(
+            propietario_id=propietario, nombre=f"Barbería {i}", direccion=f"Calle {i}",
+            latitud=Decimal("4.6") + Decimal(i) / 10000, longitud=Decimal("-74.08"),
+            estado=EstadoBarberia.ACTIVA
+        )
+        for i in range(items)
+    ]
+    db.add_all(barberias)
+    db.flush()
+    inicio = datetime(2030, 1, 1)
+    db.add_all(
+        Cita(
+            barberia_id=barberias[0].id, cliente_id=propietario, servicio_id=uuid4(),
+            fecha_hora=inicio + timedelta(minutes=30 * i), duracion_minutos=30,
+            precio_total=Decimal("25.00"), notas="Sin notas"
+        )
+        for i in range(items)
+    )
+    db.commit()
+
+
+def _antes(db: Session, entidad, esquema, items: int) -> bytes:
+    """Lo que hacía la ruta: entidades ORM validadas y codificadas por FastAPI"""
+    db.expunge_all()
+    filas = db.scalars(select(entidad).limit(items)).all()
+    campo = ModelField(name="respuesta", field_info=FieldInfo(annotation=Pagina[esquema]), mode="serialization")
+    contenido = asyncio.run(serialize_response(
+        field=campo, response_content={"items": filas, "next_cursor": None}, is_coroutine=True
+    ))
+    return JSONResponse(contenido).body
+
+
+def _despues(db: Session, entidad, esquema, items: int) -> bytes:
+    filas = [f._asdict() for f in db.execute(select(*columnas(entidad, esquema)).limit(items)).all()]
+    return a_json(Pagina[esquema], {"items": filas, "next_cursor": None})
+
+
+def _medir(funcion, repeticiones: int) -> float:
+    funcion()  # calentamiento (compila adaptadores y sentencias)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        _poblar(db, args.items)
+        print(f"Páginas de {args.items} items, media de {args.repeticiones} repeticiones")
+        print(f"{'listado':<12}{'antes ms':>10}{'después ms':>12}{'páginas/s':>16}{'mejora':>8}")
+        for nombre, entidad, esquema in (
+            ("barberias", Barberia, BarberiaListResponse),
+            ("citas", Cita, CitaResponse),
+        ):
+            antes = _medir(lambda: _antes(db, entidad, esquema, args.items), args.repeticiones)
+            despues = _medir(lambda: _despues(db, entidad, esquema, args.items), args.repeticiones)
+            print(
+                f"{nombre:<12}{antes * 1000:>10.1f}{despues * 1000:>12.1f}"
+                f"{f'{1 / antes:.0f} → {1 / despues:.0f}':>16}{antes / despues:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
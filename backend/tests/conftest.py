@@ -0,0 +1,107 @@
+import os
+import tempfile
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+
+# Antes de importar la app: base SQLite propia, sin barrido en proceso y con
+# bcrypt barato. El esquema se crea con create_all (no se prueban migraciones).
+_directorio = tempfile.mkdtemp(prefix="nextbarber-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directorio, 'tests.db')}"
+os.environ["BARRIDO_EN_PROCESO"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import models  # noqa: E402,F401  registra todos los modelos
+from app.config.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.middlewares.auth import crear_access_token  # noqa: E402
+from app.models.barberia import Barberia, EstadoBarberia, PlanMembresia  # noqa: E402
+from app.models.barbero import Barbero  # noqa: E402
+from app.models.servicio import Servicio  # noqa: E402
+from app.models.usuario import RolUsuario, Usuario  # noqa: E402
+
+DIAS = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
+
+
+@pytest.fixture(scope="session")
+def app():
+    Base.metadata.create_all(engine)
+    return create_app()
+
+
+@pytest.fixture
+def cliente(app):
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    sesion = SessionLocal()
+    yield sesion
+    sesion.close()
+
+
+class ContadorSQL:
+    """Sentencias ejecutadas por los dos motores (sync y async) desde el último reinicio"""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, *_):
+        self.total += 1
+
+    def reiniciar(self) -> None:
+        self.total = 0
+
+
+@pytest.fixture
+def contar_sql():
+    contador = ContadorSQL()
+    motores = [engine, async_engine.sync_engine]
+    for motor in motores:
+        event.listen(motor, "before_cursor_execute", contador)
+    yield contador
+    for motor in motores:
+        event.remove(motor, "before_cursor_execute", contador)
+
+
+@pytest.fixture
+def crear_usuario(db):
+    """Fábrica: crea un usuario y retorna (usuario, cabeceras con su access token)"""
+    def crear(rol: RolUsuario = RolUsuario.CLIENTE):
+        usuario = Usuario(email=f"{uuid4().hex}@pruebas.com", password_hash="x", nombre="Prueba", rol=rol)
+        db.add(usuario)
+        db.commit()
+        token = crear_access_token({"sub": str(usuario.id), "rol": rol.value})
+        return usuario, {"Authorization": f"Bearer {token}"}
+    return crear
+
+
+@pytest.fixture
+def barberia(db, crear_usuario):
+    """Barbería activa abierta todo el día con un servicio de 30 minutos y un barbero"""
+    propietario, cabeceras = crear_usuario(RolUsuario.ADMIN_BARBERIA)
+    nueva = Barberia(
+        propietario_id=propietario.id,
+        nombre="Barbería de prueba",
+        direccion="Calle 1",
+        latitud=4.711,
+        longitud=-74.072,
+        estado=EstadoBarberia.ACTIVA,
+        plan_membresia=PlanMembresia.PREMIUM,
+        horario={dia: {"apertura": "00:00", "cierre": "23:59"} for dia in DIAS},
+    )
+    db.add(nueva)
+    db.flush()
+    servicio = Servicio(barberia_id=nueva.id, nombre="Corte", precio=20000, duracion_minutos=30)
+    barbero = Barbero(barberia_id=nueva.id, nombre="Barbero")
+    db.add_all([servicio, barbero])
+    db.commit()
+    return SimpleNamespace(
+        barberia=nueva, servicio=servicio, barbero=barbero,
+        propietario=propietario, cabeceras=cabeceras
+    )
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from app.services.analytics import reconstruir_resumenes
+from app.services.disponibilidad import zona_horaria
+
+
+def _dias(cliente, agenda) -> dict:
+    respuesta = cliente.get(
+        f"/api/v1/barberias/{agenda.barberia.id}/analytics",
+        params={"desde": "2030-01-06", "hasta": "2030-01-09"}, headers=agenda.cabeceras
+    )
+    assert respuesta.status_code == 200
+    return {p["inicio"]: p["total_citas"] for p in respuesta.json()["periodos"]}
+
+
+def test_cita_de_la_noche_cuenta_en_el_dia_local(cliente, db, barberia, crear_usuario):
+    """Lunes 20:00 en Bogotá es martes 01:00 UTC: el resumen la cuenta el lunes"""
+    _, cabeceras = crear_usuario()
+    respuesta = cliente.post("/api/v1/citas/", headers=cabeceras, json={
+        "barberia_id": str(barberia.barberia.id),
+        "servicio_id": str(barberia.servicio.id),
+        "barbero_id": str(barberia.barbero.id),
+        "fecha_hora": "2030-01-07T20:00:00-05:00",
+    })
+    assert respuesta.status_code == 201
+    assert respuesta.json()["fecha_hora"].startswith("2030-01-08T01:00")
+
+    assert _dias(cliente, barberia) == {"2030-01-07": 1}
+    reconstruir_resumenes(db, barberia.barberia.id)
+    assert _dias(cliente, barberia) == {"2030-01-07": 1}
+
+
+def test_rango_por_defecto_termina_hoy_en_hora_local(cliente, barberia):
+    respuesta = cliente.get(f"/api/v1/barberias/{barberia.barberia.id}/analytics", headers=barberia.cabeceras)
+    assert respuesta.json()["hasta"] == datetime.now(zona_horaria()).date().isoformat()
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.middlewares.auth import Principal, obtener_principal
+from app.models.usuario import RolUsuario
+
+
+def test_sobrescrituras_por_aplicacion(app, crear_usuario):
+    usuario, _ = crear_usuario(RolUsuario.SUPER_ADMIN)
+    con_sobrescritura = create_app()
+    con_sobrescritura.dependency_overrides[obtener_principal] = lambda: Principal(
+        id=usuario.id, rol=RolUsuario.SUPER_ADMIN, activo=True
+    )
+
+    assert TestClient(con_sobrescritura).get("/api/v1/usuarios/").status_code == 200
+    assert TestClient(app).get("/api/v1/usuarios/").status_code == 401
+
+
+def test_create_app_no_importa_servicios_perezosos():
+    codigo = (
+        "import sys; from app.main import create_app; create_app(); "
+        "print(*[m for m in ('app.services.barrido', 'app.services.metricas', 'redis') if m in sys.modules])"
+    )
+    entorno = {**os.environ, "METRICAS_HABILITADAS": "false"}
+    proceso = subprocess.run([sys.executable, "-c", codigo], env=entorno, capture_output=True, text=True, check=True)
+    assert proceso.stdout.strip() == ""
@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+
+from app.models.cita import Cita, EstadoCita
+from app.models.usuario import RolUsuario
+from app.services.barrido import Barrido
+
+
+def test_api_lee_las_ejecuciones_del_worker(cliente, db, barberia, crear_usuario):
+    """Otra instancia de Barrido hace de worker: la API ve sus ejecuciones desde la base"""
+    _, cabeceras = crear_usuario(RolUsuario.SUPER_ADMIN)
+    antes = cliente.get("/api/barrido", headers=cabeceras).json()["citas_no_asistidas"]
+
+    db.add(Cita(
+        barberia_id=barberia.barberia.id, cliente_id=barberia.propietario.id, servicio_id=barberia.servicio.id,
+        fecha_hora=datetime.utcnow() - timedelta(days=3), duracion_minutos=30, precio_total=20000,
+        estado=EstadoCita.PENDIENTE
+    ))
+    db.commit()
+    Barrido().ejecutar()
+
+    despues = cliente.get("/api/barrido", headers=cabeceras).json()["citas_no_asistidas"]
+    assert despues["ejecuciones"] == antes["ejecuciones"] + 1
+    assert despues["filas_total"] >= antes["filas_total"] + 1
+    assert despues["filas_ultima"] >= 1
+    assert despues["errores"] == antes["errores"]
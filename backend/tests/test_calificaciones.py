@@ -0,0 +1,78 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from sqlalchemy import update
+
+from app.models.barberia import Barberia
+from app.models.usuario import RolUsuario
+from app.services.calificaciones import recalcular_calificaciones
+
+AGREGADOS = ["total_resenas", "suma_calificaciones", "calificacion_promedio", *(f"estrellas_{n}" for n in range(1, 6))]
+
+
+def _esperados(calificaciones) -> dict:
+    total, suma = len(calificaciones), sum(calificaciones)
+    promedio = (Decimal(suma) / total).quantize(Decimal("0.1"), ROUND_HALF_UP) if total else Decimal(0)
+    return {
+        "total_resenas": total,
+        "suma_calificaciones": suma,
+        "calificacion_promedio": promedio,
+        **{f"estrellas_{n}": calificaciones.count(n) for n in range(1, 6)},
+    }
+
+
+def _agregados(db, barberia) -> dict:
+    db.refresh(barberia)
+    return {campo: getattr(barberia, campo) for campo in AGREGADOS}
+
+
+def test_agregados_exactos_al_crear_editar_y_eliminar(cliente, db, barberia, crear_usuario):
+    b = barberia.barberia
+    autores, resenas = [], {}
+    for calificacion in [5, 4, 4, 2, 1, 5, 3]:
+        _, cabeceras = crear_usuario()
+        respuesta = cliente.post(
+            "/api/v1/resenas/", json={"barberia_id": str(b.id), "calificacion": calificacion}, headers=cabeceras
+        )
+        assert respuesta.status_code == 201
+        autores.append(cabeceras)
+        resenas[respuesta.json()["id"]] = calificacion
+    assert _agregados(db, b) == _esperados(list(resenas.values()))
+
+    ids = list(resenas)
+    for indice, nueva in [(0, 1), (3, 5), (4, 1)]:
+        respuesta = cliente.put(f"/api/v1/resenas/{ids[indice]}", json={"calificacion": nueva}, headers=autores[indice])
+        assert respuesta.status_code == 200
+        resenas[ids[indice]] = nueva
+    # Cambiar solo el comentario no toca los agregados
+    cliente.put(f"/api/v1/resenas/{ids[1]}", json={"comentario": "Muy bien"}, headers=autores[1])
+    assert _agregados(db, b) == _esperados(list(resenas.values()))
+
+    _, super_admin = crear_usuario(RolUsuario.SUPER_ADMIN)
+    for indice, cabeceras in [(2, autores[2]), (5, super_admin)]:
+        assert cliente.delete(f"/api/v1/resenas/{ids[indice]}", headers=cabeceras).status_code == 200
+        del resenas[ids[indice]]
+    assert _agregados(db, b) == _esperados(list(resenas.values()))
+
+    # La reconstrucción desde `resenas` da los mismos números que el camino incremental
+    incrementales = _agregados(db, b)
+    db.execute(update(Barberia).where(Barberia.id == b.id).values(
+        total_resenas=0, suma_calificaciones=0, calificacion_promedio=0, estrellas_5=9
+    ))
+    db.commit()
+    recalcular_calificaciones(db)
+    assert _agregados(db, b) == incrementales
+
+    for indice in list(resenas):
+        cliente.delete(f"/api/v1/resenas/{indice}", headers=super_admin)
+    assert _agregados(db, b) == _esperados([])
+
+
+def test_solo_el_autor_edita_su_resena(cliente, barberia, crear_usuario):
+    _, autor = crear_usuario()
+    _, otro = crear_usuario()
+    resena = cliente.post(
+        "/api/v1/resenas/", json={"barberia_id": str(barberia.barberia.id), "calificacion": 4}, headers=autor
+    ).json()
+
+    assert cliente.put(f"/api/v1/resenas/{resena['id']}", json={"calificacion": 1}, headers=otro).status_code == 403
+    assert cliente.delete(f"/api/v1/resenas/{resena['id']}", headers=otro).status_code == 403
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.cita import Cita
+from app.models.resena import Resena
+
+TOTAL = 30
+EXPANSIONES_CITA = [None, "servicio", "servicio,barbero,barberia,cliente"]
+
+
+@pytest.fixture
+def cliente_con_citas(db, barberia, crear_usuario):
+    usuario, cabeceras = crear_usuario()
+    inicio = datetime(2030, 1, 1, 9)
+    db.add_all(
+        Cita(
+            barberia_id=barberia.barberia.id, cliente_id=usuario.id, servicio_id=barberia.servicio.id,
+            barbero_id=barberia.barbero.id, fecha_hora=inicio + timedelta(minutes=30 * n),
+            duracion_minutos=30, precio_total=20000
+        )
+        for n in range(TOTAL)
+    )
+    db.commit()
+    return cabeceras
+
+
+def _listar(cliente, ruta, cabeceras, limit, expand):
+    params = {"limit": limit}
+    if expand:
+        params["expand"] = expand
+    respuesta = cliente.get(ruta, params=params, headers=cabeceras)
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()["items"]
+
+
+@pytest.mark.parametrize("limit", [5, TOTAL])
+@pytest.mark.parametrize("expand", EXPANSIONES_CITA)
+def test_mis_citas_una_consulta(cliente, cliente_con_citas, contar_sql, limit, expand):
+    # La primera petición resuelve el principal; las siguientes lo toman de la caché
+    _listar(cliente, "/api/v1/citas/mis-citas", cliente_con_citas, 1, None)
+    contar_sql.reiniciar()
+    items = _listar(cliente, "/api/v1/citas/mis-citas", cliente_con_citas, limit, expand)
+    assert len(items) == limit
+    assert contar_sql.total == 1
+    for campo in expand.split(",") if expand else []:
+        assert all(item[campo] is not None for item in items)
+
+
+@pytest.mark.parametrize("limit", [5, TOTAL])
+@pytest.mark.parametrize("expand", EXPANSIONES_CITA)
+def test_citas_barberia_consultas_fijas(cliente, barberia, cliente_con_citas, contar_sql, limit, expand):
+    ruta = f"/api/v1/citas/barberia/{barberia.barberia.id}"
+    _listar(cliente, ruta, barberia.cabeceras, 1, None)
+    contar_sql.reiniciar()
+    items = _listar(cliente, ruta, barberia.cabeceras, limit, expand)
+    assert len(items) == limit
+    # Barbería (permisos) + la página
+    assert contar_sql.total == 2
+
+
+@pytest.mark.parametrize("limit", [5, TOTAL])
+@pytest.mark.parametrize("expand", [None, "cliente"])
+def test_listar_resenas_una_consulta(cliente, db, barberia, crear_usuario, contar_sql, limit, expand):
+    barberia_id = barberia.barberia.id
+    db.add_all(
+        Resena(barberia_id=barberia_id, cliente_id=crear_usuario()[0].id, calificacion=5)
+        for _ in range(TOTAL)
+    )
+    db.commit()
+    contar_sql.reiniciar()
+    items = _listar(cliente, f"/api/v1/resenas/barberia/{barberia_id}", {}, limit, expand)
+    assert len(items) == limit
+    assert contar_sql.total == 1
+    if expand:
+        assert all(item["cliente"]["id"] for item in items)
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app.config.settings import settings
+from app.middlewares.auth import pwd_context
+from app.models.usuario import RolUsuario, Usuario
+from app.routes import auth
+from app.services import hashing
+from app.services.hashing import PoolHashing
+
+CLAVE = "clave-de-prueba"
+
+
+@pytest.fixture
+def crear_cliente(db):
+    def crear(password_hash: str) -> Usuario:
+        usuario = Usuario(
+            email=f"{uuid4().hex}@pruebas.com", nombre="Hashing", password_hash=password_hash, rol=RolUsuario.CLIENTE
+        )
+        db.add(usuario)
+        db.commit()
+        return usuario
+    return crear
+
+
+async def test_cola_llena_responde_503(app, crear_cliente, monkeypatch):
+    """Con un hilo y un trabajo pendiente como máximo, el segundo login se rechaza sin esperar"""
+    pool = PoolHashing(hilos=1, max_pendientes=1)
+    monkeypatch.setattr(auth, "pool_hashing", pool)
+    liberar = threading.Event()
+    verificar = pwd_context.verify_and_update
+
+    def verificar_retenido(*args):
+        liberar.wait(5)
+        return verificar(*args)
+
+    monkeypatch.setattr(hashing.pwd_context, "verify_and_update", verificar_retenido)
+    usuario = crear_cliente(pwd_context.hash(CLAVE))
+    datos = {"username": usuario.email, "password": CLAVE}
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://pruebas") as http:
+        primero = asyncio.create_task(http.post("/api/v1/auth/login", data=datos))
+        while pool.pendientes == 0:
+            await asyncio.sleep(0.01)
+        rechazado = await http.post("/api/v1/auth/login", data=datos)
+        liberar.set()
+        aceptado = await primero
+    pool.cerrar()
+
+    assert rechazado.status_code == 503
+    assert rechazado.headers["Retry-After"] == "1"
+    assert pool.rechazados == 1
+    assert aceptado.status_code == 200
+
+
+def test_login_rehace_el_hash_con_el_costo_anterior(cliente, db, crear_cliente):
+    costo_anterior = settings.BCRYPT_ROUNDS + 1
+    usuario = crear_cliente(pwd_context.handler().using(rounds=costo_anterior).hash(CLAVE))
+    assert usuario.password_hash.startswith(f"$2b${costo_anterior:02d}$")
+
+    respuesta = cliente.post("/api/v1/auth/login", data={"username": usuario.email, "password": CLAVE})
+    assert respuesta.status_code == 200
+
+    db.refresh(usuario)
+    assert usuario.password_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert pwd_context.verify(CLAVE, usuario.password_hash)
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.barberia import Barberia, EstadoBarberia, PlanMembresia
+from app.models.cita import Cita
+from app.services.cache import cache_catalogo
+from app.services.paginacion import codificar_cursor
+
+
+def _recorrer(cliente, url: str, limite: int, params: dict = None, **kwargs) -> list:
+    """Todas las páginas de un listado siguiendo next_cursor"""
+    items, cursor = [], None
+    while True:
+        pagina_params = {**(params or {}), "limit": limite}
+        if cursor:
+            pagina_params["cursor"] = cursor
+        respuesta = cliente.get(url, params=pagina_params, **kwargs)
+        assert respuesta.status_code == 200, respuesta.text
+        pagina = respuesta.json()
+        assert len(pagina["items"]) <= limite
+        items.extend(pagina["items"])
+        cursor = pagina["next_cursor"]
+        if cursor is None:
+            return items
+
+
+@pytest.fixture
+def citas_empatadas(db, barberia):
+    """11 citas de un mismo cliente repartidas en solo 3 horarios distintos"""
+    base = datetime(2031, 3, 3, 15)
+    citas = [
+        Cita(
+            barberia_id=barberia.barberia.id, cliente_id=barberia.propietario.id,
+            servicio_id=barberia.servicio.id, fecha_hora=base + timedelta(hours=n % 3),
+            duracion_minutos=30, precio_total=20000
+        )
+        for n in range(11)
+    ]
+    db.add_all(citas)
+    db.commit()
+    return sorted((c.fecha_hora.isoformat(), str(c.id)) for c in citas)
+
+
+@pytest.mark.parametrize("limite", [1, 4, 11, 50])
+@pytest.mark.parametrize("expand", [None, "servicio"])
+def test_citas_barberia_recorre_todas_sin_repetir(cliente, barberia, citas_empatadas, limite, expand):
+    params = {"expand": expand} if expand else {}
+    items = _recorrer(
+        cliente, f"/api/v1/citas/barberia/{barberia.barberia.id}", limite,
+        params=params, headers=barberia.cabeceras
+    )
+    assert [(i["fecha_hora"], i["id"]) for i in items] == citas_empatadas
+
+
+@pytest.mark.parametrize("limite", [1, 4])
+def test_mis_citas_descendente_con_empates(cliente, barberia, citas_empatadas, limite):
+    items = _recorrer(cliente, "/api/v1/citas/mis-citas", limite, headers=barberia.cabeceras)
+    assert [(i["fecha_hora"], i["id"]) for i in items] == citas_empatadas[::-1]
+
+
+def test_listado_de_barberias_con_empates_en_plan_y_calificacion(cliente, db, barberia):
+    nuevas = [
+        Barberia(
+            propietario_id=barberia.propietario.id, nombre=f"Empate {n}", direccion="Calle 1",
+            estado=EstadoBarberia.ACTIVA, plan_membresia=PlanMembresia.BASICO, calificacion_promedio=4.5
+        )
+        for n in range(7)
+    ]
+    db.add_all(nuevas)
+    db.commit()
+    cache_catalogo._backend = None
+
+    ids = [i["id"] for i in _recorrer(cliente, "/api/v1/barberias/", 3)]
+    assert len(ids) == len(set(ids))
+    assert {str(b.id) for b in nuevas} <= set(ids)
+
+
+@pytest.mark.parametrize("cursor", [
+    "no-es-base64!",
+    codificar_cursor(["2031-03-03T15:00:00"]),
+    codificar_cursor(["no es una fecha", "00000000-0000-0000-0000-000000000000"]),
+    codificar_cursor(["2031-03-03T15:00:00", "no es un uuid"]),
+    codificar_cursor(["2031-03-03T15:00:00", 12]),
+])
+def test_cursor_invalido_responde_400(cliente, barberia, cursor):
+    respuesta = cliente.get(
+        f"/api/v1/citas/barberia/{barberia.barberia.id}", params={"cursor": cursor}, headers=barberia.cabeceras
+    )
+    assert respuesta.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", [
+    codificar_cursor(["NO_EXISTE", "4.5", "00000000-0000-0000-0000-000000000000"]),
+    codificar_cursor(["PREMIUM", "no es un número", "00000000-0000-0000-0000-000000000000"]),
+])
+def test_cursor_invalido_en_barberias_responde_400(cliente, cursor):
+    assert cliente.get("/api/v1/barberias/", params={"cursor": cursor}).status_code == 400
@@ -0,0 +1,222 @@
+"""Cada ruta de app/routes contra su presupuesto de sentencias SQL (PRESUPUESTOS).
+
+Se mide el camino más caro, como en el presupuesto: cachés de principales y
+del catálogo vacías antes de cada petición.
+"""
+import json
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.middlewares.auth import cache_principales, crear_access_token, pwd_context
+from app.models.cita import Cita
+from app.models.membresia import Membresia
+from app.models.pago import MetodoPago, Pago
+from app.models.producto import Producto
+from app.models.resena import Resena
+from app.models.usuario import RolUsuario, Usuario
+from app.services.cache import cache_catalogo
+from app.services.presupuestos_sql import PRESUPUESTOS, rutas_sin_presupuesto
+
+CLAVE = "clave-de-prueba"
+
+
+def _ndjson(cabeceras: dict, *filas) -> dict:
+    return {
+        "content": "\n".join(json.dumps(f) for f in filas),
+        "headers": {**cabeceras, "Content-Type": "application/x-ndjson"},
+    }
+
+
+@pytest.fixture
+def mundo(db, barberia, crear_usuario):
+    """Una barbería con datos de cada tipo y usuarios de los tres roles"""
+    _, super_admin = crear_usuario(RolUsuario.SUPER_ADMIN)
+    cliente = Usuario(
+        email=f"cliente-{barberia.barberia.id}@pruebas.com", nombre="Cliente",
+        password_hash=pwd_context.hash(CLAVE), rol=RolUsuario.CLIENTE
+    )
+    otro, cabeceras_otro = crear_usuario()
+    db.add(cliente)
+    db.flush()
+    manana = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+    cita = Cita(
+        barberia_id=barberia.barberia.id, cliente_id=cliente.id, servicio_id=barberia.servicio.id,
+        barbero_id=barberia.barbero.id, fecha_hora=manana + timedelta(hours=15),
+        duracion_minutos=30, precio_total=20000
+    )
+    resena = Resena(barberia_id=barberia.barberia.id, cliente_id=otro.id, calificacion=4)
+    pago = Pago(
+        barberia_id=barberia.barberia.id, monto=100000, metodo_pago=MetodoPago.PSE,
+        periodo_inicio=manana, periodo_fin=manana + timedelta(days=30)
+    )
+    membresia = Membresia(nombre="Básico", precio_mensual=50000)
+    producto = Producto(barberia_id=barberia.barberia.id, nombre="Cera", precio=15000)
+    db.add_all([cita, resena, pago, membresia, producto])
+    db.commit()
+    return SimpleNamespace(
+        b=str(barberia.barberia.id), servicio=str(barberia.servicio.id), barbero=str(barberia.barbero.id),
+        admin=barberia.cabeceras, super_admin=super_admin,
+        cliente={"Authorization": f"Bearer {crear_access_token({'sub': str(cliente.id), 'rol': 'cliente'})}"},
+        cliente_email=cliente.email, cliente_id=str(cliente.id), otro=str(otro.id), autor_resena=cabeceras_otro,
+        cita=str(cita.id), resena=str(resena.id), pago=str(pago.id),
+        membresia=str(membresia.id), producto=str(producto.id), manana=manana,
+    )
+
+
+def _refresh(cliente, m) -> dict:
+    token = cliente.post(
+        "/api/v1/auth/login", data={"username": m.cliente_email, "password": CLAVE}
+    ).json()["refresh_token"]
+    return {"json": {"refresh_token": token}}
+
+
+# (método, ruta) -> función (cliente de pruebas, mundo) -> argumentos de la petición.
+# Las rutas con más de un camino relevante tienen varios casos.
+CASOS = {
+    # Autenticación
+    ("POST", "/api/v1/auth/registro"): lambda c, m: {
+        "json": {"email": f"nuevo-{m.b}@pruebas.com", "nombre": "Nuevo", "password": CLAVE}},
+    ("POST", "/api/v1/auth/login"): lambda c, m: {
+        "data": {"username": m.cliente_email, "password": CLAVE}},
+    ("POST", "/api/v1/auth/refresh"): _refresh,
+    ("GET", "/api/v1/auth/me"): lambda c, m: {"headers": m.cliente},
+    ("PUT", "/api/v1/auth/cambiar-password"): lambda c, m: {
+        "headers": m.cliente, "json": {"password_actual": CLAVE, "password_nuevo": "otra-clave"}},
+    # Usuarios
+    ("GET", "/api/v1/usuarios/"): lambda c, m: {"headers": m.super_admin},
+    ("GET", "/api/v1/usuarios/{usuario_id}"): lambda c, m: {
+        "path": {"usuario_id": m.otro}, "headers": m.super_admin},
+    ("POST", "/api/v1/usuarios/"): lambda c, m: {
+        "headers": m.super_admin,
+        "json": {"email": f"creado-{m.b}@pruebas.com", "nombre": "Creado", "password": CLAVE}},
+    ("PUT", "/api/v1/usuarios/{usuario_id}"): lambda c, m: {
+        "path": {"usuario_id": m.otro}, "headers": m.super_admin, "json": {"nombre": "Otro"}},
+    ("DELETE", "/api/v1/usuarios/{usuario_id}"): lambda c, m: {
+        "path": {"usuario_id": m.otro}, "headers": m.super_admin},
+    # Barberías
+    ("GET", "/api/v1/barberias/"): [
+        lambda c, m: {},
+        lambda c, m: {"params": {"lat": 4.711, "lng": -74.072, "radio_km": 5}},
+    ],
+    ("GET", "/api/v1/barberias/admin"): lambda c, m: {"headers": m.super_admin},
+    ("GET", "/api/v1/barberias/{barberia_id}"): lambda c, m: {"path": {"barberia_id": m.b}},
+    ("POST", "/api/v1/barberias/"): lambda c, m: {
+        "headers": m.super_admin, "json": {"nombre": "Nueva", "direccion": "Calle 2"}},
+    ("POST", "/api/v1/barberias/importar"): lambda c, m: {
+        **_ndjson(m.super_admin, {"nombre": "Importada", "direccion": "Calle 3"})},
+    ("PUT", "/api/v1/barberias/{barberia_id}"): lambda c, m: {
+        "path": {"barberia_id": m.b}, "headers": m.admin, "json": {"telefono": "3000000000"}},
+    ("PUT", "/api/v1/barberias/{barberia_id}/admin"): lambda c, m: {
+        "path": {"barberia_id": m.b}, "headers": m.super_admin, "json": {"plan_membresia": "basico"}},
+    ("POST", "/api/v1/barberias/{barberia_id}/activar"): lambda c, m: {
+        "path": {"barberia_id": m.b}, "headers": m.super_admin},
+    ("POST", "/api/v1/barberias/{barberia_id}/suspender"): lambda c, m: {
+        "path": {"barberia_id": m.b}, "headers": m.super_admin},
+    # Analytics
+    ("GET", "/api/v1/barberias/{barberia_id}/analytics"): lambda c, m: {
+        "path": {"barberia_id": m.b}, "headers": m.admin},
+    ("GET", "/api/v1/barberias/{barberia_id}/analytics/servicios"): lambda c, m: {
+        "path": {"barberia_id": m.b}, "headers": m.admin},
+    ("GET", "/api/v1/barberias/{barberia_id}/analytics/barberos"): lambda c, m: {
+        "path": {"barberia_id": m.b}, "headers": m.admin},
+    # Servicios
+    ("GET", "/api/v1/servicios/barberia/{barberia_id}"): lambda c, m: {"path": {"barberia_id": m.b}},
+    ("POST", "/api/v1/servicios/"): lambda c, m: {
+        "headers": m.admin, "params": {"barberia_id": m.b},
+        "json": {"nombre": "Barba", "precio": 15000, "duracion_minutos": 20}},
+    ("POST", "/api/v1/servicios/importar"): lambda c, m: {
+        "params": {"barberia_id": m.b},
+        **_ndjson(m.admin, {"nombre": "Cejas", "precio": 8000, "duracion_minutos": 10})},
+    ("PUT", "/api/v1/servicios/{servicio_id}"): lambda c, m: {
+        "path": {"servicio_id": m.servicio}, "headers": m.admin, "json": {"precio": 22000}},
+    ("DELETE", "/api/v1/servicios/{servicio_id}"): lambda c, m: {
+        "path": {"servicio_id": m.servicio}, "headers": m.admin},
+    # Citas
+    ("GET", "/api/v1/citas/mis-citas"): lambda c, m: {"headers": m.cliente},
+    ("GET", "/api/v1/citas/barberia/{barberia_id}"): [
+        lambda c, m: {"path": {"barberia_id": m.b}, "headers": m.admin},
+        lambda c, m: {"path": {"barberia_id": m.b}, "headers": m.admin, "params": {"expand": "servicio,cliente"}},
+    ],
+    ("GET", "/api/v1/citas/barberia/{barberia_id}/exportar"): lambda c, m: {
+        "path": {"barberia_id": m.b}, "headers": m.admin},
+    ("GET", "/api/v1/citas/disponibilidad"): lambda c, m: {
+        "params": {"barberia_id": m.b, "servicio_id": m.servicio}},
+    ("POST", "/api/v1/citas/"): lambda c, m: {
+        "headers": m.cliente,
+        "json": {"barberia_id": m.b, "servicio_id": m.servicio, "barbero_id": m.barbero,
+                 "fecha_hora": (m.manana + timedelta(hours=17)).isoformat()}},
+    ("PUT", "/api/v1/citas/{cita_id}"): lambda c, m: {
+        "path": {"cita_id": m.cita}, "headers": m.cliente,
+        "json": {"fecha_hora": (m.manana + timedelta(hours=18)).isoformat()}},
+    ("POST", "/api/v1/citas/{cita_id}/cancelar"): lambda c, m: {
+        "path": {"cita_id": m.cita}, "headers": m.cliente},
+    # Reseñas
+    ("GET", "/api/v1/resenas/barberia/{barberia_id}"): lambda c, m: {"path": {"barberia_id": m.b}},
+    ("POST", "/api/v1/resenas/"): lambda c, m: {
+        "headers": m.cliente, "json": {"barberia_id": m.b, "calificacion": 5}},
+    ("POST", "/api/v1/resenas/{resena_id}/responder"): lambda c, m: {
+        "path": {"resena_id": m.resena}, "headers": m.admin, "json": {"respuesta_barberia": "Gracias"}},
+    ("PUT", "/api/v1/resenas/{resena_id}"): lambda c, m: {
+        "path": {"resena_id": m.resena}, "headers": m.autor_resena, "json": {"calificacion": 2}},
+    ("DELETE", "/api/v1/resenas/{resena_id}"): lambda c, m: {
+        "path": {"resena_id": m.resena}, "headers": m.autor_resena},
+    # Membresías
+    ("GET", "/api/v1/membresias/"): lambda c, m: {},
+    ("GET", "/api/v1/membresias/{membresia_id}"): lambda c, m: {"path": {"membresia_id": m.membresia}},
+    ("POST", "/api/v1/membresias/"): lambda c, m: {
+        "headers": m.super_admin, "params": {"nombre": "Pro", "precio_mensual": 90000}},
+    # Pagos
+    ("GET", "/api/v1/pagos/barberia/{barberia_id}"): lambda c, m: {
+        "path": {"barberia_id": m.b}, "headers": m.admin},
+    ("GET", "/api/v1/pagos/"): lambda c, m: {"headers": m.super_admin},
+    ("GET", "/api/v1/pagos/exportar"): lambda c, m: {"headers": m.super_admin},
+    ("POST", "/api/v1/pagos/"): lambda c, m: {
+        "headers": m.super_admin,
+        "json": {"barberia_id": m.b, "monto": 100000, "metodo_pago": "nequi",
+                 "periodo_inicio": m.manana.isoformat(),
+                 "periodo_fin": (m.manana + timedelta(days=30)).isoformat()}},
+    ("PUT", "/api/v1/pagos/{pago_id}"): lambda c, m: {
+        "path": {"pago_id": m.pago}, "headers": m.super_admin, "json": {"estado": "completado"}},
+    # Productos
+    ("GET", "/api/v1/productos/barberia/{barberia_id}"): lambda c, m: {"path": {"barberia_id": m.b}},
+    ("POST", "/api/v1/productos/"): lambda c, m: {
+        "headers": m.admin, "params": {"barberia_id": m.b, "nombre": "Gel", "precio": 12000}},
+    ("POST", "/api/v1/productos/importar"): lambda c, m: {
+        "params": {"barberia_id": m.b}, **_ndjson(m.admin, {"nombre": "Aceite", "precio": 30000})},
+    ("PUT", "/api/v1/productos/{producto_id}"): lambda c, m: {
+        "path": {"producto_id": m.producto}, "headers": m.admin, "params": {"stock": 5}},
+    ("DELETE", "/api/v1/productos/{producto_id}"): lambda c, m: {
+        "path": {"producto_id": m.producto}, "headers": m.admin},
+}
+
+PARAMETROS = [
+    pytest.param(metodo, ruta, caso, id=f"{metodo} {ruta}#{n}")
+    for (metodo, ruta), casos in CASOS.items()
+    for n, caso in enumerate(casos if isinstance(casos, list) else [casos])
+]
+
+
+def test_todas_las_rutas_tienen_presupuesto(app):
+    assert rutas_sin_presupuesto(app) == []
+
+
+def test_todas_las_rutas_tienen_caso():
+    assert set(CASOS) == set(PRESUPUESTOS)
+
+
+@pytest.mark.parametrize("metodo, ruta, caso", PARAMETROS)
+def test_ruta_dentro_del_presupuesto(cliente, mundo, contar_sql, metodo, ruta, caso):
+    argumentos = caso(cliente, mundo)
+    url = ruta.format(**argumentos.pop("path", {}))
+    cache_principales._principales.clear()
+    cache_catalogo._backend = None
+
+    contar_sql.reiniciar()
+    respuesta = cliente.request(metodo, url, **argumentos)
+    assert respuesta.status_code < 300, respuesta.text
+
+    presupuesto = PRESUPUESTOS[(metodo, ruta)]
+    if presupuesto is not None:
+        assert contar_sql.total <= presupuesto
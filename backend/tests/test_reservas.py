@@ -0,0 +1,123 @@
+import asyncio
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+import httpx
+import pytest
+
+RESERVAS_CONCURRENTES = 200
+
+
+def _cuerpo(agenda, fecha_hora: str) -> dict:
+    return {
+        "barberia_id": str(agenda.barberia.id),
+        "servicio_id": str(agenda.servicio.id),
+        "barbero_id": str(agenda.barbero.id),
+        "fecha_hora": fecha_hora,
+    }
+
+
+async def test_reservas_concurrentes_del_mismo_horario(app, barberia, crear_usuario):
+    """Cientos de reservas simultáneas del mismo horario: exactamente una se crea"""
+    inicio = datetime.combine(date.today() + timedelta(days=2), time(15))
+    clientes = [crear_usuario()[1] for _ in range(10)]
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://pruebas") as http:
+        respuestas = await asyncio.gather(*(
+            http.post(
+                "/api/v1/citas/",
+                json=_cuerpo(barberia, inicio.isoformat()),
+                headers=clientes[n % len(clientes)]
+            )
+            for n in range(RESERVAS_CONCURRENTES)
+        ))
+
+    codigos = Counter(r.status_code for r in respuestas)
+    assert codigos == {201: 1, 409: RESERVAS_CONCURRENTES - 1}
+
+
+@pytest.mark.parametrize("sufijo, hora_utc", [("", 15), ("Z", 15), ("+00:00", 15), ("-05:00", 20)])
+def test_crear_cita_normaliza_fecha_a_utc(cliente, barberia, crear_usuario, sufijo, hora_utc):
+    _, cabeceras = crear_usuario()
+    fecha = date.today() + timedelta(days=3)
+    respuesta = cliente.post(
+        "/api/v1/citas/",
+        json=_cuerpo(barberia, f"{fecha.isoformat()}T15:00:00{sufijo}"),
+        headers=cabeceras
+    )
+    assert respuesta.status_code == 201, respuesta.text
+    assert respuesta.json()["fecha_hora"] == datetime.combine(fecha, time(hora_utc)).isoformat()
+
+
+def test_horarios_con_distinto_desfase_se_solapan(cliente, barberia, crear_usuario):
+    """10:00-05:00 y 15:00Z son el mismo instante"""
+    _, cabeceras = crear_usuario()
+    fecha = (date.today() + timedelta(days=4)).isoformat()
+    primera = cliente.post("/api/v1/citas/", json=_cuerpo(barberia, f"{fecha}T10:00:00-05:00"), headers=cabeceras)
+    segunda = cliente.post("/api/v1/citas/", json=_cuerpo(barberia, f"{fecha}T15:00:00Z"), headers=cabeceras)
+    assert primera.status_code == 201
+    assert segunda.status_code == 409
+
+
+def test_reactivar_cita_cancelada_comprueba_el_horario(cliente, barberia, crear_usuario):
+    """Una cita cancelada cuyo horario ya se volvió a reservar no puede reactivarse"""
+    _, cabeceras = crear_usuario()
+    fecha_hora = f"{date.today() + timedelta(days=5)}T16:00:00"
+    cancelada = cliente.post("/api/v1/citas/", json=_cuerpo(barberia, fecha_hora), headers=cabeceras).json()
+    cliente.post(f"/api/v1/citas/{cancelada['id']}/cancelar", headers=cabeceras)
+    nueva = cliente.post("/api/v1/citas/", json=_cuerpo(barberia, fecha_hora), headers=cabeceras)
+    assert nueva.status_code == 201
+
+    respuesta = cliente.put(
+        f"/api/v1/citas/{cancelada['id']}", json={"estado": "confirmada"}, headers=barberia.cabeceras
+    )
+    assert respuesta.status_code == 409
+
+    cliente.post(f"/api/v1/citas/{nueva.json()['id']}/cancelar", headers=cabeceras)
+    respuesta = cliente.put(
+        f"/api/v1/citas/{cancelada['id']}", json={"estado": "confirmada"}, headers=barberia.cabeceras
+    )
+    assert respuesta.status_code == 200
+
+
+@pytest.mark.parametrize("ruta", ["", "/exportar"])
+def test_filtro_por_fecha_con_desfase(cliente, barberia, crear_usuario, ruta):
+    """20:00-05:00 es 01:00 UTC del día siguiente, como se guarda la cita"""
+    _, cabeceras = crear_usuario()
+    fecha = date.today() + timedelta(days=6)
+    cita = cliente.post(
+        "/api/v1/citas/", json=_cuerpo(barberia, f"{fecha}T20:00:00-05:00"), headers=cabeceras
+    ).json()
+
+    respuesta = cliente.get(
+        f"/api/v1/citas/barberia/{barberia.barberia.id}{ruta}",
+        params={"fecha_inicio": f"{fecha}T19:30:00-05:00", "fecha_fin": f"{fecha}T20:30:00-05:00"},
+        headers=barberia.cabeceras
+    )
+    assert respuesta.status_code == 200
+    assert cita["id"] in respuesta.text
+
+
+@pytest.mark.parametrize("por_barbero", [False, True])
+def test_reservar_saca_el_horario_de_la_disponibilidad(cliente, barberia, crear_usuario, por_barbero):
+    """La agenda en caché y su invalidación al reservar usan la misma clave"""
+    fecha = date.today() + timedelta(days=6)
+    params = {
+        "barberia_id": str(barberia.barberia.id), "servicio_id": str(barberia.servicio.id),
+        "fecha_inicio": fecha.isoformat(), "dias": 1,
+        **({"barbero_id": str(barberia.barbero.id)} if por_barbero else {}),
+    }
+
+    def slots() -> list:
+        respuesta = cliente.get("/api/v1/citas/disponibilidad", params=params)
+        assert respuesta.status_code == 200, respuesta.text
+        return respuesta.json()["dias"][0]["slots"]
+
+    libres = slots()
+    assert {s["barbero_id"] for s in libres} == {str(barberia.barbero.id)}
+    _, cabeceras = crear_usuario()
+    inicio = libres[10]["inicio"]
+    assert cliente.post("/api/v1/citas/", json=_cuerpo(barberia, inicio), headers=cabeceras).status_code == 201
+
+    assert inicio not in {s["inicio"] for s in slots()}
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import update
+
+from app.config.settings import settings
+from app.middlewares.auth import pwd_context
+from app.models.refresh_token import RefreshToken
+from app.models.usuario import RolUsuario, Usuario
+
+CLAVE = "clave-de-prueba"
+
+
+@pytest.fixture
+def usuario(db):
+    nuevo = Usuario(
+        email=f"{uuid4().hex}@pruebas.com", nombre="Sesiones",
+        password_hash=pwd_context.hash(CLAVE), rol=RolUsuario.CLIENTE
+    )
+    db.add(nuevo)
+    db.commit()
+    return nuevo
+
+
+def _login(cliente, usuario) -> dict:
+    respuesta = cliente.post("/api/v1/auth/login", data={"username": usuario.email, "password": CLAVE})
+    assert respuesta.status_code == 200
+    return respuesta.json()
+
+
+def _refrescar(cliente, token: str):
+    return cliente.post("/api/v1/auth/refresh", json={"refresh_token": token})
+
+
+def test_rotacion_invalida_el_token_anterior(cliente, usuario):
+    primero = _login(cliente, usuario)["refresh_token"]
+    respuesta = _refrescar(cliente, primero)
+    assert respuesta.status_code == 200
+    segundo = respuesta.json()["refresh_token"]
+    assert segundo != primero
+
+    assert _refrescar(cliente, primero).status_code == 401
+
+
+def test_reutilizar_un_token_rotado_revoca_la_familia(cliente, usuario):
+    primero = _login(cliente, usuario)["refresh_token"]
+    segundo = _refrescar(cliente, primero).json()["refresh_token"]
+
+    assert _refrescar(cliente, primero).status_code == 401
+    # El más reciente también cae: quien robó el primero no puede seguir rotando
+    assert _refrescar(cliente, segundo).status_code == 401
+
+
+def test_otras_familias_no_se_revocan(cliente, usuario):
+    movil = _login(cliente, usuario)["refresh_token"]
+    web = _login(cliente, usuario)["refresh_token"]
+    _refrescar(cliente, movil)
+    _refrescar(cliente, movil)
+
+    assert _refrescar(cliente, web).status_code == 200
+
+
+def test_token_expirado_en_la_base(cliente, db, usuario):
+    token = _login(cliente, usuario)["refresh_token"]
+    db.execute(
+        update(RefreshToken).where(RefreshToken.usuario_id == usuario.id)
+        .values(expira_en=datetime.utcnow() - timedelta(minutes=1))
+    )
+    db.commit()
+
+    assert _refrescar(cliente, token).status_code == 401
+
+
+def test_token_con_exp_vencido(cliente, usuario, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_EXPIRE_DAYS", -1)
+    token = _login(cliente, usuario)["refresh_token"]
+
+    assert _refrescar(cliente, token).status_code == 401
+
+
+def test_cambiar_password_revoca_las_sesiones(cliente, usuario):
+    sesion = _login(cliente, usuario)
+    respuesta = cliente.put(
+        "/api/v1/auth/cambiar-password",
+        json={"password_actual": CLAVE, "password_nuevo": "otra-clave"},
+        headers={"Authorization": f"Bearer {sesion['access_token']}"}
+    )
+    assert respuesta.status_code == 200
+
+    assert _refrescar(cliente, sesion["refresh_token"]).status_code == 401
@@ -0,0 +1,28 @@
+import pytest
+
+from app.config.settings import settings
+
+
+def _traza(cliente, barberia, cabecera):
+    return cliente.get(
+        f"/api/v1/servicios/barberia/{barberia.barberia.id}", headers={"X-Debug-SQL": cabecera}
+    )
+
+
+@pytest.mark.parametrize("debug", [True, False])
+def test_sin_token_no_hay_trazas(cliente, barberia, monkeypatch, debug):
+    monkeypatch.setattr(settings, "SQL_DEBUG_TOKEN", "")
+    monkeypatch.setattr(settings, "DEBUG", debug)
+    assert "X-Debug-SQL" not in _traza(cliente, barberia, "cualquiera").headers
+    assert cliente.get("/api/debug/sql/x", headers={"X-Debug-SQL": "cualquiera"}).status_code == 403
+
+
+def test_traza_con_token(cliente, barberia, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_DEBUG_TOKEN", "secreto")
+    assert "X-Debug-SQL" not in _traza(cliente, barberia, "otro").headers
+
+    traza_id = _traza(cliente, barberia, "secreto").headers["X-Debug-SQL"]
+    assert cliente.get(f"/api/debug/sql/{traza_id}", headers={"X-Debug-SQL": "otro"}).status_code == 403
+    respuesta = cliente.get(f"/api/debug/sql/{traza_id}", headers={"X-Debug-SQL": "secreto"})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["sentencias"]